@@ -2,6 +2,7 @@ import ovr
 import pygame
 import pygame.locals as pgl
 from ovr.rift import Rift
+from ovr.mirror import MirrorTexture
 from OpenGL.GL import *    #@UnusedWildImport
 
 class RiftSwapFramebuffer():
@@ -10,7 +11,7 @@ class RiftSwapFramebuffer():
     self.depth = 0
     self.size = size
     self.format = format_
-    self.fbo = 0
+    self.fbos = []
     self.build()
     
   def build(self, ):
@@ -21,33 +22,35 @@ class RiftSwapFramebuffer():
     glRenderbufferStorage(GL_RENDERBUFFER, GL_DEPTH_COMPONENT, self.size.w, self.size.h)
     glBindRenderbuffer(GL_RENDERBUFFER, 0)
 
-    # Set up the framebuffer proper
-    self.fbo = glGenFramebuffers(1)
-    glBindFramebuffer(GL_FRAMEBUFFER, self.fbo)
-    glFramebufferRenderbuffer(GL_FRAMEBUFFER, GL_DEPTH_ATTACHMENT, GL_RENDERBUFFER, self.depth)
+    # One framebuffer per swap chain texture, so nothing is re-attached or
+    # re-validated when the swap chain moves on to its next texture
+    length = ovr.getTextureSwapChainLength(self.rift.session, self.pTextureSet).value
+    for index in range(length):
+      textureId = ovr.getTextureSwapChainBufferGL(self.rift.session, self.pTextureSet, index).value
+      fbo = glGenFramebuffers(1)
+      glBindFramebuffer(GL_FRAMEBUFFER, fbo)
+      glFramebufferTexture2D(GL_FRAMEBUFFER, GL_COLOR_ATTACHMENT0, GL_TEXTURE_2D, textureId, 0)
+      glFramebufferRenderbuffer(GL_FRAMEBUFFER, GL_DEPTH_ATTACHMENT, GL_RENDERBUFFER, self.depth)
+      fboStatus = glCheckFramebufferStatus(GL_FRAMEBUFFER)
+      if (GL_FRAMEBUFFER_COMPLETE != fboStatus):
+        raise Exception("Bad framebuffer setup")
+      self.fbos.append(fbo)
     glBindFramebuffer(GL_FRAMEBUFFER, 0)
     
   def commit(self):
     self.rift.commit_texture_swap_chain(self.pTextureSet)
 
   def destroy(self):
-    glDeleteFramebuffers(1, [self.fbo])
+    glDeleteFramebuffers(len(self.fbos), self.fbos)
+    self.fbos = []
     glDeleteRenderbuffers(1, [self.depth])
     if self.pTextureSet is not None:
       self.rift.destroy_swap_texture(self.pTextureSet)
   
-  def attachCurrentTexture(self, target = GL_DRAW_FRAMEBUFFER):
-    textureId =  ovr.getTextureSwapChainBufferGL(self.rift.session, self.pTextureSet, -1)
-    # We switch textures every frame, so we need to bind the new texture here
-    glFramebufferTexture2D(target, GL_COLOR_ATTACHMENT0, GL_TEXTURE_2D, textureId, 0)
-
-    # FIXME? validating every frame may be excessive
-    fboStatus = glCheckFramebufferStatus(target)
-    if (GL_FRAMEBUFFER_COMPLETE != fboStatus):
-      raise Exception("Bad framebuffer setup")
-    
   def bind(self, target = GL_DRAW_FRAMEBUFFER):
-    glBindFramebuffer(target, self.fbo)
+    "Bind the framebuffer of the swap chain texture to render into next"
+    index = ovr.getTextureSwapChainCurrentIndex(self.rift.session, self.pTextureSet).value
+    glBindFramebuffer(target, self.fbos[index])
 
     
   def unbind(self, target = GL_DRAW_FRAMEBUFFER):
@@ -99,6 +102,8 @@ class RiftApp():
     self.layer = layer
         
   def close(self):
+    if self.mirrorTexture is not None:
+      self.mirrorTexture.destroy()
     self.framebuffer.destroy()
     self.rift.destroy()
     self.rift = None
@@ -125,23 +130,23 @@ class RiftApp():
     self.framebuffer = RiftSwapFramebuffer(self.rift, self.bufferSize)
     self.layer.ColorTexture[0]  = self.framebuffer.pTextureSet # single texture for both eyes
     self.layer.ColorTexture[1]  = self.framebuffer.pTextureSet # single texture for both eyes
+    self.mirrorTexture = None
+    if self.mirror:
+      self.mirrorTexture = MirrorTexture(self.rift.session, self.windowSize.w, self.windowSize.h)
 
   def submit_frame(self): 
     layers = [self.layer.Header]
-    for eye in range(0, 2):
-      self.layer.RenderPose[eye] = self.poses[eye]
     self.framebuffer.commit()
     self.rift.submit_frame(self.frame, self.viewScale, layers, 1)
 
   def render_frame(self):
     self.frame += 1
 
-    # Fetch the head pose
-    self.poses = self.rift.get_eye_poses(self.frame, ovr.ovrTrue, self.eyeOffsets)
+    # Fetch the head pose, straight into the layer
+    self.poses = self.rift.get_eye_poses(self.frame, True, layer=self.layer)
 
     # Active the offscreen framebuffer and render the scene
     self.framebuffer.bind()
-    self.framebuffer.attachCurrentTexture()
     for eye in range(0, 2):
       self.currentEye = eye
       vp = self.layer.Viewport[eye]
@@ -152,17 +157,11 @@ class RiftApp():
       
     self.currentEye = -1
     self.framebuffer.unbind()
-    # Optional, mirror to the screen
-    if self.mirror:
-      glDisable(GL_SCISSOR_TEST)
-      glViewport(0, 0, self.windowSize.w, self.windowSize.h)
-      glClear(GL_DEPTH_BUFFER_BIT | GL_COLOR_BUFFER_BIT)
-      self.framebuffer.bind(GL_READ_FRAMEBUFFER)
-      glBlitFramebuffer(0, 0, self.framebuffer.size.w, self.framebuffer.size.h,
-                        0, 0, self.windowSize.w, self.windowSize.h, 
-                        GL_COLOR_BUFFER_BIT, GL_NEAREST)
-      self.framebuffer.unbind(GL_READ_FRAMEBUFFER)
     self.submit_frame()
+    # Optional, show what the headset shows on the screen
+    if self.mirrorTexture is not None:
+      glDisable(GL_SCISSOR_TEST)
+      self.mirrorTexture.blit(self.windowSize.w, self.windowSize.h)
 
   def update(self):
     for event in pygame.event.get():
@@ -1,7 +1,78 @@
-
 from .version import __version__
 
-try:
-    from ._ovr1160 import *
-except:
-    raise
+import importlib
+import sys
+import types
+
+_bindings = None
+
+def _loadBindings():
+    "Import the generated binding module, the first time it is needed"
+    global _bindings
+    if _bindings is None:
+        from . import _loader
+        moduleName = _loader.selectBindingModule()
+        _bindings = importlib.import_module("." + moduleName, __name__)
+    return _bindings
+
+def selectSdkVersion(version):
+    """
+    Use the bindings for a specific OVR SDK version, e.g. "1.13", instead of
+    probing the installed runtime. Must be called before any other ovr symbol
+    is used. The PYOVR_SDK_VERSION environment variable does the same thing.
+    """
+    from . import _loader
+    moduleName = _loader.moduleForVersion(version)
+    if _bindings is not None and _bindings.__name__ != __name__ + "." + moduleName:
+        raise RuntimeError("ovr bindings %s are already loaded" % _bindings.__name__)
+    _loader.requestSdkVersion(version)
+    return moduleName
+
+# ovr submodules whose names the binding modules also use, for standard library imports
+_SUBMODULES = ("math",)
+
+# Modules whose classes are loader internals; the libovr object itself is public
+_INTERNAL_MODULES = (__name__ + "._library", __name__ + "._loader")
+
+def _isPublic(module, name):
+    "Whether ovr exports name from a binding module"
+    if name.startswith('_') or name in _SUBMODULES:
+        return False
+    value = getattr(module, name)
+    if isinstance(value, types.ModuleType): # e.g. ctypes, platform
+        return False
+    if type(value).__module__ == "__future__": # e.g. absolute_import
+        return False
+    return not (isinstance(value, type) and value.__module__ in _INTERNAL_MODULES)
+
+def _publicNames(module):
+    "Names of the binding module that ovr exports: its own, and those of 'from ctypes import *'"
+    return [n for n in vars(module) if _isPublic(module, n)]
+
+if sys.version_info < (3, 7):
+    # No module level __getattr__ before python 3.7 (PEP 562), so bind eagerly
+    _module = _loadBindings()
+    globals().update((n, getattr(_module, n)) for n in _publicNames(_module))
+    del _module
+else:
+    def __getattr__(name):
+        """
+        Resolve ovr.<name> from the binding module on first access.
+        Each resolved symbol is cached in this namespace, so later lookups
+        do not come back here.
+        """
+        if name == '__all__':
+            return _publicNames(_loadBindings())
+        if name.startswith('_'):
+            raise AttributeError("module %r has no attribute %r" % (__name__, name))
+        if name in _SUBMODULES:
+            return importlib.import_module("." + name, __name__)
+        module = _loadBindings()
+        if not hasattr(module, name) or not _isPublic(module, name):
+            raise AttributeError("module %r has no attribute %r" % (__name__, name))
+        value = getattr(module, name)
+        globals()[name] = value
+        return value
+
+    def __dir__():
+        return sorted(set(globals()) | set(_publicNames(_loadBindings())))
@@ -0,0 +1,141 @@
+"""
+Deferred loading of the Oculus runtime shared library.
+
+The generated _ovrXXXX modules assign restype and argtypes to every
+libovr.ovr_* function while they are being imported. Loading LibOVRRT and
+resolving hundreds of symbols at that point is wasted work for processes
+that only touch a handful of functions, so LazyLibrary just records the
+prototypes, and only loads the runtime and binds a native function the first
+time that function is actually called.
+
+The same indirection lets a different backend, such as the simulated runtime
+in ovr.simulation, stand in for LibOVRRT. See setBackend().
+"""
+
+import ctypes
+import os
+import threading
+import weakref
+
+
+BACKEND_ENV = "PYOVR_BACKEND"
+
+_backend = None
+_libraries = weakref.WeakSet()
+
+
+def setBackend(backend):
+    """
+    Route all native calls to backend, an object with ovr_* attributes that
+    take the same arguments as the LibOVRRT functions. Pass None to go back
+    to the real runtime.
+    """
+    global _backend
+    _backend = backend
+    for library in list(_libraries):
+        library.reset()
+
+
+def getBackend():
+    "The active replacement backend, or None when calls go to LibOVRRT"
+    global _backend
+    if _backend is None and os.environ.get(BACKEND_ENV, "").lower() == "simulated":
+        from .simulation import SimulatedRuntime
+        _backend = SimulatedRuntime()
+    return _backend
+
+
+class _LazyFunction(object):
+    "Records the prototype of a native function until its first call"
+
+    def __init__(self, library, name):
+        self._library = library
+        self.__name__ = name
+        self.restype = ctypes.c_int # same default as ctypes
+        self.argtypes = None
+
+    def __call__(self, *args):
+        return self._library._resolve(self.__name__)(*args)
+
+    def __repr__(self):
+        return "<unresolved LibOVRRT function %s>" % self.__name__
+
+
+class LazyLibrary(object):
+    """
+    Stand-in for ctypes.CDLL(name) that does not touch the shared library
+    until the first native call.
+
+    After its first call, each function is stored on the LazyLibrary instance
+    as the real ctypes function pointer, so later calls cost the same as
+    calling through a plain CDLL.
+    """
+
+    def __init__(self, name, failureMessage=None):
+        self._name = name
+        self._failureMessage = failureMessage
+        self._dll = None
+        self._stubs = {}
+        self._lock = threading.Lock()
+        _libraries.add(self)
+
+    def __getattr__(self, name):
+        # Only reached for functions that have not been seen yet
+        if name.startswith('_'):
+            raise AttributeError(name)
+        stub = _LazyFunction(self, name)
+        self._stubs[name] = stub
+        setattr(self, name, stub)
+        return stub
+
+    def __repr__(self):
+        state = "loaded" if self.isLoaded() else "not loaded"
+        return "<LazyLibrary %s (%s)>" % (self._name, state)
+
+    def isLoaded(self):
+        "True once the shared library has actually been opened"
+        return self._dll is not None
+
+    def load(self):
+        "Open the shared library now, instead of at the first native call"
+        with self._lock:
+            if self._dll is None:
+                try:
+                    self._dll = ctypes.CDLL(self._name)
+                except:
+                    if self._failureMessage is not None:
+                        print(self._failureMessage)
+                    raise
+        return self._dll
+
+    def native(self, name):
+        """
+        The callable that libovr.<name> currently dispatches to: the ctypes
+        function of LibOVRRT, or the backend's method. Calling it directly skips
+        the wrapper's allocations. Look it up again for each use, or at least
+        after setBackend() or reset(); the lookup is cheap once resolved.
+        """
+        function = getattr(self, name)
+        if isinstance(function, _LazyFunction):
+            function = self._resolve(name)
+        return function
+
+    def reset(self):
+        "Forget resolved functions, so the next calls bind to the current backend"
+        for name, stub in self._stubs.items():
+            setattr(self, name, stub)
+
+    def _resolve(self, name):
+        "Bind one function, applying the prototype recorded so far"
+        backend = getBackend()
+        if backend is not None:
+            function = getattr(backend, name)
+        else:
+            function = getattr(self.load(), name)
+            stub = self._stubs.get(name)
+            if stub is not None:
+                function.restype = stub.restype
+                if stub.argtypes is not None:
+                    function.argtypes = stub.argtypes
+        setattr(self, name, function)
+        return function
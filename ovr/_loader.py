@@ -0,0 +1,257 @@
+"""
+Chooses which generated _ovrXXXX binding module matches the installed Oculus runtime.
+
+Selection order:
+  1) an explicit ovr.selectSdkVersion(...) call, before any ovr symbol is used
+  2) the PYOVR_SDK_VERSION environment variable, e.g. "1.13"
+  3) the newest bindings, when a simulated backend replaces the runtime
+  4) a previous probe result, cached on disk for the same runtime library file
+  5) probing the runtime library: its version string and exported functions
+  6) the newest bindings, if no runtime can be found
+
+Only the selected module is ever imported.
+"""
+
+import os
+import re
+import struct
+import sys
+
+# ctypes and platform are avoided here, so that "import ovr" stays cheap
+
+_PTR_SIZE = struct.calcsize("P") # distinguish 32 vs 64 bit python
+_WINDOWS = sys.platform.startswith("win")
+
+
+# (SDK version, binding module, runtime library suffix, runtime exports first seen in that SDK)
+SDK_MODULES = (
+    ((0, 7, 0), "_ovr070", "0_7", ()),
+    ((0, 8, 0), "_ovr080", "0_8", ("ovr_GetPredictedDisplayTime",)),
+    ((1, 3, 0), "_ovr130", "1", ("ovr_CommitTextureSwapChain",)),
+    ((1, 6, 0), "_ovr160", "1", ("ovr_SubmitControllerVibration",)),
+    ((1, 7, 0), "_ovr170", "1", ()),
+    ((1, 8, 0), "_ovr180", "1", ("ovr_GetPerfStats", "ovr_TestBoundary")),
+    ((1, 9, 0), "_ovr190", "1", ()),
+    ((1, 10, 0), "_ovr1100", "1", ()),
+    ((1, 10, 1), "_ovr1101", "1", ()),
+    ((1, 11, 0), "_ovr1110", "1", ("ovr_SpecifyTrackingOrigin",)),
+    ((1, 13, 0), "_ovr1130", "1", ()),
+    ((1, 16, 0), "_ovr1160", "1", ("ovr_GetDevicePoses",)),
+)
+
+DEFAULT_MODULE = SDK_MODULES[-1][1]
+
+SDK_VERSION_ENV = "PYOVR_SDK_VERSION"
+CACHE_DIR_ENV = "PYOVR_CACHE_DIR"
+
+_CACHE_FILE_NAME = "sdk_selection.json"
+
+_requestedVersion = None
+
+
+def parseSdkVersion(version):
+    "Convert '1.16', '1.10.1' or (1, 16) to a comparable 3-tuple"
+    if isinstance(version, (tuple, list)):
+        parts = [int(v) for v in version]
+    else:
+        match = re.search(r'(\d+)\.(\d+)(?:\.(\d+))?', str(version))
+        if match is None:
+            raise ValueError("Could not parse an OVR SDK version from %r" % (version,))
+        parts = [int(v) for v in match.groups() if v is not None]
+    return tuple((parts + [0, 0, 0])[:3])
+
+
+def moduleForVersion(version):
+    "Newest binding module whose SDK version is not newer than version"
+    version = parseSdkVersion(version)
+    best = None
+    for sdkVersion, moduleName, _, _ in SDK_MODULES:
+        if sdkVersion <= version:
+            best = moduleName
+    if best is None:
+        raise ValueError("No pyovr bindings for OVR SDK version %s.%s.%s" % version)
+    return best
+
+
+def requestSdkVersion(version):
+    "Record an explicit SDK version, overriding the environment, cache and probe"
+    global _requestedVersion
+    _requestedVersion = None if version is None else moduleForVersion(version)
+    return _requestedVersion
+
+
+def _libraryFamilies():
+    "Runtime library suffixes, newest first"
+    families = []
+    for _, _, suffix, _ in reversed(SDK_MODULES):
+        if suffix not in families:
+            families.append(suffix)
+    return families
+
+
+def runtimeLibraryName(suffix):
+    "Same library naming scheme as the generated binding modules"
+    name = "OVRRT32_%s" % suffix # 32-bit python
+    if _PTR_SIZE == 8:
+        name = "OVRRT64_%s" % suffix # 64-bit python
+    if _WINDOWS:
+        name = "Lib" + name # i.e. "LibOVRRT32_1"
+    return name
+
+
+def findRuntimeLibrary(libraryName):
+    "Path of the runtime library file that CDLL(libraryName) would most likely open, or None"
+    if _WINDOWS:
+        fileNames = [libraryName + ".dll"]
+        folders = [os.getcwd()]
+        folders += os.environ.get("PATH", "").split(os.pathsep)
+        folders.append(os.path.join(os.environ.get("SystemRoot", r"C:\Windows"), "System32"))
+    else:
+        fileNames = ["lib%s.so" % libraryName, "lib%s.dylib" % libraryName]
+        folders = os.environ.get("LD_LIBRARY_PATH", "").split(os.pathsep)
+        folders += os.environ.get("DYLD_LIBRARY_PATH", "").split(os.pathsep)
+        folders += ["/usr/local/lib", "/usr/lib"]
+    for folder in folders:
+        if not folder:
+            continue
+        for fileName in fileNames:
+            path = os.path.join(folder, fileName)
+            if os.path.isfile(path):
+                return path
+    return None
+
+
+def probeRuntime():
+    """
+    Load the installed runtime and pick the newest binding module that it supports.
+    Returns (module name, library path) or (None, None) if no runtime could be loaded.
+    """
+    import ctypes
+    for suffix in _libraryFamilies():
+        libraryName = runtimeLibraryName(suffix)
+        try:
+            dll = ctypes.CDLL(libraryName)
+        except OSError:
+            continue
+        runtimeVersion = None
+        try:
+            getVersionString = dll.ovr_GetVersionString
+            getVersionString.restype = ctypes.c_char_p
+            getVersionString.argtypes = []
+            runtimeVersion = parseSdkVersion(getVersionString().decode('utf-8', 'replace'))
+        except (AttributeError, ValueError):
+            pass # fall back on exported symbols alone
+        best = None
+        for sdkVersion, moduleName, moduleSuffix, exports in SDK_MODULES:
+            if moduleSuffix != suffix:
+                continue
+            if runtimeVersion is not None and sdkVersion > runtimeVersion:
+                break
+            if not all(hasattr(dll, export) for export in exports):
+                break
+            best = moduleName
+        if best is not None:
+            return best, findRuntimeLibrary(libraryName)
+    return None, None
+
+
+def cacheDirectory():
+    "Folder for pyovr's on-disk caches"
+    folder = os.environ.get(CACHE_DIR_ENV)
+    if folder:
+        return folder
+    if _WINDOWS:
+        base = os.environ.get("LOCALAPPDATA") or os.path.expanduser("~")
+    else:
+        base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "pyovr")
+
+
+def replaceFile(source, target):
+    "Rename source to target, replacing target if it exists, like os.replace on Python 3"
+    replace = getattr(os, "replace", None)
+    if replace is not None:
+        replace(source, target)
+        return
+    # Python 2: rename does not overwrite on Windows
+    if _WINDOWS and os.path.exists(target):
+        os.remove(target)
+    os.rename(source, target)
+
+
+def _cacheKey(libraryPath):
+    from .version import __version__
+    stat = os.stat(libraryPath)
+    return "%s|%s|%d|%d|%d" % (__version__, os.path.abspath(libraryPath),
+            stat.st_size, int(stat.st_mtime), _PTR_SIZE)
+
+
+def _cachePath():
+    return os.path.join(cacheDirectory(), _CACHE_FILE_NAME)
+
+
+def _readCache():
+    import json
+    try:
+        with open(_cachePath()) as fh:
+            cache = json.load(fh)
+    except (IOError, OSError, ValueError):
+        return {}
+    return cache if isinstance(cache, dict) else {}
+
+
+def readCachedSelection():
+    "Binding module cached for whichever runtime library is installed now, or None"
+    cache = _readCache()
+    if not cache:
+        return None
+    for suffix in _libraryFamilies():
+        path = findRuntimeLibrary(runtimeLibraryName(suffix))
+        if path is None:
+            continue
+        moduleName = cache.get(_cacheKey(path))
+        if moduleName in [m[1] for m in SDK_MODULES]:
+            return moduleName
+    return None
+
+
+def writeCachedSelection(libraryPath, moduleName):
+    "Remember moduleName for this runtime library file. Failures are not fatal."
+    import json
+    try:
+        cache = _readCache()
+        cache[_cacheKey(libraryPath)] = moduleName
+        folder = cacheDirectory()
+        if not os.path.isdir(folder):
+            os.makedirs(folder)
+        tmpPath = "%s.%d.tmp" % (_cachePath(), os.getpid())
+        try:
+            with open(tmpPath, "w") as fh:
+                json.dump(cache, fh, indent=1, sort_keys=True)
+            replaceFile(tmpPath, _cachePath())
+        finally:
+            if os.path.exists(tmpPath):
+                os.remove(tmpPath)
+    except (IOError, OSError):
+        pass
+
+
+def selectBindingModule():
+    "Name of the binding module to import, e.g. '_ovr1160'"
+    if _requestedVersion is not None:
+        return _requestedVersion
+    envVersion = os.environ.get(SDK_VERSION_ENV)
+    if envVersion:
+        return moduleForVersion(envVersion)
+    from . import _library
+    if _library._backend is not None or os.environ.get(_library.BACKEND_ENV):
+        return DEFAULT_MODULE # no runtime to probe; backends implement the newest API
+    moduleName = readCachedSelection()
+    if moduleName is not None:
+        return moduleName
+    moduleName, libraryPath = probeRuntime()
+    if moduleName is None:
+        return DEFAULT_MODULE
+    if libraryPath is not None:
+        writeCachedSelection(libraryPath, moduleName)
+    return moduleName
@@ -0,0 +1,82 @@
+"""
+Zero-copy NumPy views of the ctypes structures and arrays in the bindings.
+
+Structures made only of floats, such as Vector3f, Quatf, Posef and Matrix4f,
+are viewed as plain float32 arrays: a Posef is 7 floats (orientation x, y, z, w
+then position x, y, z) and a Matrix4f is 4x4, indexed M[row][column] like the
+ctypes field. Other structures, such as PoseStatef, become NumPy structured
+arrays. ctypes arrays of either add their own dimensions in front, so
+(Posef * N)() views as shape (N, 7) and (Matrix4f * 2)() as (2, 4, 4).
+
+Only as_numpy() gives these shaped views. numpy.asarray() on a ctypes object
+takes its buffer export, which ctypes describes as raw bytes for these packed
+structures, so it returns a 0-d structured array and warns.
+
+NumPy is optional; it is only imported when a view is first requested.
+"""
+
+import ctypes
+
+
+_layouts = {}
+
+
+def _numpy():
+    try:
+        import numpy
+    except ImportError:
+        raise ImportError("NumPy views of ovr structures require numpy to be installed")
+    return numpy
+
+
+def _floatShape(numpy, dtype):
+    "Shape of dtype as an array of float32, or None if it contains anything else"
+    if dtype.fields is None:
+        if dtype.subdtype is not None:
+            base, shape = dtype.subdtype
+            inner = _floatShape(numpy, base)
+            return None if inner is None else shape + inner
+        return () if dtype == numpy.float32 else None
+    shapes = [_floatShape(numpy, dtype.fields[name][0]) for name in dtype.names]
+    if any(shape is None for shape in shapes):
+        return None
+    if len(shapes) == 1:
+        return shapes[0] # e.g. Matrix4f.M keeps its 4x4 shape
+    count = sum(int(numpy.prod(shape)) for shape in shapes)
+    if count * 4 != dtype.itemsize:
+        return None # padded
+    return (count,)
+
+
+def _elementLayout(ctype):
+    layout = _layouts.get(ctype)
+    if layout is None:
+        numpy = _numpy()
+        dtype = numpy.dtype(ctype)
+        shape = _floatShape(numpy, dtype)
+        if shape is None:
+            layout = (dtype, ())
+        else:
+            layout = (numpy.dtype(numpy.float32), shape)
+        _layouts[ctype] = layout
+    return layout
+
+
+def layout(ctype):
+    "(dtype, shape) of the NumPy view of an instance of ctype"
+    shape = ()
+    while issubclass(ctype, ctypes.Array):
+        shape += (ctype._length_,)
+        ctype = ctype._type_
+    dtype, elementShape = _elementLayout(ctype)
+    return dtype, shape + elementShape
+
+
+def as_numpy(obj):
+    """
+    NumPy array sharing memory with a ctypes structure or array, e.g.
+    as_numpy((Posef * 2)()) has shape (2, 7). Writes through the view change
+    the ctypes object, and the view keeps the object alive.
+    """
+    dtype, shape = layout(type(obj))
+    return _numpy().frombuffer(obj, dtype=dtype).reshape(shape)
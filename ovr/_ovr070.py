@@ -5,6 +5,8 @@ Python bindings for Oculus Rift SDK version 0.7.0
 Works on Windows only at the moment (just like Oculus Rift SDK...)
 """
 
+from __future__ import absolute_import # "import math" must not find ovr.math
+
 import ctypes
 from ctypes import *
 import sys
@@ -12,6 +14,9 @@ import textwrap
 import math
 import platform
 
+from ._library import LazyLibrary
+from ._numpy_views import as_numpy
+
 
 OVR_PTR_SIZE = sizeof(c_voidp) # distinguish 32 vs 64 bit python
 
@@ -22,12 +27,8 @@ if OVR_PTR_SIZE == 8:
     _libname = "OVRRT64_0_7" # 64-bit python
 if platform.system().startswith("Win"):
     _libname = "Lib"+_libname # i.e. "LibOVRRT32_0_7"
-# Load library
-try:
-    libovr = CDLL(_libname)
-except:
-    print("Is Oculus Runtime 0.7 installed on this machine?")
-    raise
+# Load library lazily, at the first call into the runtime
+libovr = LazyLibrary(_libname, "Is Oculus Runtime 0.7 installed on this machine?")
 
 
 ENUM_TYPE = c_int32 # Hopefully a close enough guess...
@@ -446,6 +447,10 @@ class Quatf(Structure):
                            ww + Q11 - Q22 - Q33)     
         return a, b, c
 
+    def as_numpy(self):
+        "NumPy view sharing memory with this structure"
+        return as_numpy(self)
+
 
 # Translated from header file OVR_CAPI_0_7_0.h line 310
 class Vector2f(Structure):
@@ -495,6 +500,10 @@ class Vector3f(Structure):
         else:
             return getattr(self, self._fields_[key][0])
 
+    def as_numpy(self):
+        "NumPy view sharing memory with this structure"
+        return as_numpy(self)
+
 
 # Translated from header file OVR_CAPI_0_7_0.h line 322
 class Matrix4f(Structure):
@@ -517,6 +526,10 @@ class Matrix4f(Structure):
         j = key % 4
         return self.M[j][i]
 
+    def as_numpy(self):
+        "NumPy view sharing memory with this structure"
+        return as_numpy(self)
+
 
 # Translated from header file OVR_CAPI_0_7_0.h line 329
 class Posef(Structure):
@@ -530,6 +543,10 @@ class Posef(Structure):
     def __repr__(self):
         return "ovr.Posef(%s, %s)" % (self.Orientation, self.Position)
 
+    def as_numpy(self):
+        "NumPy view sharing memory with this structure"
+        return as_numpy(self)
+
 
 # Translated from header file OVR_CAPI_0_7_0.h line 336
 class PoseStatef(Structure):
@@ -1830,7 +1847,8 @@ def submitFrame(hmd, frameIndex, viewScaleDesc, layerPtrList, layerCount):
     
     \see ovr_GetFrameTiming, ovrViewScaleDesc, ovrLayerHeader
     """
-    layerPtrList = (POINTER(LayerHeader) * len(layerPtrList))(*[ctypes.pointer(i) for i in layerPtrList])
+    if not isinstance(layerPtrList, ctypes.Array): # else already an array of layer pointers
+        layerPtrList = (POINTER(LayerHeader) * len(layerPtrList))(*[ctypes.pointer(i) for i in layerPtrList])
     result = libovr.ovr_SubmitFrame(hmd, frameIndex, byref(viewScaleDesc), byref(layerPtrList), layerCount)
     if FAILURE(result):
         raise Exception("Call to function submitFrame failed")    
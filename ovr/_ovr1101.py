@@ -5,11 +5,16 @@ Python bindings for Oculus Rift SDK version 1.10.1
 Works on Windows only at the moment (just like Oculus Rift SDK...)
 """
 
+from __future__ import absolute_import # "import math" must not find ovr.math
+
 import ctypes
 from ctypes import * #@UnusedWildImport
 import math
 import platform
 
+from ._library import LazyLibrary
+from ._numpy_views import as_numpy
+
 
 OVR_PTR_SIZE = sizeof(c_voidp) # distinguish 32 vs 64 bit python
 
@@ -21,12 +26,8 @@ if OVR_PTR_SIZE == 8:
     _libname = "OVRRT64_1" # 64-bit python
 if platform.system().startswith("Win"):
     _libname = "Lib"+_libname # i.e. "LibOVRRT32_1"
-# Load library
-try:
-    libovr = CDLL(_libname)
-except:
-    print("Is Oculus Runtime 1.10 installed on this machine?")
-    raise
+# Load library lazily, at the first call into the runtime
+libovr = LazyLibrary(_libname, "Is Oculus Runtime 1.10 installed on this machine?")
 
 
 ENUM_TYPE = c_int32 # Hopefully a close enough guess...
@@ -75,8 +76,8 @@ def byref(obj):
     b = None if obj is None else ctypes.byref(obj)
     return b
 
-ovrFalse = c_char(chr(0)) # note potential conflict with Python built in symbols
-ovrTrue = c_char(chr(1))
+ovrFalse = c_char(chr(0).encode('utf-8')) # note potential conflict with Python built in symbols
+ovrTrue = c_char(chr(1).encode('utf-8'))
 
 def toOvrBool(arg):
     # One tricky case:
@@ -108,6 +109,9 @@ def _checkResult(ovrResult, functionName):
         msg += " And, annoyingly, getLastErrorInfo() failed too."
     raise OculusFunctionError(msg)
 
+# Public name, for code that calls libovr.native(...) functions directly
+checkResult = _checkResult
+
 ### BEGIN Declarations from C header file OVR_Version.h ###
 
 
@@ -510,6 +514,10 @@ class Quatf(Structure):
                            ww + Q11 - Q22 - Q33)     
         return a, b, c
 
+    def as_numpy(self):
+        "NumPy view sharing memory with this structure"
+        return as_numpy(self)
+
 
 # Translated from header file OVR_CAPI.h line 305
 class Vector2f(Structure):
@@ -559,6 +567,10 @@ class Vector3f(Structure):
         else:
             return getattr(self, self._fields_[key][0])
 
+    def as_numpy(self):
+        "NumPy view sharing memory with this structure"
+        return as_numpy(self)
+
 
 # Translated from header file OVR_CAPI.h line 317
 class Matrix4f(Structure):
@@ -581,6 +593,10 @@ class Matrix4f(Structure):
         j = key % 4
         return self.M[j][i]
 
+    def as_numpy(self):
+        "NumPy view sharing memory with this structure"
+        return as_numpy(self)
+
 
 # Translated from header file OVR_CAPI.h line 324
 class Posef(Structure):
@@ -594,6 +610,10 @@ class Posef(Structure):
     def __repr__(self):
         return "ovr.Posef(%s, %s)" % (self.Orientation, self.Position)
 
+    def as_numpy(self):
+        "NumPy view sharing memory with this structure"
+        return as_numpy(self)
+
 
 # Translated from header file OVR_CAPI.h line 331
 class PoseStatef(Structure):
@@ -2047,7 +2067,7 @@ def resetBoundaryLookAndFeel(session):
 # Translated from header file OVR_CAPI.h line 1599
 libovr.ovr_GetBoundaryGeometry.restype = Result
 libovr.ovr_GetBoundaryGeometry.argtypes = [Session, BoundaryType, POINTER(Vector3f), POINTER(c_int)]
-def getBoundaryGeometry(session, boundaryType):
+def getBoundaryGeometry(session, boundaryType, outFloorPoints=None):
     """
     Gets the geometry of the Boundary System's "play area" or "outer boundary" as 3D floor points.
     
@@ -2060,10 +2080,16 @@ def getBoundaryGeometry(session, boundaryType):
         - ovrSuccess: The call succeeded and a result was returned.
         - ovrSuccess_BoundaryInvalid: The call succeeded but the result is not a valid boundary due to not being set up.
     """
-    outFloorPoints = Vector3f()
+    # The runtime is asked for the number of points first, so that outFloorPoints, a
+    # (Vector3f * N) array, can hold them all. Pass an array to reuse it when it is large enough.
     outFloorPointsCount = c_int()
-    result = libovr.ovr_GetBoundaryGeometry(session, boundaryType, byref(outFloorPoints), byref(outFloorPointsCount))
+    result = libovr.ovr_GetBoundaryGeometry(session, boundaryType, None, byref(outFloorPointsCount))
     _checkResult(result, "getBoundaryGeometry")
+    if outFloorPoints is None or len(outFloorPoints) < outFloorPointsCount.value:
+        outFloorPoints = (Vector3f * outFloorPointsCount.value)()
+    if outFloorPointsCount.value > 0:
+        result = libovr.ovr_GetBoundaryGeometry(session, boundaryType, byref(outFloorPoints), byref(outFloorPointsCount))
+        _checkResult(result, "getBoundaryGeometry")
     return outFloorPoints, outFloorPointsCount
 
 
@@ -2575,7 +2601,8 @@ def submitFrame(session, frameIndex, viewScaleDesc, layerPtrList, layerCount):
     
     \see ovr_GetPredictedDisplayTime, ovrViewScaleDesc, ovrLayerHeader
     """
-    layerPtrList = (POINTER(LayerHeader) * len(layerPtrList))(*[ctypes.pointer(i) for i in layerPtrList])
+    if not isinstance(layerPtrList, ctypes.Array): # else already an array of layer pointers
+        layerPtrList = (POINTER(LayerHeader) * len(layerPtrList))(*[ctypes.pointer(i) for i in layerPtrList])
     result = libovr.ovr_SubmitFrame(session, frameIndex, byref(viewScaleDesc), byref(layerPtrList), layerCount)
     _checkResult(result, "submitFrame")
     return result
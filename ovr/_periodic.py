@@ -0,0 +1,81 @@
+"""
+A function called at a steady rate on a background thread.
+
+The perf stats collector, input stream, haptics engine and tracking recorder
+all poll the runtime from a daemon thread. PeriodicThread keeps their
+schedule, and keeps the exception that ended the thread, so that the owner
+can raise it to its caller from check(), rather than going on with data that
+silently stopped changing.
+"""
+
+import threading
+import time
+
+
+class PeriodicThread(object):
+    """
+    Calls function() rate times per second between start() and stop().
+
+    A call that comes back late is followed by the next one straight away;
+    when the thread falls more than a period behind, the calls it missed are
+    skipped, and counted in missed, rather than made in a burst. An exception
+    from function() ends the thread, and is kept in error: check() raises it
+    until stop(), which raises it one last time.
+    """
+
+    def __init__(self, function, name):
+        self.function = function
+        self.name = name
+        self.error = None
+        self.missed = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def running(self):
+        return self._thread is not None
+
+    def start(self, rate):
+        "Begin calling function rate times per second, unless already started"
+        if self._thread is not None:
+            return
+        self.error = None
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, args=(float(rate),), name=self.name)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def _run(self, rate):
+        timer = getattr(time, "perf_counter", time.time)
+        period = 1.0 / rate
+        nextCall = timer()
+        try:
+            while not self._stop.is_set():
+                self.function()
+                nextCall += period
+                delay = nextCall - timer()
+                if delay > 0:
+                    self._stop.wait(delay)
+                elif delay < -period:
+                    # Fell behind; skip the calls that were missed, rather than bursting
+                    missed = int(-delay / period)
+                    self.missed += missed
+                    nextCall += missed * period
+        except Exception as e:
+            self.error = e
+
+    def stop(self):
+        "Stop the thread and wait for it; raises the exception that ended it, if any"
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+        error, self.error = self.error, None
+        if error is not None:
+            raise error
+
+    def check(self):
+        "Raise the exception that ended the thread, if any"
+        if self.error is not None:
+            raise self.error
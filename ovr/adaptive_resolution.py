@@ -0,0 +1,140 @@
+"""
+Dynamic eye buffer resolution, driven by the compositor's performance statistics.
+
+Heavy scenes make an application miss vsyncs, and the compositor then
+repeats or reprojects old frames. Rendering fewer pixels is usually the
+better trade. An AdaptiveResolution controller watches the PerfStats of each
+frame and picks a render scale between min_scale and max_scale. The scale
+multiplies the width and height of the eye viewports, inside a swap chain
+allocated at full size, so changing it never reallocates anything:
+
+    controller = AdaptiveResolution(PerfStatsCollector(session))
+    renderer = RiftGLRenderer(adaptive_resolution=controller)
+
+Three signals are combined into the GPU headroom, the ratio of the GPU time
+available to the GPU time used:
+
+  * PerfStats.AdaptiveGpuPerformanceScale, the runtime's own recommendation
+  * the median AppGpuElapsedTime of the last frames, against gpu_budget of
+    the frame period
+  * the application's dropped frame count, which forces a decrease
+
+The scale drops as soon as the headroom falls below decrease_below, and only
+rises after the headroom has stayed above increase_above for increase_delay
+updates, by at most max_step_up at a time. The gap between the thresholds,
+and the asymmetric speeds, keep the scale from oscillating. Every change is
+appended to the decisions log with its reason and inputs, for tuning.
+"""
+
+from __future__ import absolute_import
+
+import collections
+import math
+
+
+ScaleDecision = collections.namedtuple("ScaleDecision", (
+        "update", # number of the update() call that made the decision
+        "scale", # the new render scale
+        "previousScale",
+        "reason", # "dropped frames", "gpu overload" or "gpu headroom"
+        "headroom", # GPU time available / GPU time used, from both sources below
+        "adaptiveGpuPerformanceScale",
+        "gpuTime", # median AppGpuElapsedTime of the frames considered, in seconds
+        "droppedFrames", # frames dropped by the application since the previous update
+        ))
+
+
+class AdaptiveResolution(object):
+    """
+    Picks a per-frame render scale from the statistics of a PerfStatsCollector.
+
+    Call update() once per frame, before rendering; it polls the collector
+    and returns the scale to render at. refresh_rate, in Hz, sets the frame
+    period that gpu_budget is a fraction of.
+    """
+
+    def __init__(self, collector, min_scale=0.5, max_scale=1.0, refresh_rate=90.0, gpu_budget=0.9,
+            decrease_below=0.95, increase_above=1.2, increase_delay=45, max_step_up=0.05,
+            dropped_frame_step=0.1, gpu_time_window=8, log_size=256):
+        self.collector = collector
+        self.min_scale = min_scale
+        self.max_scale = max_scale
+        self.frame_period = 1.0 / refresh_rate
+        self.gpu_budget = gpu_budget
+        self.decrease_below = decrease_below
+        self.increase_above = increase_above
+        self.increase_delay = increase_delay
+        self.max_step_up = max_step_up
+        self.dropped_frame_step = dropped_frame_step
+        self.gpu_time_window = gpu_time_window
+        self.scale = max_scale
+        self.headroom = None # headroom measured by the last update
+        self.decisions = collections.deque(maxlen=log_size)
+        self.updates = 0
+        self._lastDropped = None
+        self._lastFrameCount = 0
+        self._calmUpdates = 0 # consecutive updates with headroom above increase_above
+
+    def reset(self, scale=None):
+        "Forget the history, and start again at scale (max_scale by default)"
+        self.scale = self.max_scale if scale is None else scale
+        self.headroom = None
+        self._lastDropped = None
+        self._lastFrameCount = 0
+        self._calmUpdates = 0
+
+    def update(self):
+        "Poll the performance statistics and return the render scale for the next frame"
+        collector = self.collector
+        collector.poll()
+        self.updates += 1
+        if collector.frameCount < self._lastFrameCount:
+            # The collector was reset, and counts frames and drops from zero again
+            self._lastFrameCount = 0
+            self._lastDropped = None
+        dropped = collector.appDroppedFrames
+        newDropped = 0 if self._lastDropped is None else max(0, dropped - self._lastDropped)
+        self._lastDropped = dropped
+        if collector.frameCount == self._lastFrameCount and not newDropped:
+            return self.scale # nothing new was composited
+        newFrames = collector.frameCount - self._lastFrameCount
+        self._lastFrameCount = collector.frameCount
+        adaptiveScale = collector.adaptiveGpuPerformanceScale
+        gpuTime = float("nan")
+        headroom = adaptiveScale if adaptiveScale > 0 else float("inf")
+        frames = collector.recent(min(newFrames, self.gpu_time_window))
+        if len(frames):
+            gpuTimes = sorted(frames["AppGpuElapsedTime"])
+            gpuTime = float(gpuTimes[len(gpuTimes) // 2])
+            if gpuTime > 0:
+                headroom = min(headroom, self.gpu_budget * self.frame_period / gpuTime)
+        if math.isinf(headroom):
+            return self.scale
+        self.headroom = headroom
+        # GPU cost is proportional to the pixel count, which goes with the square of the scale
+        linear = math.sqrt(headroom)
+        scale = self.scale
+        if newDropped:
+            self._calmUpdates = 0
+            scale = min(scale * min(linear, 1.0), scale - self.dropped_frame_step)
+            reason = "dropped frames"
+        elif headroom < self.decrease_below:
+            self._calmUpdates = 0
+            scale = scale * linear
+            reason = "gpu overload"
+        elif headroom > self.increase_above:
+            self._calmUpdates += 1
+            if self._calmUpdates < self.increase_delay:
+                return self.scale
+            self._calmUpdates = 0
+            scale = min(scale * linear, scale + self.max_step_up)
+            reason = "gpu headroom"
+        else:
+            self._calmUpdates = 0
+            return self.scale
+        scale = min(self.max_scale, max(self.min_scale, scale))
+        if scale != self.scale:
+            self.decisions.append(ScaleDecision(self.updates, scale, self.scale, reason, headroom,
+                    adaptiveScale, gpuTime, newDropped))
+            self.scale = scale
+        return scale
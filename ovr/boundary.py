@@ -0,0 +1,171 @@
+"""
+The Guardian boundary, cached, with NumPy queries over many points at once.
+
+ovr.testBoundaryPoint() makes one runtime call per point. A BoundaryGeometry
+fetches the boundary polygon once with ovr.getBoundaryGeometry(), keeps it
+until the guardian or the tracking origin changes, and answers the same
+questions locally for whole arrays of points, e.g. to fade out scene
+geometry near the edge of the play area:
+
+    play_area = BoundaryGeometry(session)
+    ...
+    play_area.update(trackingState)
+    alpha = numpy.clip(play_area.distance(vertices) / 0.5, 0.0, 1.0)
+
+Points are tracking space positions, any array of shape (..., 3). Like the
+runtime's boundary, the polygon is treated as vertical walls, so distances
+are measured horizontally and the height of a point does not matter.
+"""
+
+import collections
+import ctypes
+
+import numpy
+
+import ovr
+
+
+BoundaryTestResults = collections.namedtuple("BoundaryTestResults",
+        "inside distance closestPoint closestPointNormal")
+BoundaryTestResults.__doc__ = """
+Arrays matching the fields of ovr.BoundaryTestResult, one entry per point.
+distance is signed: positive inside the boundary, negative outside.
+"""
+
+
+class BoundaryGeometry(object):
+    """
+    Boundary polygon of boundaryType (ovr.Boundary_PlayArea or ovr.Boundary_Outer).
+
+    The polygon is fetched on first use. update(trackingState) fetches it
+    again when the calibrated origin moved, e.g. after a recenter; call
+    invalidate() if the user may have redrawn the guardian. Queries work on
+    chunk_size points at a time, to bound the size of temporary arrays.
+    """
+
+    def __init__(self, session, boundaryType=ovr.Boundary_PlayArea, chunk_size=4096):
+        self.session = session
+        self.boundaryType = boundaryType
+        self.chunk_size = chunk_size
+        self.fetches = 0 # times the polygon was read from the runtime
+        self.points = numpy.zeros((0, 3), dtype=numpy.float32) # floor points, clockwise seen from above
+        self._buffer = None # (Vector3f * N) array reused between fetches
+        self._origin = None # bytes of the CalibratedOrigin the polygon belongs to
+        self._stale = True
+
+    @property
+    def valid(self):
+        "Whether a boundary is set up; queries on an invalid one raise ValueError"
+        self._fetchIfStale()
+        return len(self.points) >= 3
+
+    def invalidate(self):
+        "Fetch the polygon again before the next query"
+        self._stale = True
+
+    def update(self, trackingState=None):
+        "Refetch the polygon if it is stale, or trackingState's calibrated origin moved; returns whether it did"
+        if trackingState is not None:
+            origin = ctypes.string_at(ctypes.addressof(trackingState.CalibratedOrigin),
+                    ctypes.sizeof(trackingState.CalibratedOrigin))
+            if origin != self._origin:
+                self._origin = origin
+                self._stale = True
+        return self._fetchIfStale()
+
+    def _fetchIfStale(self):
+        if not self._stale:
+            return False
+        self._buffer, count = ovr.getBoundaryGeometry(self.session, self.boundaryType, self._buffer)
+        count = count.value
+        self.fetches += 1
+        self._stale = False
+        self.points = numpy.array(ovr.as_numpy(self._buffer)[:count], dtype=numpy.float32)
+        corners = self.points[:, [0, 2]].astype(numpy.float64)
+        self._starts = corners
+        self._edges = numpy.roll(corners, -1, axis=0) - corners
+        self._lengths2 = numpy.einsum("ij,ij->i", self._edges, self._edges)
+        self._lengths2[self._lengths2 == 0] = 1.0 # repeated corners
+        # Inward unit normals: the polygon's signed area tells its winding
+        area = numpy.sum(corners[:, 0] * numpy.roll(corners[:, 1], -1) - numpy.roll(corners[:, 0], -1) * corners[:, 1])
+        normals = numpy.stack([-self._edges[:, 1], self._edges[:, 0]], axis=1)
+        normals *= (1.0 if area > 0 else -1.0) / numpy.sqrt(self._lengths2)[:, None]
+        self._normals = normals
+        return True
+
+    def _horizontal(self, points):
+        self._fetchIfStale()
+        if len(self.points) < 3:
+            raise ValueError("No boundary is set up")
+        points = numpy.asarray(points, dtype=numpy.float64)
+        if points.shape[-1] != 3:
+            raise ValueError("points must have shape (..., 3), not %s" % (points.shape,))
+        return points.reshape(-1, 3)
+
+    def _chunks(self, count):
+        for start in range(0, count, self.chunk_size):
+            yield start, min(count, start + self.chunk_size)
+
+    def contains(self, points):
+        "Boolean array, True where points are inside the boundary"
+        flat = self._horizontal(points)
+        inside = numpy.empty(len(flat), dtype=bool)
+        for start, stop in self._chunks(len(flat)):
+            inside[start:stop] = self._contains(flat[start:stop, 0], flat[start:stop, 2])
+        return inside.reshape(numpy.shape(points)[:-1])
+
+    def _contains(self, x, z):
+        "Even-odd rule: count the edges crossed by a ray from each point towards +x"
+        a, d = self._starts, self._edges
+        az, bz = a[:, 1], a[:, 1] + d[:, 1]
+        spans = (az > z[:, None]) != (bz > z[:, None])
+        with numpy.errstate(divide="ignore", invalid="ignore"):
+            crossing = a[:, 0] + (z[:, None] - az) * d[:, 0] / d[:, 1]
+        return numpy.count_nonzero(spans & (x[:, None] < crossing), axis=1) % 2 == 1
+
+    def _closest(self, x, z):
+        "Distance to, and index and parameter of, the closest point on the nearest edge"
+        a, d = self._starts, self._edges
+        px = x[:, None] - a[:, 0]
+        pz = z[:, None] - a[:, 1]
+        t = (px * d[:, 0] + pz * d[:, 1]) / self._lengths2
+        numpy.clip(t, 0.0, 1.0, out=t)
+        px -= t * d[:, 0]
+        pz -= t * d[:, 1]
+        distance2 = px * px + pz * pz
+        nearest = numpy.argmin(distance2, axis=1)
+        rows = numpy.arange(len(x))
+        return numpy.sqrt(distance2[rows, nearest]), nearest, t[rows, nearest]
+
+    def distance(self, points):
+        "Signed horizontal distance of points to the boundary: positive inside, negative outside"
+        flat = self._horizontal(points)
+        result = numpy.empty(len(flat), dtype=numpy.float64)
+        for start, stop in self._chunks(len(flat)):
+            x, z = flat[start:stop, 0], flat[start:stop, 2]
+            distance = self._closest(x, z)[0]
+            result[start:stop] = numpy.where(self._contains(x, z), distance, -distance)
+        return result.reshape(numpy.shape(points)[:-1])
+
+    def test(self, points):
+        "The equivalent of ovr.testBoundaryPoint() for every point, as BoundaryTestResults"
+        flat = self._horizontal(points)
+        count = len(flat)
+        inside = numpy.empty(count, dtype=bool)
+        distance = numpy.empty(count, dtype=numpy.float64)
+        closest = numpy.empty((count, 3), dtype=numpy.float64)
+        normal = numpy.zeros((count, 3), dtype=numpy.float64)
+        for start, stop in self._chunks(count):
+            x, z = flat[start:stop, 0], flat[start:stop, 2]
+            d, nearest, t = self._closest(x, z)
+            inside[start:stop] = self._contains(x, z)
+            distance[start:stop] = numpy.where(inside[start:stop], d, -d)
+            corner = self._starts[nearest] + t[:, None] * self._edges[nearest]
+            closest[start:stop, 0] = corner[:, 0]
+            closest[start:stop, 1] = flat[start:stop, 1]
+            closest[start:stop, 2] = corner[:, 1]
+            normal[start:stop, 0] = self._normals[nearest, 0]
+            normal[start:stop, 2] = self._normals[nearest, 1]
+        shape = numpy.shape(points)[:-1]
+        return BoundaryTestResults(inside.reshape(shape), distance.reshape(shape),
+                closest.reshape(shape + (3,)), normal.reshape(shape + (3,)))
@@ -0,0 +1,215 @@
+"""
+Streaming of haptics effects to the Touch controllers.
+
+ovr.submitControllerVibration() takes one raw HapticsBuffer, and the
+controller's queue must be topped up continuously: if it runs dry the
+vibration stutters, and if it overflows the submission fails. A
+HapticsEngine reads each controller's TouchHapticsDesc once, and on every
+tick adds chunks of SubmitOptimalSamples samples until the queue holds at
+least QueueMinSizeToAvoidStarvation plus one chunk. Effects are NumPy uint8 arrays of amplitude
+samples, played from where they are:
+
+    with HapticsEngine(session) as haptics:
+        click = haptics.play(ovr.ControllerType_RTouch, numpy.full(16, 255, numpy.uint8))
+        rumble = haptics.play(ovr.ControllerType_RTouch, noise, gain=0.4, loop=True)
+        ...
+        rumble.cancel()
+
+When one effect plays alone at full gain its samples are submitted straight
+from its array, without a copy. Overlapping effects are scaled and summed
+into a preallocated chunk, saturating at 255. The background thread ticks
+often enough that a queue at the target level cannot drain in between; call
+tick() from your own loop instead of start() to do without the thread. An
+error in the background thread stops it, and is raised from the next play()
+or stop().
+"""
+
+import ctypes
+import threading
+
+import numpy
+
+import ovr
+from ._periodic import PeriodicThread
+
+
+class HapticsEffect(object):
+    "One playing effect; samples is a contiguous uint8 array, and is not copied"
+
+    def __init__(self, samples, gain=1.0, loop=False):
+        self.samples = samples
+        self.gain = gain
+        self.loop = loop
+        self.position = 0 # next sample to submit
+        self.playing = True
+
+    def cancel(self):
+        "Stop submitting this effect; samples already queued still play"
+        self.playing = False
+
+
+class _Channel(object):
+    "Queue state of one controller"
+
+    def __init__(self, session, controllerType):
+        self.controllerType = controllerType
+        self.desc = ovr.getTouchHapticsDesc(session, controllerType)
+        self.chunk = max(self.desc.SubmitOptimalSamples, self.desc.SubmitMinSamples, 1)
+        self.target = self.desc.QueueMinSizeToAvoidStarvation + self.chunk
+        self.effects = []
+        self.streaming = False # samples were submitted, and effects have kept playing since
+        self.state = ovr.HapticsPlaybackState()
+        self.stateRef = ctypes.byref(self.state)
+        self.buffer = ovr.HapticsBuffer()
+        self.buffer.SubmitMode = ovr.HapticsBufferSubmit_Enqueue
+        self.bufferRef = ctypes.byref(self.buffer)
+        self.mix = numpy.zeros(self.chunk, dtype=numpy.uint8)
+        self.accumulator = numpy.zeros(self.chunk, dtype=numpy.float32)
+        self.scaled = numpy.zeros(self.chunk, dtype=numpy.float32)
+
+
+class HapticsEngine(object):
+    """
+    Keeps the haptics queues of controllerTypes fed with the playing effects.
+
+    rate is the tick rate of the background thread, in Hz. By default it is
+    twice the rate at which chunks of SubmitOptimalSamples samples are played.
+    """
+
+    def __init__(self, session, controllerTypes=(ovr.ControllerType_LTouch, ovr.ControllerType_RTouch), rate=None):
+        self.session = session
+        self.channels = dict((controllerType, _Channel(session, controllerType))
+                for controllerType in controllerTypes)
+        if rate is None:
+            rate = max(2.0 * c.desc.SampleRateHz / c.chunk for c in self.channels.values())
+        self.rate = float(rate)
+        self.submits = 0 # calls to ovr_SubmitControllerVibration
+        self.samplesSubmitted = 0
+        self.copiedSamples = 0 # samples that had to be mixed into a chunk first
+        self.starvations = 0 # ticks that found a queue below QueueMinSizeToAvoidStarvation mid effect
+        self._lock = threading.Lock()
+        self._ticker = PeriodicThread(self.tick, "ovr haptics engine")
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    def play(self, controllerType, samples, gain=1.0, loop=False):
+        "Start playing samples (a uint8 array, or bytes) on controllerType; returns a HapticsEffect"
+        self._ticker.check()
+        if isinstance(samples, (bytes, bytearray)):
+            samples = numpy.frombuffer(samples, dtype=numpy.uint8)
+        samples = numpy.ascontiguousarray(samples, dtype=numpy.uint8)
+        effect = HapticsEffect(samples, gain, loop)
+        if len(samples) == 0:
+            effect.playing = False
+            return effect
+        with self._lock:
+            self.channels[controllerType].effects.append(effect)
+        return effect
+
+    def cancel_all(self, controllerType=None):
+        "Cancel every effect, or those of controllerType"
+        with self._lock:
+            for channel in self.channels.values():
+                if controllerType is None or channel.controllerType == controllerType:
+                    for effect in channel.effects:
+                        effect.cancel()
+                    del channel.effects[:]
+
+    def playing(self, controllerType):
+        "Number of effects still being submitted to controllerType"
+        with self._lock:
+            return sum(1 for effect in self.channels[controllerType].effects if effect.playing)
+
+    def tick(self):
+        "Top up every controller's queue; returns how many samples were submitted"
+        submit = ovr.libovr.native("ovr_SubmitControllerVibration")
+        getState = ovr.libovr.native("ovr_GetControllerVibrationState")
+        submitted = 0
+        with self._lock:
+            for channel in self.channels.values():
+                submitted += self._fill(channel, submit, getState)
+        return submitted
+
+    def _fill(self, channel, submit, getState):
+        effects = channel.effects
+        if effects and not all(effect.playing for effect in effects):
+            effects[:] = [effect for effect in effects if effect.playing]
+        if not effects:
+            channel.streaming = False
+            return 0
+        result = getState(self.session, channel.controllerType, channel.stateRef)
+        if result < 0: # OVR_FAILURE
+            ovr.checkResult(result, "getControllerVibrationState")
+        queued = channel.state.SamplesQueued
+        space = channel.state.RemainingQueueSpace
+        if channel.streaming and queued < channel.desc.QueueMinSizeToAvoidStarvation:
+            self.starvations += 1
+        submitted = 0
+        while effects and queued < channel.target:
+            count = min(channel.chunk, space)
+            if count < channel.desc.SubmitMinSamples or count <= 0:
+                break
+            buffer_ = channel.buffer
+            if len(effects) == 1 and effects[0].gain == 1.0:
+                # Straight from the effect's array
+                effect = effects[0]
+                count = min(count, len(effect.samples) - effect.position)
+                buffer_.Samples = effect.samples.ctypes.data + effect.position
+                self._advance(effect, count)
+            else:
+                count = self._mix(channel, count)
+                buffer_.Samples = channel.mix.ctypes.data
+                self.copiedSamples += count
+            buffer_.SamplesCount = count
+            result = submit(self.session, channel.controllerType, channel.bufferRef)
+            if result < 0: # OVR_FAILURE
+                ovr.checkResult(result, "submitControllerVibration")
+            self.submits += 1
+            queued += count
+            space -= count
+            submitted += count
+            if not all(effect.playing for effect in effects):
+                effects[:] = [effect for effect in effects if effect.playing]
+        channel.streaming = bool(effects)
+        self.samplesSubmitted += submitted
+        return submitted
+
+    def _advance(self, effect, count):
+        effect.position += count
+        if effect.position >= len(effect.samples):
+            if effect.loop:
+                effect.position = 0
+            else:
+                effect.playing = False
+
+    def _mix(self, channel, count):
+        "Sum count samples of every effect into channel.mix; returns the samples mixed"
+        accumulator = channel.accumulator[:count]
+        accumulator.fill(0.0)
+        length = 0
+        for effect in channel.effects:
+            done = 0
+            while done < count and effect.playing:
+                n = min(count - done, len(effect.samples) - effect.position)
+                scaled = channel.scaled[:n]
+                numpy.multiply(effect.samples[effect.position:effect.position + n], effect.gain, out=scaled)
+                accumulator[done:done + n] += scaled
+                self._advance(effect, n)
+                done += n
+            length = max(length, done)
+        numpy.clip(accumulator[:length], 0.0, 255.0, out=accumulator[:length])
+        channel.mix[:length] = accumulator[:length]
+        return length
+
+    def start(self):
+        "Begin ticking at self.rate on a background thread"
+        self._ticker.start(self.rate)
+
+    def stop(self):
+        "Stop the background thread; queued samples still play. Raises the error that stopped it, if any."
+        self._ticker.stop()
@@ -0,0 +1,223 @@
+"""
+Haptics clips made from WAV files, converted once and cached on disk.
+
+Making a haptics effect from a sound takes ovr.readWavFromBuffer(),
+ovr.genHapticsFromAudioData(), and then ovr.releaseAudioChannelData() and
+ovr.releaseHapticsClip(), or the native buffers leak. A HapticsClipLibrary
+does all of that for you, once per sound:
+
+    clips = HapticsClipLibrary()
+    haptics.play(ovr.ControllerType_RTouch, clips.get("sounds/impact.wav"))
+
+The WAV file is memory-mapped and handed to the runtime without a copy. The
+clip's samples are copied out, both native buffers are released at once,
+and the samples are written to the cache folder as a .npy file named after
+the SHA-1 of the WAV data, the channel and the generation mode. Later loads,
+in this process or the next, memory-map that file instead. File sizes and
+modification times are remembered with the hashes, in an index saved
+whenever a file is hashed, so unchanged WAV files are not even read again. Decoded clips are kept in memory up to max_bytes,
+least recently used first out.
+"""
+
+import collections
+import ctypes
+import hashlib
+import json
+import mmap
+import os
+import threading
+
+import numpy
+
+import ovr
+from ovr._loader import cacheDirectory, replaceFile
+
+
+_INDEX_FILE_NAME = "index.json"
+
+
+class HapticsClipLibrary(object):
+    """
+    Haptics samples of WAV files, as read-only uint8 arrays for HapticsEngine.play().
+
+    folder is where converted clips are kept, by default "haptics" in pyovr's
+    cache folder (see PYOVR_CACHE_DIR). Pass folder=False to keep nothing on disk.
+    """
+
+    def __init__(self, folder=None, genMode=ovr.HapticsGenMode_PointSample, max_bytes=16 << 20):
+        if folder is None:
+            folder = os.path.join(cacheDirectory(), "haptics")
+        self.folder = folder or None
+        self.genMode = genMode
+        self.max_bytes = max_bytes
+        self.decoded = 0 # clips converted by the runtime
+        self.diskHits = 0 # clips loaded from the cache folder
+        self.memoryHits = 0
+        self._clips = collections.OrderedDict() # (path, channel) -> samples, least recently used first
+        self._bytes = 0
+        self._index = None # abspath -> [size, mtime, sha1]
+        self._indexChanged = False
+        self._saveDeferred = False # preload() saves the index once, at the end
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self._clips)
+
+    def get(self, path, channel=0):
+        "The haptics samples of channel of the WAV file at path"
+        key = (os.path.abspath(path), channel)
+        with self._lock:
+            samples = self._clips.pop(key, None)
+            if samples is not None:
+                self.memoryHits += 1
+            else:
+                samples = self._load(key[0], channel)
+                self._bytes += samples.nbytes
+                if not self._saveDeferred:
+                    self.save_index()
+            self._clips[key] = samples
+            while self._bytes > self.max_bytes and len(self._clips) > 1:
+                oldKey, old = self._clips.popitem(last=False)
+                self._bytes -= old.nbytes
+            return samples
+
+    def preload(self, paths, channel=0):
+        "Convert or load several clips, e.g. at startup, and save the hash index once"
+        with self._lock:
+            self._saveDeferred = True
+            try:
+                for path in paths:
+                    self.get(path, channel)
+            finally:
+                self._saveDeferred = False
+                self.save_index()
+
+    def clip(self, path, channel=0):
+        """
+        An ovr.HapticsClip pointing at the cached samples, for code that
+        builds its own HapticsBuffers. It keeps the samples alive; do not
+        pass it to ovr.releaseHapticsClip().
+        """
+        samples = self.get(path, channel)
+        result = ovr.HapticsClip()
+        result.Samples = samples.ctypes.data
+        result.SamplesCount = len(samples)
+        result.samples = samples
+        return result
+
+    def clear(self):
+        "Forget the clips held in memory; the cache folder is kept"
+        with self._lock:
+            self._clips.clear()
+            self._bytes = 0
+
+    def _load(self, path, channel):
+        stat = os.stat(path)
+        digest = self._knownHash(path, stat)
+        cachePath = self._cachePath(digest, channel) if digest is not None else None
+        if cachePath is not None and os.path.exists(cachePath):
+            self.diskHits += 1
+            return numpy.load(cachePath, mmap_mode="r")
+        with open(path, "rb") as fh:
+            data = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_COPY)
+        try:
+            digest = hashlib.sha1(data).hexdigest()
+            self._rememberHash(path, stat, digest)
+            cachePath = self._cachePath(digest, channel)
+            if cachePath is not None and os.path.exists(cachePath):
+                self.diskHits += 1
+                return numpy.load(cachePath, mmap_mode="r")
+            samples = self._convert(data, channel)
+        finally:
+            data.close()
+        self.decoded += 1
+        if cachePath is not None:
+            self._write(cachePath, samples)
+        samples.flags.writeable = False
+        return samples
+
+    def _convert(self, data, channel):
+        "Haptics samples of WAV data, through the runtime; releases the native buffers"
+        view = ctypes.c_char.from_buffer(data)
+        try:
+            audio = ovr.readWavFromBuffer(ctypes.addressof(view), len(data), channel)
+        finally:
+            del view # the mmap cannot close while exported
+        try:
+            clip = ovr.genHapticsFromAudioData(audio, self.genMode)
+            try:
+                samples = numpy.empty(clip.SamplesCount, dtype=numpy.uint8)
+                if clip.SamplesCount:
+                    ctypes.memmove(samples.ctypes.data, clip.Samples, clip.SamplesCount)
+            finally:
+                ovr.releaseHapticsClip(clip)
+        finally:
+            ovr.releaseAudioChannelData(audio)
+        return samples
+
+    def _cachePath(self, digest, channel):
+        if self.folder is None:
+            return None
+        return os.path.join(self.folder, "%s-%d-%d.npy" % (digest, channel, self.genMode))
+
+    def _write(self, cachePath, samples):
+        "Store samples atomically. Failures are not fatal."
+        try:
+            if not os.path.isdir(self.folder):
+                os.makedirs(self.folder)
+            tmpPath = "%s.%d.tmp" % (cachePath, os.getpid())
+            try:
+                with open(tmpPath, "wb") as fh:
+                    numpy.save(fh, samples)
+                replaceFile(tmpPath, cachePath)
+            finally:
+                if os.path.exists(tmpPath):
+                    os.remove(tmpPath)
+        except (IOError, OSError):
+            pass
+
+    def _indexPath(self):
+        return os.path.join(self.folder, _INDEX_FILE_NAME)
+
+    def _readIndex(self):
+        if self._index is None:
+            self._index = {}
+            if self.folder is not None:
+                try:
+                    with open(self._indexPath()) as fh:
+                        index = json.load(fh)
+                    if isinstance(index, dict):
+                        self._index = index
+                except (IOError, OSError, ValueError):
+                    pass
+        return self._index
+
+    def _knownHash(self, path, stat):
+        entry = self._readIndex().get(path)
+        if entry and entry[0] == stat.st_size and entry[1] == stat.st_mtime:
+            return entry[2]
+        return None
+
+    def _rememberHash(self, path, stat, digest):
+        self._readIndex()[path] = [stat.st_size, stat.st_mtime, digest]
+        self._indexChanged = True
+
+    def save_index(self):
+        "Write the file hashes to the cache folder, so the next process need not rehash. Failures are not fatal."
+        with self._lock:
+            if self.folder is None or not self._indexChanged:
+                return
+            try:
+                if not os.path.isdir(self.folder):
+                    os.makedirs(self.folder)
+                tmpPath = "%s.%d.tmp" % (self._indexPath(), os.getpid())
+                try:
+                    with open(tmpPath, "w") as fh:
+                        json.dump(self._index, fh, indent=1, sort_keys=True)
+                    replaceFile(tmpPath, self._indexPath())
+                finally:
+                    if os.path.exists(tmpPath):
+                        os.remove(tmpPath)
+                self._indexChanged = False
+            except (IOError, OSError):
+                pass
@@ -0,0 +1,221 @@
+"""
+Controller input as a stream of timestamped states and edge events.
+
+ovr.getInputState() returns the current state only: an application that
+polls once per frame has to diff the Buttons and Touches masks itself, and
+misses a button pressed and released between two frames. An InputStream
+polls on its own thread, much faster than the frame rate, keeps every new
+state (by TimeInSeconds) in a preallocated NumPy ring buffer, and turns the
+changes into press, release, touch and untouch events. The index and hand
+triggers become press and release events too, with hysteresis.
+
+Once per frame, gameplay code takes a snapshot: the latest state, and the
+events since the previous snapshot, with their combined masks:
+
+    with InputStream(session) as stream:
+        while running:
+            frame = stream.snapshot()
+            if frame.pressed & ovr.Button_A:
+                jump()
+            for event in frame.events:
+                ...
+            times, stick = stream.thumbstick_trajectory(ovr.Hand_Right, seconds=0.5)
+
+Taking a snapshot does not lock: the polling thread publishes each state as a
+new, never modified InputState, and hands events over through a deque. Only
+one thread should take snapshots. The history queries copy from the ring
+buffer, under the lock the polling thread holds while writing. When polling
+fails, the thread stops, and snapshot() and stop() raise the error.
+"""
+
+import collections
+import ctypes
+import threading
+
+import numpy
+
+import ovr
+from ._periodic import PeriodicThread
+
+
+PRESS = "press"
+RELEASE = "release"
+TOUCH = "touch"
+UNTOUCH = "untouch"
+
+TRIGGERS = ("IndexTrigger", "HandTrigger")
+
+
+InputEvent = collections.namedtuple("InputEvent", "time kind code hand")
+InputEvent.__doc__ = """
+One input change, seen in the state sampled at time (InputState.TimeInSeconds).
+kind is PRESS, RELEASE, TOUCH or UNTOUCH. code is the Button_* or Touch_* bit
+that changed, with hand None, or the name of a trigger in TRIGGERS, with hand
+the Hand_* index.
+"""
+
+InputSnapshot = collections.namedtuple("InputSnapshot", "state events pressed released touched untouched")
+InputSnapshot.__doc__ = """
+Input for one frame: state is the latest InputState, which must not be
+modified, and events the InputEvents since the previous snapshot, oldest
+first. pressed, released, touched and untouched are the Button_* and Touch_*
+bits of those events OR-ed together, so a button pressed and released
+between two frames appears in both pressed and released.
+"""
+
+
+class InputStream(object):
+    """
+    Polls ovr_GetInputState for controllerType, and keeps the states and events.
+
+    capacity is the number of states kept in the history; older states are
+    overwritten. rate is the polling rate of the background thread, in Hz.
+    Events not taken by snapshot() are dropped beyond max_events. A trigger is
+    pressed when its value rises above trigger_press, and released when it
+    falls below trigger_release. The first state polled is the baseline: buttons
+    already held then do not produce events. Call poll() directly instead of
+    start() to poll from your own loop.
+    """
+
+    def __init__(self, session, controllerType=ovr.ControllerType_Touch, capacity=4096, rate=500.0,
+            max_events=1024, trigger_press=0.55, trigger_release=0.35):
+        self.session = session
+        self.controllerType = controllerType
+        self.capacity = capacity
+        self.rate = float(rate)
+        self.trigger_press = trigger_press
+        self.trigger_release = trigger_release
+        self.states = numpy.zeros(capacity, dtype=numpy.dtype(ovr.InputState))
+        self.stateCount = 0 # total states kept, including overwritten ones
+        self.polls = 0
+        self._state = ovr.InputState()
+        self._stateRow = ovr.as_numpy(self._state)
+        self._stateRef = ctypes.byref(self._state)
+        self._latest = ovr.InputState() # published to snapshot(); replaced, never modified
+        self._events = collections.deque(maxlen=max_events)
+        self._triggersDown = dict(((trigger, hand), False) for trigger in TRIGGERS for hand in range(ovr.Hand_Count))
+        self._lock = threading.Lock()
+        self._poller = PeriodicThread(self.poll, "ovr input stream")
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    def __len__(self):
+        return min(self.stateCount, self.capacity)
+
+    def poll(self):
+        "Sample the input state once; returns how many events it produced"
+        getInputState = ovr.libovr.native("ovr_GetInputState")
+        with self._lock:
+            state = self._state
+            result = getInputState(self.session, self.controllerType, self._stateRef)
+            if result < 0: # OVR_FAILURE
+                ovr.checkResult(result, "getInputState")
+            self.polls += 1
+            previous = self._latest
+            if self.stateCount > 0 and state.TimeInSeconds == previous.TimeInSeconds:
+                return 0
+            self.states[self.stateCount % self.capacity] = self._stateRow
+            first = self.stateCount == 0
+            self.stateCount += 1
+            events = 0 if first else self._detectEdges(previous, state)
+            if first:
+                self._resetTriggers(state)
+            # Events go out before the state that contains them, see snapshot()
+            self._latest = ovr.InputState.from_buffer_copy(state)
+            return events
+
+    def _detectEdges(self, previous, state):
+        t = state.TimeInSeconds
+        emit = self._events.append
+        count = 0
+        for old, new, on, off in ((previous.Buttons, state.Buttons, PRESS, RELEASE),
+                (previous.Touches, state.Touches, TOUCH, UNTOUCH)):
+            changed = old ^ new
+            while changed:
+                bit = changed & -changed
+                changed ^= bit
+                emit(InputEvent(t, on if new & bit else off, bit, None))
+                count += 1
+        for trigger in TRIGGERS:
+            values = getattr(state, trigger)
+            for hand in range(ovr.Hand_Count):
+                down = self._triggersDown[trigger, hand]
+                value = values[hand]
+                if not down and value > self.trigger_press:
+                    self._triggersDown[trigger, hand] = True
+                    emit(InputEvent(t, PRESS, trigger, hand))
+                    count += 1
+                elif down and value < self.trigger_release:
+                    self._triggersDown[trigger, hand] = False
+                    emit(InputEvent(t, RELEASE, trigger, hand))
+                    count += 1
+        return count
+
+    def _resetTriggers(self, state):
+        for trigger in TRIGGERS:
+            values = getattr(state, trigger)
+            for hand in range(ovr.Hand_Count):
+                self._triggersDown[trigger, hand] = values[hand] > self.trigger_press
+
+    def snapshot(self):
+        "The latest state, and the events since the previous snapshot, as an InputSnapshot"
+        self._poller.check()
+        state = self._latest
+        queue = self._events
+        events = []
+        pressed = released = touched = untouched = 0
+        # Leave events of states newer than the one returned for the next snapshot
+        while queue and queue[0].time <= state.TimeInSeconds:
+            event = queue.popleft()
+            events.append(event)
+            if event.hand is None:
+                if event.kind == PRESS:
+                    pressed |= event.code
+                elif event.kind == RELEASE:
+                    released |= event.code
+                elif event.kind == TOUCH:
+                    touched |= event.code
+                else:
+                    untouched |= event.code
+        return InputSnapshot(state, events, pressed, released, touched, untouched)
+
+    def recent(self, window=None, seconds=None):
+        """
+        Copy of the last window states (all that are kept, by default), oldest
+        first, as a NumPy structured array with the fields of InputState. With
+        seconds, only states at most that much older than the latest are included.
+        """
+        with self._lock:
+            count = len(self)
+            if window is not None:
+                count = min(count, window)
+            indices = numpy.arange(self.stateCount - count, self.stateCount) % self.capacity
+            states = self.states[indices]
+        if seconds is not None and len(states):
+            times = states["TimeInSeconds"]
+            states = states[times >= times[-1] - seconds]
+        return states
+
+    def thumbstick_trajectory(self, hand, window=None, seconds=None, field="Thumbstick"):
+        "Times, and an (N, 2) array of x, y positions, of one hand's thumbstick"
+        states = self.recent(window, seconds)
+        stick = states[field][:, hand]
+        return states["TimeInSeconds"], numpy.stack([stick["x"], stick["y"]], axis=-1)
+
+    def trigger_curve(self, hand, window=None, seconds=None, field="IndexTrigger"):
+        "Times, and values, of one hand's index trigger, or another trigger field"
+        states = self.recent(window, seconds)
+        return states["TimeInSeconds"], states[field][:, hand]
+
+    def start(self):
+        "Begin polling at self.rate on a background thread"
+        self._poller.start(self.rate)
+
+    def stop(self):
+        "Stop polling; raises the error that stopped the thread, if any"
+        self._poller.stop()
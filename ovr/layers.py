@@ -0,0 +1,232 @@
+"""
+Compositor layers, each with its own swap chain and update rate.
+
+The compositor reprojects every submitted layer to the latest head pose on
+every frame, whether or not the application drew anything new into it. A
+LayerManager takes advantage of that: it owns a set of LayerEyeFov,
+LayerQuad and LayerEyeMatrix structures and their swap chains, and only
+calls a layer's render function when the layer is due:
+
+    layers = LayerManager(session, swap_chain_pool, hmdToEyeOffset)
+    hud = layers.add_quad((512, 256), (1.0, 0.5), pose, draw_hud)
+    ...
+    hud.mark_dirty()        # e.g. when the text changed
+    ...
+    layers.submit(frameIndex)
+
+A layer with update_interval 1 is rendered every frame, one with interval N
+every N frames, and one with interval 0 only after mark_dirty(). A static
+HUD quad therefore costs one draw when it changes, and nothing per frame.
+Layers are composited in the order they were added, later ones on top.
+
+Eye layers (LayerEyeFov, LayerEyeMatrix) get new RenderPose and
+SensorSampleTime values, predicted for the frame being submitted, each time
+they are rendered; in between, the compositor reprojects them from the pose
+they were last rendered at.
+"""
+
+import ctypes
+
+from OpenGL.GL import *
+
+import ovr
+from ovr.prepared_frame import PreparedFrame
+
+
+class ManagedLayer(object):
+    """
+    A layer structure, the swap chain target it shows, and how it is drawn.
+
+    render, if any, is called as render(managed_layer) with the target's
+    framebuffer bound. For a quad, the viewport covers the whole texture and
+    eye is None. An eye layer is rendered with one call per eye: eye is the
+    ovr.Eye_* index, the viewport and scissor box are that eye's
+    layer.Viewport, and layer.RenderPose[eye] is the pose to draw from.
+    Layers without a render function are drawn by the application, which
+    commits their target and fills in their poses.
+    """
+
+    def __init__(self, manager, layer, target=None, render=None, update_interval=0):
+        self.manager = manager
+        self.layer = layer
+        self.target = target
+        self.render = render
+        self.update_interval = update_interval
+        self.dirty = render is not None # draw at least once
+        self.visible = True
+        self.renders = 0 # times the layer was rendered
+        self.eye = None # eye being rendered, during render calls of an eye layer
+        self._lastRender = None
+
+    def mark_dirty(self):
+        "Render this layer again before the next submission"
+        self.dirty = True
+
+    def set_visible(self, visible):
+        "Show or hide the layer; a hidden layer keeps its swap chain"
+        if visible != self.visible:
+            self.visible = visible
+            self.manager._rebuild()
+
+    def _due(self, frameNumber):
+        if self.render is None or not self.visible:
+            return False
+        if self.dirty:
+            return True
+        interval = self.update_interval
+        return interval > 0 and frameNumber - self._lastRender >= interval
+
+    def _render(self, frameNumber, frameIndex):
+        target = self.target
+        layer = self.layer
+        glBindFramebuffer(GL_FRAMEBUFFER, target.current_fbo())
+        if hasattr(layer, "RenderPose"):
+            self.manager._update_eye_poses(layer, frameIndex)
+            # Both eyes share the texture; the scissor box keeps a glClear in its own half
+            glEnable(GL_SCISSOR_TEST)
+            for eye in range(2):
+                v = layer.Viewport[eye]
+                glViewport(v.Pos.x, v.Pos.y, v.Size.w, v.Size.h)
+                glScissor(v.Pos.x, v.Pos.y, v.Size.w, v.Size.h)
+                self.eye = eye
+                self.render(self)
+            self.eye = None
+            glDisable(GL_SCISSOR_TEST)
+        else:
+            glViewport(0, 0, target.width, target.height)
+            self.render(self)
+        glBindFramebuffer(GL_FRAMEBUFFER, 0)
+        target.commit()
+        self.dirty = False
+        self._lastRender = frameNumber
+        self.renders += 1
+
+    def remove(self):
+        self.manager.remove(self)
+
+
+class LayerManager(list):
+    """
+    List of ManagedLayers, submitted together. Needs a current GL context for
+    layers with a render function; swap chains come from swap_chain_pool.
+    hmdToEyeOffset is used for the eye poses of eye layers too; by default
+    they come from the render descriptions of the default FovPorts.
+    """
+
+    def __init__(self, session, swap_chain_pool, hmdToEyeOffset=None, worldScale=1.0):
+        list.__init__(self)
+        self.session = session
+        self.swap_chain_pool = swap_chain_pool
+        self.hmdToEyeOffset = hmdToEyeOffset
+        self.worldScale = worldScale
+        self.frame_number = 0
+        self.prepared_frame = None
+        self._eyeOffsets = None
+        self._sampleTime = ctypes.c_double()
+        self._sampleTimeRef = ctypes.byref(self._sampleTime)
+        self._rebuild()
+
+    def _rebuild(self):
+        "A new PreparedFrame with the visible layers, after layers are added, removed, shown or hidden"
+        layers = [managed.layer for managed in self if managed.visible]
+        self.prepared_frame = PreparedFrame(self.session, layers, self.hmdToEyeOffset, self.worldScale)
+
+    def _update_eye_poses(self, layer, frameIndex):
+        "Predicted eye poses for frameIndex, straight into layer.RenderPose"
+        if self._eyeOffsets is None:
+            offsets = self.hmdToEyeOffset
+            if offsets is None:
+                hmdDesc = ovr.getHmdDesc(self.session)
+                offsets = [ovr.getRenderDesc(self.session, eye, hmdDesc.DefaultEyeFov[eye]).HmdToEyeOffset
+                        for eye in range(2)]
+            self._eyeOffsets = (ovr.Vector3f * 2)(*offsets)
+        # The latency marker belongs to the application's own scene layer
+        ovr.libovr.native("ovr_GetEyePoses")(self.session, frameIndex, ovr.toOvrBool(False),
+                self._eyeOffsets, layer.RenderPose, self._sampleTimeRef)
+        layer.SensorSampleTime = self._sampleTime.value
+
+    def add_layer(self, layer, target=None, render=None, update_interval=0):
+        "Manage an already filled in layer structure; see ManagedLayer"
+        managed = ManagedLayer(self, layer, target, render, update_interval)
+        self.append(managed)
+        self._rebuild()
+        return managed
+
+    def remove(self, managed):
+        "Stop submitting a layer, and return its swap chain to the pool"
+        list.remove(self, managed)
+        if managed.target is not None:
+            managed.target.release()
+            managed.target = None
+        self._rebuild()
+
+    def add_quad(self, size, quad_size, pose, render, head_locked=False, update_interval=0,
+            flags=ovr.LayerFlag_TextureOriginAtBottomLeft):
+        """
+        A flat rectangle of quad_size (width, height) meters at pose, showing a
+        size (width, height) pixel texture. With head_locked, pose is relative
+        to the head rather than to the tracking origin.
+        """
+        target = self.swap_chain_pool.acquire(size)
+        layer = ovr.LayerQuad()
+        layer.Header.Type = ovr.LayerType_Quad
+        layer.Header.Flags = flags | (ovr.LayerFlag_HeadLocked if head_locked else 0)
+        layer.ColorTexture = target.chain
+        layer.Viewport = ovr.Recti(ovr.Vector2i(0, 0), target.size)
+        layer.QuadPoseCenter = pose
+        layer.QuadSize = ovr.Vector2f(*quad_size)
+        return self.add_layer(layer, target, render, update_interval)
+
+    def add_eye_fov(self, fov, size, render=None, update_interval=1,
+            flags=ovr.LayerFlag_TextureOriginAtBottomLeft):
+        "Both eyes of fov (a FovPort per eye) side by side in one size (width, height) texture"
+        layer = ovr.LayerEyeFov()
+        layer.Header.Type = ovr.LayerType_EyeFov
+        for eye in range(2):
+            layer.Fov[eye] = fov[eye]
+        return self._add_eye_layer(layer, size, render, update_interval, flags)
+
+    def add_eye_matrix(self, projection, size, render=None, update_interval=1,
+            flags=ovr.LayerFlag_TextureOriginAtBottomLeft):
+        "Both eyes of projection (a Matrix4f per eye) side by side in one size (width, height) texture"
+        layer = ovr.LayerEyeMatrix()
+        layer.Header.Type = ovr.LayerType_EyeMatrix
+        for eye in range(2):
+            layer.Matrix[eye] = projection[eye]
+        return self._add_eye_layer(layer, size, render, update_interval, flags)
+
+    def _add_eye_layer(self, layer, size, render, update_interval, flags):
+        target = self.swap_chain_pool.acquire(size)
+        layer.Header.Flags = flags
+        half = target.width // 2
+        for eye in range(2):
+            layer.ColorTexture[eye] = target.chain
+            layer.Viewport[eye] = ovr.Recti(ovr.Vector2i(eye * half, 0), ovr.Sizei(half, target.height))
+        return self.add_layer(layer, target, render, update_interval)
+
+    def update(self, frameIndex=0):
+        """
+        Render the layers that are due, with eye poses predicted for frameIndex
+        (0 for the frame after the last one submitted); returns how many were rendered
+        """
+        self.frame_number += 1
+        rendered = 0
+        for managed in self:
+            if managed._due(self.frame_number):
+                managed._render(self.frame_number, frameIndex)
+                rendered += 1
+        return rendered
+
+    def submit(self, frameIndex):
+        "update(frameIndex), then submit every visible layer for frameIndex"
+        self.update(frameIndex)
+        return self.prepared_frame.submit(frameIndex)
+
+    def destroy(self):
+        "Remove every layer"
+        for managed in list(self):
+            if managed.target is not None:
+                managed.target.release()
+                managed.target = None
+        del self[:]
+        self._rebuild()
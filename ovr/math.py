@@ -0,0 +1,222 @@
+"""
+Batched quaternion and pose math on NumPy arrays.
+
+Quaternions are arrays of shape (..., 4) in x, y, z, w order, like Quatf.
+Poses are arrays of shape (..., 7): orientation x, y, z, w then position
+x, y, z, the same layout as ovr.as_numpy() gives for Posef. Every function
+also accepts Posef/Quatf structures, ctypes arrays of them, and NumPy
+structured arrays of Posef or PoseStatef records, and broadcasts over the
+leading dimensions, so a whole recorded session can be processed in one call.
+
+Conventions follow LibOVR: right handed coordinates, and a pose maps points
+from its local space into its parent space, rotating first, then translating.
+"""
+
+from __future__ import absolute_import
+
+import ctypes
+
+import numpy
+
+from ._numpy_views import as_numpy
+
+
+def _asFloatArray(values, width):
+    "Unstructured float array with last dimension width, without copying when possible"
+    if isinstance(values, (ctypes.Structure, ctypes.Array)):
+        values = as_numpy(values)
+    values = numpy.asanyarray(values)
+    if values.dtype.names is not None:
+        if "ThePose" in values.dtype.names: # PoseStatef records
+            values = values["ThePose"]
+        from numpy.lib import recfunctions
+        values = recfunctions.structured_to_unstructured(values)
+    if values.dtype.kind != 'f':
+        values = values.astype(numpy.float64)
+    if values.shape[-1:] != (width,):
+        raise ValueError("Expected an array of shape (..., %d), got %s" % (width, values.shape))
+    return values
+
+
+def asQuatArray(quats):
+    "Quaternions as a (..., 4) float array"
+    return _asFloatArray(quats, 4)
+
+
+def asPoseArray(poses):
+    "Poses as a (..., 7) float array"
+    return _asFloatArray(poses, 7)
+
+
+def asPointArray(points):
+    "Points or vectors as a (..., 3) float array"
+    return _asFloatArray(points, 3)
+
+
+def _cross(a, b):
+    # numpy.cross is slow for many small vectors; spell it out
+    ax, ay, az = a[..., 0], a[..., 1], a[..., 2]
+    bx, by, bz = b[..., 0], b[..., 1], b[..., 2]
+    return numpy.stack([ay*bz - az*by, az*bx - ax*bz, ax*by - ay*bx], axis=-1)
+
+
+def quatMultiply(a, b):
+    "Hamilton product a*b, which rotates by b first and then by a"
+    a, b = asQuatArray(a), asQuatArray(b)
+    ax, ay, az, aw = a[..., 0], a[..., 1], a[..., 2], a[..., 3]
+    bx, by, bz, bw = b[..., 0], b[..., 1], b[..., 2], b[..., 3]
+    return numpy.stack([
+        aw*bx + ax*bw + ay*bz - az*by,
+        aw*by - ax*bz + ay*bw + az*bx,
+        aw*bz + ax*by - ay*bx + az*bw,
+        aw*bw - ax*bx - ay*by - az*bz,
+    ], axis=-1)
+
+
+def quatInverse(q):
+    "Inverse rotations. Quaternions need not be normalized."
+    q = asQuatArray(q)
+    inverse = q * numpy.array([-1, -1, -1, 1], dtype=q.dtype)
+    return inverse / numpy.sum(q * q, axis=-1, keepdims=True)
+
+
+def quatNormalize(q):
+    q = asQuatArray(q)
+    return q / numpy.linalg.norm(q, axis=-1, keepdims=True)
+
+
+def quatRotate(q, vectors):
+    "Rotate (..., 3) vectors by unit quaternions q"
+    q, v = asQuatArray(q), asPointArray(vectors)
+    u = q[..., :3]
+    t = 2.0 * _cross(u, v)
+    return v + q[..., 3:4] * t + _cross(u, t)
+
+
+def quatSlerp(a, b, t):
+    """
+    Spherical linear interpolation from a (t=0) to b (t=1), along the shorter arc.
+    t broadcasts against the leading dimensions of a and b.
+    """
+    a, b = asQuatArray(a), asQuatArray(b)
+    t = numpy.asarray(t, dtype=a.dtype)[..., numpy.newaxis]
+    cosTheta = numpy.sum(a * b, axis=-1, keepdims=True)
+    # q and -q are the same rotation; take the short way round
+    b = numpy.where(cosTheta < 0, -b, b)
+    cosTheta = numpy.abs(cosTheta)
+    theta = numpy.arccos(numpy.clip(cosTheta, -1.0, 1.0))
+    sinTheta = numpy.sin(theta)
+    nearlyParallel = sinTheta < 1e-6
+    safeSin = numpy.where(nearlyParallel, 1.0, sinTheta)
+    wa = numpy.where(nearlyParallel, 1.0 - t, numpy.sin((1.0 - t) * theta) / safeSin)
+    wb = numpy.where(nearlyParallel, t, numpy.sin(t * theta) / safeSin)
+    return quatNormalize(wa * a + wb * b)
+
+
+def quatToEuler(q, axis1=0, axis2=1, axis3=2, rotate_direction=1, handedness=1):
+    """
+    Euler angles of shape (..., 3), with the same axis order and sign
+    conventions as Quatf.getEulerAngles()
+    """
+    q = asQuatArray(q)
+    w = q[..., 3]
+    Q = [q[..., 0], q[..., 1], q[..., 2]]
+    ww = w * w
+    Q11, Q22, Q33 = Q[axis1]*Q[axis1], Q[axis2]*Q[axis2], Q[axis3]*Q[axis3]
+    psign = -1.0
+    if ((axis1 + 1) % 3 == axis2) and ((axis2 + 1) % 3 == axis3):
+        psign = 1.0
+    s2 = psign * 2.0 * (psign*w*Q[axis2] + Q[axis1]*Q[axis3])
+    SD = handedness * rotate_direction
+    singularityRadius = 1e-10
+    south = s2 < -1.0 + singularityRadius
+    north = s2 > 1.0 - singularityRadius
+    pole = south | north
+    poleC = SD * numpy.arctan2(2.0*(psign*Q[axis1]*Q[axis2] + w*Q[axis3]), ww + Q22 - Q11 - Q33)
+    a = numpy.where(pole, 0.0,
+            -SD * numpy.arctan2(-2.0*(w*Q[axis1] - psign*Q[axis2]*Q[axis3]), ww + Q33 - Q11 - Q22))
+    b = SD * numpy.arcsin(numpy.clip(s2, -1.0, 1.0))
+    b = numpy.where(south, -SD * numpy.pi / 2, numpy.where(north, SD * numpy.pi / 2, b))
+    c = numpy.where(pole, poleC,
+            SD * numpy.arctan2(2.0*(w*Q[axis3] - psign*Q[axis1]*Q[axis2]), ww + Q11 - Q22 - Q33))
+    return numpy.stack([a, b, c], axis=-1).astype(q.dtype, copy=False)
+
+
+def axisAngleQuat(axis, angle):
+    "Unit quaternions rotating by angle radians about a coordinate axis (0, 1 or 2)"
+    angle = numpy.asarray(angle, dtype=numpy.float64)
+    q = numpy.zeros(angle.shape + (4,))
+    q[..., axis] = numpy.sin(angle / 2.0)
+    q[..., 3] = numpy.cos(angle / 2.0)
+    return q
+
+
+def eulerToQuat(angles, axis1=0, axis2=1, axis3=2, rotate_direction=1, handedness=1):
+    "Inverse of quatToEuler: (..., 3) angles to unit quaternions"
+    angles = asPointArray(angles)
+    SD = handedness * rotate_direction
+    return quatMultiply(quatMultiply(
+            axisAngleQuat(axis1, SD * angles[..., 0]),
+            axisAngleQuat(axis2, SD * angles[..., 1])),
+            axisAngleQuat(axis3, SD * angles[..., 2]))
+
+
+def poseMultiply(a, b):
+    "Compose poses: a*b applies b first, then a, like OVR::Posef::operator*"
+    a, b = asPoseArray(a), asPoseArray(b)
+    orientation = quatMultiply(a[..., :4], b[..., :4])
+    position = a[..., 4:] + quatRotate(a[..., :4], b[..., 4:])
+    return numpy.concatenate([orientation, position], axis=-1)
+
+
+def poseInvert(pose):
+    "Poses mapping parent space back to local space"
+    pose = asPoseArray(pose)
+    orientation = quatInverse(pose[..., :4])
+    position = -quatRotate(orientation, pose[..., 4:])
+    return numpy.concatenate([orientation, position], axis=-1)
+
+
+def transformPoints(pose, points):
+    """
+    Map (..., 3) points from pose local space into its parent space.
+    With a single pose, any number of points are transformed by one matrix product.
+    """
+    pose, points = asPoseArray(pose), asPointArray(points)
+    if pose.ndim == 1:
+        matrix = poseToMatrix(pose)
+        return numpy.dot(points, matrix[:3, :3].T) + matrix[:3, 3]
+    return quatRotate(pose[..., :4], points) + pose[..., 4:]
+
+
+def poseToMatrix(pose, out=None):
+    """
+    (..., 4, 4) row-major transforms, with the translation in the last column,
+    laid out like Matrix4f.M. Pass out, e.g. ovr.as_numpy(matrix4f), to fill
+    existing storage instead of allocating.
+    """
+    pose = asPoseArray(pose)
+    x, y, z, w = pose[..., 0], pose[..., 1], pose[..., 2], pose[..., 3]
+    if out is None:
+        out = numpy.empty(pose.shape[:-1] + (4, 4), dtype=pose.dtype)
+    xx, yy, zz = x*x, y*y, z*z
+    xy, xz, yz = x*y, x*z, y*z
+    wx, wy, wz = w*x, w*y, w*z
+    out[..., 0, 0] = 1.0 - 2.0*(yy + zz)
+    out[..., 0, 1] = 2.0*(xy - wz)
+    out[..., 0, 2] = 2.0*(xz + wy)
+    out[..., 1, 0] = 2.0*(xy + wz)
+    out[..., 1, 1] = 1.0 - 2.0*(xx + zz)
+    out[..., 1, 2] = 2.0*(yz - wx)
+    out[..., 2, 0] = 2.0*(xz - wy)
+    out[..., 2, 1] = 2.0*(yz + wx)
+    out[..., 2, 2] = 1.0 - 2.0*(xx + yy)
+    out[..., :3, 3] = pose[..., 4:]
+    out[..., 3, :3] = 0.0
+    out[..., 3, 3] = 1.0
+    return out
+
+
+def viewMatrix(pose, out=None):
+    "World-to-eye (..., 4, 4) matrices for camera poses, e.g. LayerEyeFov.RenderPose"
+    return poseToMatrix(poseInvert(pose), out=out)
@@ -0,0 +1,199 @@
+"""
+The compositor's mirror texture, shown on the desktop and optionally recorded.
+
+A MirrorTexture creates the runtime's mirror texture, and a framebuffer to
+read it through, once. blit() then copies what the headset shows into a
+window each frame, with one glBlitFramebuffer, after the frame is submitted:
+
+    mirror = MirrorTexture(session, 1080, 600)
+    ...
+    renderer.submit_frame()
+    mirror.blit(window_width, window_height)
+
+A MirrorRecorder streams the mirror to a file, a pipe or a callback without
+stalling. capture() queues a glReadPixels into one of a ring of pixel buffer
+objects, and fences it. Earlier captures whose fences have signalled are
+copied out of their buffers and written on a background thread. A capture
+never waits for the GPU: when every buffer is still in flight, or the writer
+is behind, the frame is skipped and counted in dropped. Frames are written
+top row first, as raw RGBA, e.g. for
+
+    ffmpeg -f rawvideo -pix_fmt rgba -s 1080x600 -r 90 -i - capture.mp4
+"""
+
+import ctypes
+import collections
+import threading
+
+try:
+    import queue
+except ImportError:
+    import Queue as queue # Python 2
+
+import numpy
+from OpenGL.GL import *
+from OpenGL.raw.GL.VERSION.GL_1_0 import glReadPixels as _glReadPixels
+
+import ovr
+
+
+class MirrorTexture(object):
+    """
+    The mirror texture of session, width by height pixels. Needs a current GL
+    context. The runtime supports one mirror texture per session; destroy()
+    it before destroying the session.
+    """
+
+    def __init__(self, session, width, height, format_=ovr.OVR_FORMAT_R8G8B8A8_UNORM_SRGB):
+        self.session = session
+        self.width = width
+        self.height = height
+        desc = ovr.MirrorTextureDesc()
+        desc.Format = format_
+        desc.Width = width
+        desc.Height = height
+        self.mirrorTexture = ovr.createMirrorTextureGL(session, desc)
+        self.textureId = ovr.getMirrorTextureBufferGL(session, self.mirrorTexture).value
+        self.fbo = glGenFramebuffers(1)
+        glBindFramebuffer(GL_READ_FRAMEBUFFER, self.fbo)
+        glFramebufferTexture2D(GL_READ_FRAMEBUFFER, GL_COLOR_ATTACHMENT0, GL_TEXTURE_2D, self.textureId, 0)
+        status = glCheckFramebufferStatus(GL_READ_FRAMEBUFFER)
+        glBindFramebuffer(GL_READ_FRAMEBUFFER, 0)
+        if status != GL_FRAMEBUFFER_COMPLETE:
+            self.destroy()
+            raise RuntimeError("Incomplete mirror texture framebuffer: 0x%X" % status)
+
+    def blit(self, width, height, draw_fbo=0):
+        "Copy the mirror into draw_fbo (the window by default), scaled to width by height"
+        # The compositor writes the mirror top row first; GL puts row 0 at the bottom
+        glBindFramebuffer(GL_READ_FRAMEBUFFER, self.fbo)
+        glBindFramebuffer(GL_DRAW_FRAMEBUFFER, draw_fbo)
+        glBlitFramebuffer(0, self.height, self.width, 0, 0, 0, width, height,
+                GL_COLOR_BUFFER_BIT, GL_LINEAR)
+        glBindFramebuffer(GL_READ_FRAMEBUFFER, 0)
+        glBindFramebuffer(GL_DRAW_FRAMEBUFFER, 0)
+
+    def destroy(self):
+        if self.fbo is not None:
+            glDeleteFramebuffers(1, [self.fbo])
+            self.fbo = None
+        if self.mirrorTexture is not None:
+            ovr.destroyMirrorTexture(self.session, self.mirrorTexture)
+            self.mirrorTexture = None
+
+
+class MirrorRecorder(object):
+    """
+    Asynchronous readback of a MirrorTexture into sink.
+
+    sink is either a file-like object, which is written the raw RGBA bytes of
+    each frame, or a callable, which is called with the frame number and an
+    (height, width, 4) uint8 array that is only valid during the call. sink is
+    only used from the writer thread. ring_size pixel buffers are read into
+    in turn; with three, a frame has two frame periods to reach the CPU.
+    """
+
+    def __init__(self, mirror, sink, ring_size=3):
+        self.mirror = mirror
+        self.sink = sink
+        self.frameBytes = mirror.width * mirror.height * 4
+        self.captured = 0 # frames queued for readback
+        self.written = 0 # frames handed to the sink
+        self.dropped = 0 # frames skipped, to avoid waiting
+        self._frameNumber = 0
+        self.pbos = [glGenBuffers(1) for i in range(ring_size)]
+        for pbo in self.pbos:
+            glBindBuffer(GL_PIXEL_PACK_BUFFER, pbo)
+            glBufferData(GL_PIXEL_PACK_BUFFER, self.frameBytes, None, GL_STREAM_READ)
+        glBindBuffer(GL_PIXEL_PACK_BUFFER, 0)
+        self._freePbos = collections.deque(self.pbos)
+        self._pending = collections.deque() # (pbo, fence, frame number), oldest first
+        # Frames copied out of the pixel buffers, on their way to the writer thread
+        self._freeFrames = queue.Queue()
+        for i in range(ring_size):
+            self._freeFrames.put(numpy.empty((mirror.height, mirror.width, 4), dtype=numpy.uint8))
+        self._written = queue.Queue()
+        self._error = None
+        self._thread = threading.Thread(target=self._run, name="ovr mirror recorder")
+        self._thread.daemon = True
+        self._thread.start()
+
+    def capture(self):
+        "Queue a readback of the mirror's current contents; never waits for the GPU"
+        self._collect(wait=False)
+        if self._error is not None:
+            raise self._error
+        self._frameNumber += 1
+        if not self._freePbos:
+            self.dropped += 1
+            return False
+        pbo = self._freePbos.popleft()
+        mirror = self.mirror
+        glBindFramebuffer(GL_READ_FRAMEBUFFER, mirror.fbo)
+        glBindBuffer(GL_PIXEL_PACK_BUFFER, pbo)
+        _glReadPixels(0, 0, mirror.width, mirror.height, GL_RGBA, GL_UNSIGNED_BYTE, ctypes.c_void_p(0))
+        glBindBuffer(GL_PIXEL_PACK_BUFFER, 0)
+        glBindFramebuffer(GL_READ_FRAMEBUFFER, 0)
+        self._pending.append((pbo, glFenceSync(GL_SYNC_GPU_COMMANDS_COMPLETE, 0), self._frameNumber))
+        self.captured += 1
+        return True
+
+    def _collect(self, wait):
+        "Hand finished readbacks to the writer thread, oldest first"
+        pending = self._pending
+        while pending:
+            pbo, fence, frameNumber = pending[0]
+            timeout = GL_TIMEOUT_IGNORED if wait else 0
+            status = glClientWaitSync(fence, GL_SYNC_FLUSH_COMMANDS_BIT, timeout)
+            if status not in (GL_ALREADY_SIGNALED, GL_CONDITION_SATISFIED):
+                return
+            try:
+                frame = self._freeFrames.get(block=wait)
+            except queue.Empty:
+                return # the writer is behind; try again next frame
+            pending.popleft()
+            glDeleteSync(fence)
+            glBindBuffer(GL_PIXEL_PACK_BUFFER, pbo)
+            address = glMapBufferRange(GL_PIXEL_PACK_BUFFER, 0, self.frameBytes, GL_MAP_READ_BIT)
+            ctypes.memmove(frame.ctypes.data, address, self.frameBytes)
+            glUnmapBuffer(GL_PIXEL_PACK_BUFFER)
+            glBindBuffer(GL_PIXEL_PACK_BUFFER, 0)
+            self._freePbos.append(pbo)
+            self._written.put((frameNumber, frame))
+
+    def _run(self):
+        while True:
+            item = self._written.get()
+            if item is None:
+                return
+            frameNumber, frame = item
+            try:
+                if self._error is None:
+                    # The mirror is stored top row first, as glReadPixels returns it
+                    if hasattr(self.sink, "write"):
+                        self.sink.write(frame.data)
+                    else:
+                        self.sink(frameNumber, frame)
+                    self.written += 1
+            except Exception as e:
+                self._error = e
+            self._freeFrames.put(frame)
+
+    def close(self):
+        "Write every pending frame, then release the pixel buffers; waits for the GPU"
+        if self._thread is None:
+            return
+        self._collect(wait=True)
+        self._written.put(None)
+        self._thread.join()
+        self._thread = None
+        glDeleteBuffers(len(self.pbos), self.pbos)
+        self.pbos = []
+        if self._error is not None:
+            raise self._error
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
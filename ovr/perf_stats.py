@@ -0,0 +1,199 @@
+"""
+Continuous collection of compositor performance statistics.
+
+ovr.getPerfStats() only reports the last MaxProvidedFrameStats (5) compositor
+frames, and frames that were not polled in time are lost. A PerfStatsCollector
+polls on its own thread, keeps every frame it sees exactly once in a
+preallocated NumPy ring buffer, and summarizes the recent frames:
+
+    with PerfStatsCollector(session) as collector:
+        ... # run the application
+        print(collector.summary())
+
+When polling fails, the thread stops, and summary() and stop() raise the
+error instead of reporting statistics that stopped changing.
+
+Dropped frame counts come from the runtime's cumulative counters, so they are
+exact even when individual frame entries were lost between polls. They count
+from reset(), which zeroes the runtime's counters, or else from the oldest
+frame seen by the first poll: that frame's own drops are already included in
+its counters, and cannot be told apart from the ones before it.
+"""
+
+import ctypes
+import threading
+
+import numpy
+
+import ovr
+from ._periodic import PeriodicThread
+
+
+# Timing fields summarized by default, in seconds
+SUMMARY_FIELDS = ("AppMotionToPhotonLatency", "AppCpuElapsedTime", "AppGpuElapsedTime", "CompositorLatency")
+PERCENTILES = (50, 95, 99)
+
+
+class PerfStatsCollector(object):
+    """
+    Polls ovr_GetPerfStats and accumulates the per compositor frame entries.
+
+    capacity is the number of frames kept; older frames are overwritten. rate
+    is the polling rate of the background thread, in Hz; it must stay above
+    refresh rate / MaxProvidedFrameStats (18 Hz on the CV1) for no entries to
+    be lost. Call poll() directly instead of start() to poll from your own loop.
+    """
+
+    def __init__(self, session, capacity=4096, rate=45.0):
+        self.session = session
+        self.capacity = capacity
+        self.rate = float(rate)
+        self.frames = numpy.zeros(capacity, dtype=numpy.dtype(ovr.PerfStatsPerCompositorFrame))
+        self.frameCount = 0 # total frames collected, including overwritten ones
+        self.lostFrameStats = 0 # frame entries the runtime discarded before they were polled
+        self.adaptiveGpuPerformanceScale = 1.0
+        self._stats = ovr.PerfStats()
+        self._statsRows = ovr.as_numpy(self._stats)["FrameStats"]
+        self._statsRef = ctypes.byref(self._stats)
+        self._lastCompositorFrame = None
+        self._firstCounters = None
+        self._lastCounters = None
+        self._lock = threading.Lock()
+        self._poller = PeriodicThread(self.poll, "ovr perf stats collector")
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    def __len__(self):
+        return min(self.frameCount, self.capacity)
+
+    def poll(self):
+        "Fetch new frame entries from the runtime; returns how many were new"
+        getPerfStats = ovr.libovr.native("ovr_GetPerfStats")
+        with self._lock:
+            result = getPerfStats(self.session, self._statsRef)
+            if result < 0: # OVR_FAILURE
+                ovr.checkResult(result, "getPerfStats")
+            stats = self._stats
+            count = stats.FrameStatsCount
+            if count == 0:
+                return 0
+            rows = self._statsRows
+            # Entries are reported most recent first; a polled entry may be reported again
+            last = self._lastCompositorFrame
+            new = count
+            if last is not None:
+                new = 0
+                while new < count and rows[new]["CompositorFrameIndex"] > last:
+                    new += 1
+            if new == 0:
+                return 0
+            oldest = rows[new - 1]["CompositorFrameIndex"]
+            if ovr.toOvrBool(stats.AnyFrameStatsDropped) == ovr.ovrTrue and last is not None:
+                self.lostFrameStats += max(0, oldest - last - 1)
+            for i in range(new - 1, -1, -1): # oldest first
+                self.frames[self.frameCount % self.capacity] = rows[i]
+                self.frameCount += 1
+            newest = rows[0]
+            self._lastCompositorFrame = int(newest["CompositorFrameIndex"])
+            counters = (int(newest["AppDroppedFrameCount"]), int(newest["CompositorDroppedFrameCount"]),
+                    int(newest["AswPresentedFrameCount"]), int(newest["AswFailedFrameCount"]))
+            if self._firstCounters is None:
+                # Counters after the oldest collected frame; see the module docstring
+                oldestRow = rows[new - 1]
+                self._firstCounters = (int(oldestRow["AppDroppedFrameCount"]),
+                        int(oldestRow["CompositorDroppedFrameCount"]),
+                        int(oldestRow["AswPresentedFrameCount"]), int(oldestRow["AswFailedFrameCount"]))
+            self._lastCounters = counters
+            self.adaptiveGpuPerformanceScale = stats.AdaptiveGpuPerformanceScale
+            return new
+
+    def reset(self):
+        "Discard all collected frames, and reset the runtime's counters with ovr.resetPerfStats"
+        with self._lock:
+            ovr.resetPerfStats(self.session)
+            self.frameCount = 0
+            self.lostFrameStats = 0
+            self._lastCompositorFrame = None
+            # The runtime counts from zero again, so every drop from here on is counted
+            self._firstCounters = (0, 0, 0, 0)
+            self._lastCounters = None
+
+    def _counterDelta(self, index):
+        if self._lastCounters is None:
+            return 0
+        return self._lastCounters[index] - self._firstCounters[index]
+
+    @property
+    def appDroppedFrames(self):
+        "Frames the application missed since collection started, or since reset()"
+        return self._counterDelta(0)
+
+    @property
+    def compositorDroppedFrames(self):
+        "Frames the compositor missed since collection started, or since reset()"
+        return self._counterDelta(1)
+
+    @property
+    def aswPresentedFrames(self):
+        return self._counterDelta(2)
+
+    @property
+    def aswFailedFrames(self):
+        return self._counterDelta(3)
+
+    def recent(self, window=None):
+        "Copy of the last window frames (all that are kept, by default), oldest first"
+        with self._lock:
+            count = len(self)
+            if window is not None:
+                count = min(count, window)
+            start = self.frameCount - count
+            indices = numpy.arange(start, self.frameCount) % self.capacity
+            return self.frames[indices]
+
+    def percentiles(self, field, window=None, q=PERCENTILES):
+        "Percentiles q of one field over the last window frames, or NaNs if there are none"
+        values = self.recent(window)[field]
+        if len(values) == 0:
+            return numpy.full(len(q), numpy.nan)
+        return numpy.percentile(values, q)
+
+    def summary(self, window=None, fields=SUMMARY_FIELDS, q=PERCENTILES):
+        """
+        Dict of statistics over the last window frames: for each field a dict
+        of percentile to value (e.g. summary["AppGpuElapsedTime"][95]), the
+        fraction of frames with ASW active, and the dropped frame counts since
+        collection started (see the module docstring).
+        """
+        self._poller.check()
+        frames = self.recent(window)
+        result = {}
+        for field in fields:
+            values = frames[field]
+            if len(values):
+                result[field] = dict(zip(q, numpy.percentile(values, q)))
+            else:
+                result[field] = dict((p, float("nan")) for p in q)
+        asw = frames["AswIsActive"] != b"\0"
+        result["AswActiveFraction"] = float(asw.mean()) if len(asw) else 0.0
+        result["Frames"] = len(frames)
+        result["AppDroppedFrames"] = self.appDroppedFrames
+        result["CompositorDroppedFrames"] = self.compositorDroppedFrames
+        result["AswPresentedFrames"] = self.aswPresentedFrames
+        result["LostFrameStats"] = self.lostFrameStats
+        return result
+
+    def start(self):
+        "Begin polling at self.rate on a background thread"
+        self._poller.start(self.rate)
+
+    def stop(self):
+        "Stop polling, after one last poll; raises the error that stopped the thread, if any"
+        if self._poller.running:
+            self._poller.stop()
+            self.poll()
@@ -0,0 +1,164 @@
+"""
+Frame scheduling that overlaps application simulation with rendering.
+
+A typical loop polls input, fetches poses, updates the scene, renders and
+submits, all on one thread. ovr_SubmitFrame blocks, and ctypes releases the
+GIL while it does, so that time can be spent on something else. A
+FramePipeline runs the application's simulation step for frame N+1 on a
+worker thread while frame N is rendered and submitted on the calling (GL)
+thread:
+
+    def simulate(frameIndex, displayTime):
+        return world.step(displayTime)    # worker thread; returns a new state
+
+    def render(frameIndex, state):
+        draw(state)                       # GL thread
+
+    pipeline = FramePipeline(session, simulate, render, renderer.submit_frame)
+    while running:
+        pipeline.run_frame()
+
+simulate() must not modify a state that was already handed to render(); return
+a new (or double buffered) state object each time.
+"""
+
+import collections
+import threading
+import time
+
+try:
+    import queue
+except ImportError:
+    import Queue as queue # Python 2
+
+import ovr
+
+
+FrameTiming = collections.namedtuple("FrameTiming", (
+        "frameIndex",
+        "predictedDisplayTime", # ovr.getPredictedDisplayTime() when simulation of the frame began
+        "displayTime", # ovr.getPredictedDisplayTime() after the frame was submitted
+        "simulateTime", # seconds spent in simulate(), on the worker thread
+        "waitTime", # seconds the render thread waited for the simulation to finish
+        "renderTime", # seconds spent in render()
+        "submitTime", # seconds spent in submit()
+        "frameTime", # seconds from the start of this frame to the start of the next one
+        ))
+
+
+class FramePipeline(object):
+    """
+    Runs simulate(frameIndex, predictedDisplayTime) one frame ahead on a
+    worker thread, and render(frameIndex, state) followed by submit(frameIndex)
+    on the calling thread.
+
+    Per frame timings are kept in self.timings, the most recent history
+    frames. A frame counts as late when it was displayed more than half a
+    frame after the display time its simulation was run for.
+    """
+
+    def __init__(self, session, simulate, render, submit, history=900, firstFrameIndex=1):
+        self.session = session
+        self.simulate = simulate
+        self.render = render
+        self.submit = submit
+        self.frameIndex = firstFrameIndex
+        self.timings = collections.deque(maxlen=history)
+        self.lateFrames = 0
+        self._timer = getattr(time, "perf_counter", time.time)
+        self._pending = None # (frameIndex, predictedDisplayTime, result queue) of the simulation in flight
+        self._frameStart = None
+        self._framePeriod = None
+        self._requests = queue.Queue()
+        self._thread = threading.Thread(target=self._work, name="ovr frame pipeline")
+        self._thread.daemon = True
+        self._thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def _work(self):
+        while True:
+            request = self._requests.get()
+            if request is None:
+                return
+            frameIndex, displayTime, results = request
+            start = self._timer()
+            try:
+                state = self.simulate(frameIndex, displayTime)
+            except BaseException as e:
+                results.put((None, e, self._timer() - start))
+            else:
+                results.put((state, None, self._timer() - start))
+
+    def _startSimulation(self, frameIndex):
+        displayTime = ovr.getPredictedDisplayTime(self.session, frameIndex)
+        results = queue.Queue(1)
+        self._requests.put((frameIndex, displayTime, results))
+        self._pending = (frameIndex, displayTime, results)
+
+    def run_frame(self):
+        "Render and submit one frame; returns its FrameTiming"
+        start = self._timer()
+        if self._frameStart is not None and self.timings:
+            self.timings[-1] = self.timings[-1]._replace(frameTime=start - self._frameStart)
+        self._frameStart = start
+        frameIndex = self.frameIndex
+        if self._pending is not None and self._pending[0] != frameIndex:
+            # A previous render() or submit() raised, so the frame simulated ahead
+            # was never reached: its state and display time belong to another frame
+            self._pending[2].get()
+            self._pending = None
+        if self._pending is None:
+            self._startSimulation(frameIndex)
+        pendingIndex, predictedDisplayTime, results = self._pending
+        state, error, simulateTime = results.get()
+        self._pending = None
+        if error is not None:
+            raise error
+        waitTime = self._timer() - start
+        # Simulate the next frame while this one is rendered and submitted
+        self._startSimulation(frameIndex + 1)
+        renderStart = self._timer()
+        self.render(frameIndex, state)
+        submitStart = self._timer()
+        self.submit(frameIndex)
+        submitEnd = self._timer()
+        displayTime = ovr.getPredictedDisplayTime(self.session, frameIndex)
+        if self._framePeriod is None:
+            self._framePeriod = 1.0 / ovr.getHmdDesc(self.session).DisplayRefreshRate
+        if displayTime - predictedDisplayTime > 0.5 * self._framePeriod:
+            self.lateFrames += 1
+        timing = FrameTiming(frameIndex, predictedDisplayTime, displayTime, simulateTime, waitTime,
+                submitStart - renderStart, submitEnd - submitStart, None)
+        self.timings.append(timing)
+        self.frameIndex = frameIndex + 1
+        return timing
+
+    def run(self, running=lambda: True):
+        "Run frames for as long as running() returns true"
+        while running():
+            self.run_frame()
+
+    def stage_times(self, window=None):
+        "Mean seconds per stage over the last window frames, as a dict"
+        timings = list(self.timings)
+        if window is not None:
+            timings = timings[-window:]
+        result = {}
+        for stage in ("simulateTime", "waitTime", "renderTime", "submitTime", "frameTime"):
+            values = [getattr(timing, stage) for timing in timings]
+            values = [value for value in values if value is not None]
+            result[stage] = sum(values) / len(values) if values else 0.0
+        return result
+
+    def close(self):
+        "Stop the worker thread, after any simulation still in flight"
+        if self._thread is not None:
+            self._requests.put(None)
+            self._thread.join()
+            self._thread = None
+            self._pending = None
@@ -0,0 +1,132 @@
+"""
+One tracking state per tick, shared by every thread that needs poses.
+
+Each ovr.getTrackingState() call goes into the runtime. With a PoseService,
+the render loop samples the tracking state once per frame with update(), and
+the physics, audio and other threads call get_tracking_state(absTime), which
+predicts from that sample, using its velocities and accelerations, as long as
+absTime is within tolerance seconds of it. All threads see poses from the same
+sample, and only requests outside the tolerance window reach the runtime.
+"""
+
+from __future__ import absolute_import
+
+import ctypes
+import math
+import threading
+
+import ovr
+
+
+def extrapolatePoseState(out, poseState, dt, acceleration=True):
+    """
+    Predict a PoseStatef dt seconds ahead (or back) into out, from its
+    velocities and, optionally, accelerations. out may be poseState itself.
+    """
+    if out is not poseState:
+        ctypes.memmove(ctypes.addressof(out), ctypes.addressof(poseState), ctypes.sizeof(poseState))
+    p, v = out.ThePose.Position, poseState.LinearVelocity
+    w = poseState.AngularVelocity
+    wx, wy, wz = w.x, w.y, w.z
+    if acceleration:
+        a = poseState.LinearAcceleration
+        h = 0.5 * dt * dt
+        p.x += v.x * dt + a.x * h
+        p.y += v.y * dt + a.y * h
+        p.z += v.z * dt + a.z * h
+        # Mean angular velocity over the interval
+        alpha = poseState.AngularAcceleration
+        wx += 0.5 * alpha.x * dt
+        wy += 0.5 * alpha.y * dt
+        wz += 0.5 * alpha.z * dt
+    else:
+        p.x += v.x * dt
+        p.y += v.y * dt
+        p.z += v.z * dt
+    speed = math.sqrt(wx*wx + wy*wy + wz*wz)
+    angle = speed * dt
+    if angle != 0:
+        s = math.sin(angle / 2.0) / speed
+        dx, dy, dz, dw = wx * s, wy * s, wz * s, math.cos(angle / 2.0)
+        q = poseState.ThePose.Orientation
+        qx, qy, qz, qw = q.x, q.y, q.z, q.w
+        o = out.ThePose.Orientation
+        # Angular velocity is in world space, so the rotation applies on the left
+        o.x = dw*qx + dx*qw + dy*qz - dz*qy
+        o.y = dw*qy - dx*qz + dy*qw + dz*qx
+        o.z = dw*qz + dx*qy - dy*qx + dz*qw
+        o.w = dw*qw - dx*qx - dy*qy - dz*qz
+    out.TimeInSeconds = poseState.TimeInSeconds + dt
+    return out
+
+
+class PoseService(object):
+    """
+    Thread safe cache of the most recent TrackingState.
+
+    Call update() once per tick, typically from the render loop with the
+    predicted display time of the frame about to be rendered. Any thread may
+    then call get_tracking_state(absTime). Requests more than tolerance
+    seconds from the cached sample, or made before the first update(), go to
+    the runtime.
+    """
+
+    def __init__(self, session, tolerance=0.05, acceleration=True):
+        self.session = session
+        self.tolerance = tolerance
+        self.acceleration = acceleration
+        self.nativeCalls = 0
+        self.cachedCalls = 0
+        self._state = None
+        self._lock = threading.Lock()
+
+    def update(self, absTime=0.0, latencyMarker=False):
+        "Sample the tracking state from the runtime, and return it"
+        state = ovr.getTrackingState(self.session, absTime, latencyMarker)
+        with self._lock:
+            self._state = state
+            self.nativeCalls += 1
+        return state
+
+    @property
+    def state(self):
+        "The TrackingState from the last update(), or None. Do not modify it."
+        return self._state
+
+    def get_tracking_state(self, absTime=0.0, out=None):
+        """
+        TrackingState predicted for absTime, into out if given. absTime 0
+        means the time of the last sample.
+        """
+        with self._lock:
+            state = self._state
+            if state is not None:
+                if absTime <= 0:
+                    absTime = state.HeadPose.TimeInSeconds
+                if abs(absTime - state.HeadPose.TimeInSeconds) <= self.tolerance:
+                    if out is None:
+                        out = ovr.TrackingState()
+                    ctypes.memmove(ctypes.addressof(out), ctypes.addressof(state), ctypes.sizeof(state))
+                    self.cachedCalls += 1
+                    self._predict(out, absTime)
+                    return out
+            self.nativeCalls += 1
+        state = ovr.getTrackingState(self.session, absTime, False)
+        if out is None:
+            return state
+        ctypes.memmove(ctypes.addressof(out), ctypes.addressof(state), ctypes.sizeof(state))
+        return out
+
+    def get_head_pose(self, absTime=0.0):
+        "PoseStatef of the headset, predicted for absTime"
+        return self.get_tracking_state(absTime).HeadPose
+
+    def _predict(self, state, absTime):
+        acceleration = self.acceleration
+        head = state.HeadPose
+        extrapolatePoseState(head, head, absTime - head.TimeInSeconds, acceleration)
+        for hand in range(2):
+            pose = state.HandPoses[hand]
+            if pose.TimeInSeconds == 0:
+                continue # never tracked
+            extrapolatePoseState(pose, pose, absTime - pose.TimeInSeconds, acceleration)
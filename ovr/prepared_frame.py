@@ -0,0 +1,64 @@
+"""
+Frame submission without per-frame ctypes allocations.
+
+ovr.submitFrame() builds a new array of layer pointers, and usually a new
+ViewScaleDesc, on every call. A PreparedFrame builds both once; the layers
+and the view scale are then changed in place, and each submit() is a single
+call into the runtime with arguments that were bound up front.
+"""
+
+import ctypes
+
+import ovr
+
+
+class PreparedFrame(object):
+    """
+    A fixed set of layer slots, submitted together with ovr_SubmitFrame.
+
+    layers may be layer structures (LayerEyeFov, LayerQuad, ...), their
+    Header fields, or None for an empty slot. The layer structures are
+    referenced, not copied, so updating e.g. layer.RenderPose between
+    submissions is all it takes.
+    """
+
+    def __init__(self, session, layers, hmdToEyeOffset=None, worldScale=1.0):
+        self.session = session
+        self.layers = [None] * len(layers)
+        self.layerPtrList = (ctypes.POINTER(ovr.LayerHeader) * len(layers))()
+        self.viewScaleDesc = ovr.ViewScaleDesc()
+        self.viewScaleDesc.HmdSpaceToWorldScaleInMeters = worldScale
+        if hmdToEyeOffset is not None:
+            self.set_hmd_to_eye_offset(hmdToEyeOffset)
+        for index, layer in enumerate(layers):
+            self.set_layer(index, layer)
+        # Arguments of the native call, bound once
+        self._viewScaleRef = ctypes.byref(self.viewScaleDesc)
+        self._layerPtrListRef = ctypes.byref(self.layerPtrList)
+        self._layerCount = len(layers)
+
+    def __len__(self):
+        return len(self.layers)
+
+    def set_layer(self, index, layer):
+        "Put a layer into slot index, or hide the slot with None"
+        if layer is None:
+            self.layerPtrList[index] = None
+        else:
+            header = layer if isinstance(layer, ovr.LayerHeader) else layer.Header
+            self.layerPtrList[index] = ctypes.pointer(header)
+        self.layers[index] = layer # keep the layer memory alive
+
+    def set_hmd_to_eye_offset(self, hmdToEyeOffset):
+        "Per-eye offsets, e.g. from EyeRenderDesc.HmdToEyeOffset, needed by quad layers"
+        for eye in range(2):
+            self.viewScaleDesc.HmdToEyeOffset[eye] = hmdToEyeOffset[eye]
+
+    def submit(self, frameIndex):
+        "Submit all layer slots for frameIndex. Raises OculusFunctionError on failure."
+        # The native function itself, not the wrapper that allocates its arguments
+        result = ovr.libovr.native("ovr_SubmitFrame")(self.session, frameIndex,
+                self._viewScaleRef, self._layerPtrListRef, self._layerCount)
+        if result < 0: # OVR_FAILURE
+            ovr.checkResult(result, "submitFrame")
+        return result
@@ -0,0 +1,393 @@
+"""
+Recording tracking data to a compact binary file, and reading it back as NumPy arrays.
+
+File layout, all little endian:
+  8 bytes      magic b"PYOVRREC"
+  uint32       format version
+  uint32       header length in bytes
+  header       JSON: column names, NumPy dtype descriptions and per-row shapes,
+               plus free-form metadata
+  chunks       each chunk is a 16 byte chunk header (b"CHNK", uint32 row count,
+               uint64 chunk length including this header), followed by one
+               contiguous block per column, in header order
+
+The header and every column block start on a 64 byte boundary, so each column
+of each chunk can be viewed straight out of a memory map. Chunks are only ever
+appended, and a reader ignores a trailing chunk that was cut short, so a
+recording that crashed part way is still readable.
+
+A TrackingRecorder stores COMPACT_COLUMNS by default: the head and hand poses
+with their velocities, but without accelerations, and the status flags. That
+is 176 bytes per sample with SampleTime, about 630 MB for an hour at 1 kHz.
+TRACKING_COLUMNS, every TrackingState field, takes 312 bytes per sample,
+about 1.1 GB an hour; lower the rate, or record fewer columns, for smaller
+files.
+"""
+
+import ctypes
+import json
+import mmap
+import os
+import struct
+import threading
+
+try:
+    import queue
+except ImportError:
+    import Queue as queue # Python 2
+
+import numpy
+from numpy.lib import format as npformat
+
+import ovr
+from ._periodic import PeriodicThread
+
+
+MAGIC = b"PYOVRREC"
+FORMAT_VERSION = 1
+_CHUNK_MAGIC = b"CHNK"
+_ALIGNMENT = 64
+
+# Columns taken from each TrackingState: a field name records the whole
+# field, and a (field name, sub-field names) pair only those parts of it
+TRACKING_COLUMNS = ("HeadPose", "StatusFlags", "HandPoses", "HandStatusFlags", "CalibratedOrigin")
+POSE_FIELDS = ("ThePose", "AngularVelocity", "LinearVelocity")
+COMPACT_COLUMNS = (("HeadPose", POSE_FIELDS), "StatusFlags", ("HandPoses", POSE_FIELDS), "HandStatusFlags")
+
+
+def _padding(offset):
+    return (-offset) % _ALIGNMENT
+
+
+def _dtypeFromJson(descr):
+    "JSON turns the tuples of a dtype description into lists; turn them back"
+    def fromJson(descr):
+        if not isinstance(descr, list):
+            return descr
+        return [tuple([field[0], fromJson(field[1])] + [tuple(shape) for shape in field[2:]])
+                for field in descr]
+    return npformat.descr_to_dtype(fromJson(descr))
+
+
+def _columnDtype(fieldDtype, subfields):
+    "Packed dtype of the subfields of a TrackingState field, or the whole field"
+    if subfields is None:
+        return fieldDtype
+    element, shape = _splitDtype(fieldDtype)
+    packed = numpy.dtype([(name, element.fields[name][0]) for name in subfields])
+    return numpy.dtype((packed, shape)) if shape else packed
+
+
+def _splitDtype(dtype):
+    "(element dtype, per-row shape) of a column dtype"
+    dtype = numpy.dtype(dtype)
+    if dtype.subdtype is not None:
+        return dtype.subdtype
+    return dtype, ()
+
+
+class RecordingWriter(object):
+    """
+    Appends chunks of rows to a recording file.
+    columns is a sequence of (name, dtype) pairs; a sub-array dtype such as
+    (PoseStatef dtype, (2,)) stores that many values per row.
+    """
+
+    def __init__(self, path, columns, metadata=None):
+        self.path = path
+        self.columns = [(name,) + _splitDtype(dtype) for name, dtype in columns]
+        self.rowCount = 0
+        header = json.dumps({
+            "columns": [{"name": name, "dtype": npformat.dtype_to_descr(dtype), "shape": list(shape)}
+                    for name, dtype, shape in self.columns],
+            "metadata": metadata or {},
+        }).encode("utf-8")
+        header += b" " * _padding(16 + len(header))
+        self._file = open(path, "wb")
+        self._file.write(MAGIC + struct.pack("<II", FORMAT_VERSION, len(header)) + header)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def writeChunk(self, columns, rows=None):
+        "Write one chunk; columns maps each column name to an array with at least rows rows"
+        if rows is None:
+            rows = len(columns[self.columns[0][0]])
+        if rows == 0:
+            return
+        blocks = []
+        length = 16 + _padding(16)
+        for name, dtype, shape in self.columns:
+            data = numpy.ascontiguousarray(columns[name][:rows], dtype=dtype).tobytes()
+            blocks.append(data)
+            length += len(data) + _padding(len(data))
+        out = self._file
+        out.write(_CHUNK_MAGIC + struct.pack("<IQ", rows, length) + b"\0" * _padding(16))
+        for data in blocks:
+            out.write(data)
+            out.write(b"\0" * _padding(len(data)))
+        self.rowCount += rows
+
+    def flush(self):
+        self._file.flush()
+
+    def close(self):
+        if not self._file.closed:
+            self._file.close()
+
+
+class Recording(object):
+    """
+    Read-only, memory mapped view of a recording file.
+
+    recording[name] returns a whole column as one NumPy array. That is a zero
+    copy view when the file has a single chunk, otherwise the chunks are
+    concatenated. chunks() yields zero copy views chunk by chunk, and
+    row(index) reads one row without touching the rest of the file.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as fh:
+            if os.fstat(fh.fileno()).st_size == 0:
+                raise ValueError("%s is empty" % path)
+            self._map = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        buf = self._map
+        if buf[:8] != MAGIC:
+            raise ValueError("%s is not a pyovr recording" % path)
+        version, headerLength = struct.unpack_from("<II", buf, 8)
+        if version > FORMAT_VERSION:
+            raise ValueError("%s has unsupported recording format version %d" % (path, version))
+        header = json.loads(buf[16:16 + headerLength].decode("utf-8"))
+        self.metadata = header["metadata"]
+        self.columns = [(column["name"], _dtypeFromJson(column["dtype"]), tuple(column.get("shape", ())))
+                for column in header["columns"]]
+        self._chunks = []
+        self._chunkStarts = []
+        rowCount = 0
+        offset = 16 + headerLength
+        while offset + 16 <= len(buf):
+            magic = buf[offset:offset + 4]
+            rows, length = struct.unpack_from("<IQ", buf, offset + 4)
+            if magic != _CHUNK_MAGIC or offset + length > len(buf):
+                break # incomplete final chunk
+            views = {}
+            position = offset + 16 + _padding(16)
+            for name, dtype, shape in self.columns:
+                count = rows * int(numpy.prod(shape))
+                views[name] = numpy.frombuffer(buf, dtype=dtype, count=count,
+                        offset=position).reshape((rows,) + shape)
+                size = count * dtype.itemsize
+                position += size + _padding(size)
+            self._chunks.append(views)
+            self._chunkStarts.append(rowCount)
+            rowCount += rows
+            offset += length
+        self._rowCount = rowCount
+        self._chunkStarts = numpy.array(self._chunkStarts + [rowCount], dtype=numpy.int64)
+        self._columnCache = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def __len__(self):
+        return self._rowCount
+
+    @property
+    def names(self):
+        return [column[0] for column in self.columns]
+
+    def chunks(self):
+        "Dicts of column name to zero copy array, one per chunk"
+        return iter(self._chunks)
+
+    def __getitem__(self, name):
+        column = self._columnCache.get(name)
+        if column is None:
+            if name not in self.names:
+                raise KeyError(name)
+            if len(self._chunks) == 1:
+                column = self._chunks[0][name]
+            elif not self._chunks:
+                dtype, shape = [column[1:] for column in self.columns if column[0] == name][0]
+                column = numpy.zeros((0,) + shape, dtype=dtype)
+            else:
+                column = numpy.concatenate([chunk[name] for chunk in self._chunks])
+            self._columnCache[name] = column
+        return column
+
+    def row(self, index):
+        "Dict of column name to the values in one row"
+        if index < 0:
+            index += self._rowCount
+        if not 0 <= index < self._rowCount:
+            raise IndexError("row %d out of range" % index)
+        chunk = int(numpy.searchsorted(self._chunkStarts, index, side="right")) - 1
+        offset = index - self._chunkStarts[chunk]
+        return dict((name, values[offset]) for name, values in self._chunks[chunk].items())
+
+    def close(self):
+        self._chunks = []
+        self._columnCache = {}
+        # Views into the map may still be alive elsewhere; leave the map to the garbage collector then
+        try:
+            self._map.close()
+        except BufferError:
+            pass
+
+
+class TrackingRecorder(object):
+    """
+    Samples ovr.getTrackingState() on a background thread and writes the
+    samples to a recording file.
+
+        with TrackingRecorder(session, "session.ovrrec", rate=1000) as recorder:
+            ... # run the application
+
+    Each row holds SampleTime (ovr.getTimeInSeconds() when sampled) and the
+    TrackingState fields named by columns, COMPACT_COLUMNS by default (see the
+    module docstring); with controllerType, the InputState of those
+    controllers is recorded as well. Full chunks of chunkSize rows are written
+    by a writer thread, so that file writes do not delay the sampling. Call
+    sample() directly instead of start() to record from your own loop. An
+    error in either thread stops the recording, and is raised from sample()
+    or stop().
+    """
+
+    def __init__(self, session, path, rate=1000.0, columns=COMPACT_COLUMNS,
+            controllerType=None, chunkSize=4096, metadata=None, buffers=3):
+        self.session = session
+        self.path = path
+        self.rate = float(rate)
+        self.controllerType = controllerType
+        self.chunkSize = chunkSize
+        self.sampleCount = 0
+        stateDtype = numpy.dtype(ovr.TrackingState)
+        self._columns = [(column[0], tuple(column[1])) if isinstance(column, (tuple, list)) else (column, None)
+                for column in columns]
+        writerColumns = [("SampleTime", numpy.float64)]
+        for name, subfields in self._columns:
+            writerColumns.append((name, _columnDtype(stateDtype.fields[name][0], subfields)))
+        if controllerType is not None:
+            writerColumns.append(("InputState", numpy.dtype(ovr.InputState)))
+        info = {"rate": self.rate, "sdk": "%d.%d" % (ovr.PRODUCT_VERSION, ovr.MINOR_VERSION)}
+        if controllerType is not None:
+            info["controllerType"] = controllerType
+        info.update(metadata or {})
+        self._writer = RecordingWriter(path, writerColumns, info)
+        # Rows are collected whole, into one of a ring of chunk buffers, and
+        # split into columns by the writer thread
+        self._freeChunks = queue.Queue()
+        for i in range(buffers):
+            self._freeChunks.put(self._newChunk())
+        self._fullChunks = queue.Queue()
+        self._chunk = self._freeChunks.get()
+        self._count = 0
+        self._error = None
+        self._lock = threading.Lock()
+        self._sampler = PeriodicThread(self.sample, "ovr tracking recorder")
+        self._writerThread = threading.Thread(target=self._writeChunks, name="ovr tracking recorder writer")
+        self._writerThread.daemon = True
+        self._writerThread.start()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    @property
+    def missedSamples(self):
+        "Samples skipped because the background thread fell behind"
+        return self._sampler.missed
+
+    def _newChunk(self):
+        "(sample times, TrackingStates, InputStates or None) for chunkSize rows"
+        states = (ovr.TrackingState * self.chunkSize)()
+        inputs = None
+        if self.controllerType is not None:
+            inputs = (ovr.InputState * self.chunkSize)()
+        return numpy.zeros(self.chunkSize, dtype=numpy.float64), states, inputs
+
+    def sample(self):
+        "Record the current tracking state"
+        if self._error is not None:
+            raise self._error
+        with self._lock:
+            i = self._count
+            times, states, inputs = self._chunk
+            times[i] = ovr.getTimeInSeconds()
+            state = ovr.getTrackingState(self.session, 0.0, False)
+            ctypes.memmove(ctypes.addressof(states[i]), ctypes.addressof(state), ctypes.sizeof(state))
+            if inputs is not None:
+                inputState = ovr.getInputState(self.session, self.controllerType)
+                ctypes.memmove(ctypes.addressof(inputs[i]), ctypes.addressof(inputState),
+                        ctypes.sizeof(inputState))
+            self._count = i + 1
+            self.sampleCount += 1
+            if self._count == self.chunkSize:
+                self._queueChunk()
+
+    def _queueChunk(self):
+        self._fullChunks.put((self._chunk, self._count))
+        # Only waits when the writer is a whole ring of chunks behind
+        self._chunk = self._freeChunks.get()
+        self._count = 0
+
+    def _writeChunks(self):
+        while True:
+            item = self._fullChunks.get()
+            if item is None:
+                return
+            chunk, rows = item
+            try:
+                if self._error is None:
+                    self._writeChunk(chunk, rows)
+            except Exception as e:
+                self._error = e
+            self._freeChunks.put(chunk)
+
+    def _writeChunk(self, chunk, rows):
+        times, states, inputs = chunk
+        stateRows = ovr.as_numpy(states)[:rows]
+        columns = {"SampleTime": times}
+        for name, subfields in self._columns:
+            values = stateRows[name]
+            if subfields is not None:
+                packed = numpy.empty(values.shape, dtype=_columnDtype(values.dtype, subfields))
+                for subfield in subfields:
+                    packed[subfield] = values[subfield]
+                values = packed
+            columns[name] = values
+        if inputs is not None:
+            columns["InputState"] = ovr.as_numpy(inputs)
+        self._writer.writeChunk(columns, rows)
+
+    def start(self):
+        "Begin sampling at self.rate on a background thread"
+        self._sampler.start(self.rate)
+
+    def stop(self):
+        "Stop sampling, write the remaining samples and close the file"
+        if self._writerThread is None:
+            return
+        try:
+            self._sampler.stop()
+        finally:
+            with self._lock:
+                if self._count:
+                    self._fullChunks.put((self._chunk, self._count))
+                    self._count = 0
+                self._fullChunks.put(None)
+                self._writerThread.join()
+                self._writerThread = None
+                self._writer.close()
+        if self._error is not None:
+            raise self._error
@@ -0,0 +1,111 @@
+"""
+Memoized per-eye rendering parameters.
+
+The projection matrix, timewarp projection, EyeRenderDesc and recommended
+texture size of an eye only change when its FovPort, clip range or projection
+flags do, yet they are commonly recomputed through ctypes every frame. A
+RenderDescCache computes each distinct combination once.
+
+Projection matrices and timewarp projections are pure functions of their
+arguments and are shared by all caches; the MAX_PROJECTIONS most recently
+used of each are kept, so that a clip range or field of view that changes
+every frame cannot grow them without bound. Render descs and texture sizes depend
+on the session's HMD, so they are dropped when a new session is set and when
+the display is lost. Cached structures are shared; treat them as read-only.
+"""
+
+import collections
+
+import ovr
+
+
+MAX_PROJECTIONS = 64
+
+
+def _fovKey(fov):
+    return (fov.UpTan, fov.DownTan, fov.LeftTan, fov.RightTan)
+
+
+# key -> value, least recently used first
+_projections = collections.OrderedDict()
+_timewarpProjections = collections.OrderedDict()
+
+
+def _cached(cache, key, compute):
+    "The value of key in cache, computing and adding it, and evicting the least recently used, if missing"
+    result = cache.pop(key, None)
+    if result is None:
+        result = compute()
+        while len(cache) >= MAX_PROJECTIONS:
+            cache.popitem(last=False)
+    cache[key] = result
+    return result
+
+
+def projection(fov, near, far, flags=None):
+    "Cached ovr.matrix4f_Projection(fov, near, far, flags)"
+    if flags is None:
+        flags = ovr.Projection_None
+    key = _fovKey(fov) + (near, far, flags)
+    return _cached(_projections, key, lambda: ovr.matrix4f_Projection(fov, near, far, flags))
+
+
+def timewarp_projection(fov, near, far, flags=None):
+    "Cached TimewarpProjectionDesc of projection(fov, near, far, flags)"
+    if flags is None:
+        flags = ovr.Projection_None
+    key = _fovKey(fov) + (near, far, flags)
+    return _cached(_timewarpProjections, key, lambda: ovr.timewarpProjectionDesc_FromProjection(
+            projection(fov, near, far, flags), flags))
+
+
+class RenderDescCache(object):
+    """
+    Per-session cache of EyeRenderDesc and recommended texture sizes, plus
+    the shared projection caches. Pass each new session to set_session(),
+    and SessionStatus results to update_session_status(); Rift does both.
+    """
+
+    def __init__(self, session=None):
+        self.session = None
+        self._renderDescs = {}
+        self._textureSizes = {}
+        self.set_session(session)
+
+    def set_session(self, session):
+        "Switch to session, dropping the values of any other session"
+        # By object, not by address: the runtime may hand out a new session at a freed one's address
+        if session is not self.session:
+            self.invalidate()
+        self.session = session
+
+    def invalidate(self):
+        "Drop the session dependent values"
+        self._renderDescs.clear()
+        self._textureSizes.clear()
+
+    def update_session_status(self, status):
+        "Invalidate if status reports that the display was lost; returns status"
+        if ovr.toOvrBool(status.DisplayLost) == ovr.ovrTrue:
+            self.invalidate()
+        return status
+
+    projection = staticmethod(projection)
+    timewarp_projection = staticmethod(timewarp_projection)
+
+    def render_desc(self, eye, fov):
+        "Cached ovr.getRenderDesc(session, eye, fov)"
+        key = (eye,) + _fovKey(fov)
+        result = self._renderDescs.get(key)
+        if result is None:
+            result = self._renderDescs[key] = ovr.getRenderDesc(self.session, eye, fov)
+        return result
+
+    def fov_texture_size(self, eye, fov, pixels_per_display_pixel=1.0):
+        "Cached ovr.getFovTextureSize(session, eye, fov, pixels_per_display_pixel)"
+        key = (eye, pixels_per_display_pixel) + _fovKey(fov)
+        result = self._textureSizes.get(key)
+        if result is None:
+            result = self._textureSizes[key] = ovr.getFovTextureSize(
+                    self.session, eye, fov, pixels_per_display_pixel)
+        return result
@@ -0,0 +1,184 @@
+"""
+Replaying recorded tracking sessions through the normal ovr API.
+
+A ReplayRuntime is a SimulatedRuntime whose head and hand poses, and
+optionally controller input, come from a file written by
+ovr.recording.TrackingRecorder. ovr.getTrackingState(), ovr.getDevicePoses()
+and ovr.getEyePoses() return poses interpolated to the requested absTime, and
+ovr.getInputState() returns the latest recorded input, so rendering and
+interaction code can be benchmarked on the same data every run.
+
+    with ReplayRuntime("session.ovrrec"):
+        ovr.initialize(None)
+        session, luid = ovr.create()
+        ...
+
+Times are on the recording's own clock. The default SimulatedClock starts at
+the first sample and only moves when the application waits (frame pacing,
+simulated latencies), so a replay runs as fast as the application can render.
+Pass clock=WallClock(start=replay.startTime, speed=...) to replay in real
+time, or at a fixed multiple of it. Once the clock passes the last sample,
+SessionStatus.ShouldQuit is set.
+"""
+
+from __future__ import absolute_import
+
+import ctypes
+import math
+
+import numpy
+
+import ovr
+from .pose_service import extrapolatePoseState
+from .recording import Recording
+from .simulation import SimulatedRuntime, SimulatedClock
+
+
+def _slerp(a, b, alpha):
+    "Shortest path interpolation between two Quatf, as an (x, y, z, w) tuple"
+    qa = (a.x, a.y, a.z, a.w)
+    qb = (b.x, b.y, b.z, b.w)
+    cosTheta = sum(u*v for u, v in zip(qa, qb))
+    if cosTheta < 0:
+        qb = tuple(-v for v in qb)
+        cosTheta = -cosTheta
+    if cosTheta > 0.9995:
+        q = [u + alpha * (v - u) for u, v in zip(qa, qb)]
+    else:
+        theta = math.acos(cosTheta)
+        wa = math.sin((1.0 - alpha) * theta) / math.sin(theta)
+        wb = math.sin(alpha * theta) / math.sin(theta)
+        q = [wa*u + wb*v for u, v in zip(qa, qb)]
+    norm = math.sqrt(sum(v*v for v in q))
+    return tuple(v / norm for v in q)
+
+
+def _lerpVector(out, a, b, alpha):
+    out.x = a.x + alpha * (b.x - a.x)
+    out.y = a.y + alpha * (b.y - a.y)
+    out.z = a.z + alpha * (b.z - a.z)
+
+
+def _interpolatePoseState(out, a, b, alpha, t):
+    o = out.ThePose.Orientation
+    o.x, o.y, o.z, o.w = _slerp(a.ThePose.Orientation, b.ThePose.Orientation, alpha)
+    _lerpVector(out.ThePose.Position, a.ThePose.Position, b.ThePose.Position, alpha)
+    for name in ("AngularVelocity", "LinearVelocity", "AngularAcceleration", "LinearAcceleration"):
+        _lerpVector(getattr(out, name), getattr(a, name), getattr(b, name), alpha)
+    out.TimeInSeconds = t
+
+
+class ReplayRuntime(SimulatedRuntime):
+    """
+    Simulated runtime that serves poses and input from a recording.
+
+    recording is a path or an open ovr.recording.Recording. Poses are indexed
+    by the recording's SampleTime column. maxPrediction bounds how far past
+    the last sample poses are extrapolated from their velocities.
+    """
+
+    def __init__(self, recording, clock=None, maxPrediction=0.1, **kwargs):
+        if not isinstance(recording, Recording):
+            recording = Recording(recording)
+        self.recording = recording
+        times = recording["SampleTime"]
+        if len(times) == 0:
+            raise ValueError("%s holds no samples" % recording.path)
+        self.times = numpy.ascontiguousarray(times, dtype=numpy.float64)
+        self.startTime = float(self.times[0])
+        self.endTime = float(self.times[-1])
+        self.maxPrediction = maxPrediction
+        if clock is None:
+            clock = SimulatedClock(start=self.startTime)
+        SimulatedRuntime.__init__(self, clock=clock, **kwargs)
+        self._chunks = list(recording.chunks())
+        self._chunkStarts = numpy.cumsum([0] + [len(chunk["SampleTime"]) for chunk in self._chunks])
+        self._hasInput = "InputState" in recording.names
+        # Scratch records, reused by every query
+        self._stateA = ovr.TrackingState()
+        self._stateB = ovr.TrackingState()
+        self._stateSize = ctypes.sizeof(ovr.TrackingState)
+
+    @property
+    def finished(self):
+        "True once the clock has passed the last recorded sample"
+        return self.clock.now() > self.endTime
+
+    def _copyRow(self, index, state):
+        "Recorded TrackingState fields of sample index, into state"
+        chunk = int(numpy.searchsorted(self._chunkStarts, index, side="right")) - 1
+        row = index - self._chunkStarts[chunk]
+        columns = self._chunks[chunk]
+        address = ctypes.addressof(state)
+        view = None
+        for name, (fieldType, offset) in _trackingFields():
+            values = columns.get(name)
+            if values is None:
+                continue
+            if values.dtype.itemsize * int(numpy.prod(values.shape[1:])) == ctypes.sizeof(fieldType):
+                ctypes.memmove(address + offset, values[row:].ctypes.data, ctypes.sizeof(fieldType))
+            else:
+                # Only some parts of the field were recorded, e.g. poses without accelerations
+                if view is None:
+                    view = ovr.as_numpy(state)
+                for subfield in values.dtype.names:
+                    view[name][subfield] = values[row][subfield]
+
+    def _sampleIndex(self, t):
+        "Index of the last sample at or before t, or -1"
+        return int(numpy.searchsorted(self.times, t, side="right")) - 1
+
+    def _fillTrackingState(self, state, t):
+        index = self._sampleIndex(t)
+        last = len(self.times) - 1
+        if index < 0:
+            self._copyRow(0, state)
+            return
+        if index >= last:
+            self._copyRow(last, self._stateA)
+            ctypes.memmove(ctypes.addressof(state), ctypes.addressof(self._stateA), self._stateSize)
+            dt = min(t - self.times[last], self.maxPrediction)
+            # Predict from velocities, like the runtime does
+            extrapolatePoseState(state.HeadPose, self._stateA.HeadPose, dt, acceleration=False)
+            state.HeadPose.TimeInSeconds = t
+            for hand in range(2):
+                extrapolatePoseState(state.HandPoses[hand], self._stateA.HandPoses[hand], dt, acceleration=False)
+                state.HandPoses[hand].TimeInSeconds = t
+            return
+        a, b = self._stateA, self._stateB
+        self._copyRow(index, a)
+        self._copyRow(index + 1, b)
+        t0, t1 = self.times[index], self.times[index + 1]
+        alpha = (t - t0) / (t1 - t0) if t1 > t0 else 0.0
+        nearest = a if alpha < 0.5 else b
+        ctypes.memmove(ctypes.addressof(state), ctypes.addressof(nearest), self._stateSize)
+        _interpolatePoseState(state.HeadPose, a.HeadPose, b.HeadPose, alpha, t)
+        for hand in range(2):
+            _interpolatePoseState(state.HandPoses[hand], a.HandPoses[hand], b.HandPoses[hand], alpha, t)
+
+    def _fillInputState(self, inputState, controllerType, t):
+        if not self._hasInput:
+            SimulatedRuntime._fillInputState(self, inputState, controllerType, t)
+            return
+        index = max(self._sampleIndex(t), 0)
+        chunk = int(numpy.searchsorted(self._chunkStarts, index, side="right")) - 1
+        values = self._chunks[chunk]["InputState"]
+        row = index - self._chunkStarts[chunk]
+        ctypes.memmove(ctypes.addressof(inputState), values[row:].ctypes.data, ctypes.sizeof(inputState))
+        inputState.ControllerType &= controllerType
+
+    def ovr_GetSessionStatus(self, session, sessionStatus):
+        if self.finished:
+            self.shouldQuit = True
+        return SimulatedRuntime.ovr_GetSessionStatus(self, session, sessionStatus)
+
+
+_fields = None
+
+def _trackingFields():
+    "(column name, (ctypes type, offset in TrackingState)) for the recorded TrackingState fields"
+    global _fields
+    if _fields is None:
+        _fields = [(name, (fieldType, getattr(ovr.TrackingState, name).offset))
+                for name, fieldType in ovr.TrackingState._fields_]
+    return _fields
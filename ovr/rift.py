@@ -3,6 +3,9 @@ import ctypes
 from OpenGL.GL import GL_RGBA8
 
 import ovr
+from ovr.prepared_frame import PreparedFrame
+from ovr.render_cache import RenderDescCache
+from ovr import render_cache
 
 class Rift():
 
@@ -20,7 +23,8 @@ class Rift():
 
     @staticmethod
     def get_perspective(fov, near, far, projectionFlags=ovr.Projection_None):
-      return ovr.matrix4f_Projection(fov, near, far, projectionFlags)
+      "Projection matrix, a copy of the one computed once per distinct fov, clip range and flags"
+      return ovr.Matrix4f.from_buffer_copy(render_cache.projection(fov, near, far, projectionFlags))
 
     @staticmethod
     def initialize(params=None):
@@ -34,6 +38,17 @@ class Rift():
       self.session = None
       self.luid = None
       self.hmdDesc = None
+      self._device_pose_buffers = {}
+      self.render_cache = RenderDescCache()
+      # get_eye_poses() arguments, allocated once; the offsets follow get_render_desc()
+      self.eye_offsets = (ovr.Vector3f * 2)()
+      self.eye_poses = (ovr.Posef * 2)()
+      self.sensor_sample_time = ctypes.c_double()
+      self._sensor_sample_time_ref = ctypes.byref(self.sensor_sample_time)
+      self._latency_markers = (ovr.toOvrBool(False), ovr.toOvrBool(True))
+      self._pose_layer = None
+      self._pose_layer_poses = None
+      self._eye_offsets_known = [False, False]
 
     def __enter__(self):
       self.init()
@@ -69,6 +84,7 @@ class Rift():
       self.luid = None
       self.hmdDesc = None
       self.session = None
+      self.render_cache.set_session(None)
 
     def destroy_swap_texture(self, textureSwapChain):
       return ovr.destroyTextureSwapChain(self.session, textureSwapChain)
@@ -76,14 +92,59 @@ class Rift():
     def get_current_texture_id_GL(self, textureSwapChain):
       return ovr.getTextureSwapChainBufferGL(self.session, textureSwapChain, -1)
 
-    def get_fov_texture_size(self, eye, fov_port, pixels_per_display_pixel=1.0):
-      return ovr.getFovTextureSize(self.session, eye, fov_port, pixels_per_display_pixel);
+    def get_device_poses(self, device_types, abs_time=0.0, as_numpy=False):
+      """
+      Poses of several tracked devices, e.g. (ovr.TrackedDevice_HMD, ovr.TrackedDevice_LTouch),
+      from one native call. The returned (PoseStatef * N) array, or its NumPy
+      structured view, is reused and overwritten by the next call for the same devices.
+      """
+      key = tuple(device_types)
+      buffers = self._device_pose_buffers.get(key)
+      if buffers is None:
+        types = (ovr.TrackedDeviceType * len(key))(*key)
+        poses = (ovr.PoseStatef * len(key))()
+        buffers = self._device_pose_buffers[key] = [types, poses, None]
+      types, poses, view = buffers
+      ovr.getDevicePoses(self.session, types, len(key), abs_time, poses)
+      if not as_numpy:
+        return poses
+      if view is None:
+        view = buffers[2] = ovr.as_numpy(poses)
+      return view
 
-    def get_eye_poses(self, frame_index, latencyMarker, eyeOffsets, trackingState=0):
-      in_arr = (ovr.Vector3f * 2)(*eyeOffsets)
-      out_arr = (ovr.Posef * 2)()
-      ovr.getEyePoses(self.session, frame_index, latencyMarker, in_arr, out_arr)
-      return out_arr;
+    def get_fov_texture_size(self, eye, fov_port, pixels_per_display_pixel=1.0):
+      return self.render_cache.fov_texture_size(eye, fov_port, pixels_per_display_pixel)
+
+    def get_eye_poses(self, frame_index, latencyMarker=True, eyeOffsets=None, trackingState=0, layer=None):
+      """
+      Predicted eye poses for frame_index, from the offsets of the last
+      get_render_desc() call for each eye (the default FovPort's, if there
+      was none), or from eyeOffsets. With layer, a
+      LayerEyeFov or LayerEyeMatrix, the poses go straight into its RenderPose
+      and the sample time into its SensorSampleTime. Otherwise they go into
+      self.eye_poses. Either way the (Posef * 2) array is returned; it is
+      overwritten by the next call. No ctypes objects are created per call.
+      """
+      if eyeOffsets is not None and eyeOffsets is not self.eye_offsets:
+        for eye in range(2):
+          self.eye_offsets[eye] = eyeOffsets[eye]
+      elif not all(self._eye_offsets_known):
+        for eye in range(2):
+          if not self._eye_offsets_known[eye]:
+            self.get_render_desc(eye, self.hmdDesc.DefaultEyeFov[eye])
+      if layer is None:
+        poses = self.eye_poses
+      elif layer is self._pose_layer:
+        poses = self._pose_layer_poses
+      else:
+        poses = layer.RenderPose # shares the layer's memory
+        self._pose_layer = layer
+        self._pose_layer_poses = poses
+      ovr.libovr.native("ovr_GetEyePoses")(self.session, frame_index, self._latency_markers[bool(latencyMarker)],
+          self.eye_offsets, poses, self._sensor_sample_time_ref)
+      if layer is not None:
+        layer.SensorSampleTime = self.sensor_sample_time.value
+      return poses
 
     def get_float(self, name, default):
       return ovr.getFloat(self.session, name, default)
@@ -95,7 +156,15 @@ class Rift():
       return ovr.getString(self.session, name, default)
 
     def get_render_desc(self, eye, fov):
-      return ovr.getRenderDesc(self.session, eye, fov)
+      "EyeRenderDesc; its HmdToEyeOffset becomes the offset get_eye_poses() uses for eye"
+      desc = self.render_cache.render_desc(eye, fov)
+      self.eye_offsets[eye] = desc.HmdToEyeOffset
+      self._eye_offsets_known[eye] = True
+      return desc
+
+    def get_session_status(self):
+      "SessionStatus; cached render parameters are dropped when the display was lost"
+      return self.render_cache.update_session_status(ovr.getSessionStatus(self.session))
 
     def get_resolution(self):
       return self.hmdDesc.Resolution
@@ -106,6 +175,12 @@ class Rift():
     def init(self):
       self.session, self.luid = ovr.create()
       self.hmdDesc = ovr.getHmdDesc(self.session)
+      self.render_cache.set_session(self.session)
+      self._eye_offsets_known = [False, False]
+
+    def prepare_frame(self, layers, hmdToEyeOffset=None, worldScale=1.0):
+      "PreparedFrame for submitting the same layer structures every frame"
+      return PreparedFrame(self.session, layers, hmdToEyeOffset, worldScale)
 
     def submit_frame(self, frameIndex, viewScaleDesc, layerPtrList, layerCount):
       return ovr.submitFrame(self.session, frameIndex, viewScaleDesc, layerPtrList, layerCount)
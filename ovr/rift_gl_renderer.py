@@ -0,0 +1,335 @@
+#!/bin/env python
+"""
+OpenGL core profile renderer for the Rift.
+
+Unlike RiftGLRendererCompatibility, no fixed-function state is used: the
+per-eye projection and view matrices are computed with matrix4f_Projection
+and ovr.math straight from the eye poses, and uploaded once per frame into a
+uniform buffer. Actors draw from their own vertex arrays, and their vertex
+shaders include CAMERA_BLOCK, which declares the Camera uniform block and
+
+    vec4 eyeClipPosition(vec4 worldPosition);
+
+so the Python work per frame does not depend on how much geometry is drawn.
+Actors have the same init_gl(), display_gl() and dispose_gl() methods as
+before; compile_program() binds their Camera block to the renderer's buffer.
+
+By default each actor is drawn once per eye. With single_pass_stereo, each
+actor is drawn once, as two instances: display_gl(instance_count=2) is
+called, and the actor passes instance_count on to glDraw*Instanced.
+eyeClipPosition() then picks the eye from gl_InstanceID and moves the vertex
+into that eye's half of the shared texture, clipping it at the middle with
+gl_ClipDistance[0]. Actors that use instancing themselves should take their
+own instance number from actorInstanceID() rather than gl_InstanceID.
+"""
+
+from __future__ import absolute_import
+
+import ctypes
+
+import numpy
+from OpenGL.GL import *
+
+from ovr.rift import Rift
+from ovr.layers import LayerManager
+from ovr.mirror import MirrorTexture, MirrorRecorder
+from ovr.pose_service import PoseService
+from ovr.swap_chain_pool import SwapChainPool
+import ovr
+import ovr.math
+
+
+# Uniform buffer binding point of the Camera block
+CAMERA_BINDING = 0
+
+CAMERA_BLOCK = """
+layout(std140, row_major) uniform Camera {
+    mat4 Projections[2];
+    mat4 Views[2];
+    int CameraEye; // eye of this pass, or -1 for both eyes, one per instance
+};
+
+int actorInstanceID() {
+    return CameraEye < 0 ? gl_InstanceID / 2 : gl_InstanceID;
+}
+
+vec4 eyeClipPosition(vec4 worldPosition) {
+    if (CameraEye >= 0)
+        return Projections[CameraEye] * Views[CameraEye] * worldPosition;
+    int eye = gl_InstanceID % 2;
+    vec4 position = Projections[eye] * Views[eye] * worldPosition;
+    // Keep each eye in its own half of the viewport, which spans both eyes
+    gl_ClipDistance[0] = eye == 0 ? position.w - position.x : position.w + position.x;
+    position.x = 0.5 * position.x + (eye == 0 ? -0.5 : 0.5) * position.w;
+    return position;
+}
+"""
+
+_CAMERA_SIZE = 4 * 16 * 4 + 16 # bytes of the Camera block: four matrices, and CameraEye padded to a vec4
+_BOTH_EYES = 2 # index of the Camera block for single pass stereo
+
+
+def compile_program(vertex_source, fragment_source):
+    "Compile and link a shader program; its Camera block, if any, is bound to CAMERA_BINDING"
+    program = glCreateProgram()
+    shaders = []
+    for shader_type, source in ((GL_VERTEX_SHADER, vertex_source), (GL_FRAGMENT_SHADER, fragment_source)):
+        shader = glCreateShader(shader_type)
+        glShaderSource(shader, source)
+        glCompileShader(shader)
+        if glGetShaderiv(shader, GL_COMPILE_STATUS) != GL_TRUE:
+            log = glGetShaderInfoLog(shader)
+            glDeleteShader(shader)
+            glDeleteProgram(program)
+            raise RuntimeError("Shader compilation failed: %s" % log)
+        glAttachShader(program, shader)
+        shaders.append(shader)
+    glLinkProgram(program)
+    for shader in shaders:
+        glDetachShader(program, shader)
+        glDeleteShader(shader)
+    if glGetProgramiv(program, GL_LINK_STATUS) != GL_TRUE:
+        log = glGetProgramInfoLog(program)
+        glDeleteProgram(program)
+        raise RuntimeError("Shader program link failed: %s" % log)
+    block = glGetUniformBlockIndex(program, "Camera")
+    if block != GL_INVALID_INDEX:
+        glUniformBlockBinding(program, block, CAMERA_BINDING)
+    return program
+
+
+class RiftGLRenderer(list):
+    """
+    Class RiftGLRenderer is a list of OpenGL actors, rendered to the Rift
+    with an OpenGL 3.3 core profile context.
+
+    rift may be an already initialized Rift; by default one is created.
+    pixel_density scales the eye buffers relative to the recommended size;
+    set_pixel_density() changes it later, reusing earlier eye buffers.
+    single_pass_stereo draws both eyes with one instanced draw per actor.
+    adaptive_resolution, an ovr.adaptive_resolution.AdaptiveResolution, picks
+    the render scale of each frame; set_render_scale() sets it by hand.
+    mirror_size, a (width, height), shows the compositor's mirror texture on
+    the desktop instead of the raw eye buffers; start_recording() then
+    streams it to a file or pipe. More layers, such as HUD quads that are only
+    redrawn when they change, can be added to layer_manager after init_gl().
+    """
+
+    def __init__(self, rift=None, pixel_density=1.0, near_clip=0.2, far_clip=100.0,
+            single_pass_stereo=False, adaptive_resolution=None, mirror_size=None):
+        self.single_pass_stereo = single_pass_stereo
+        self.adaptive_resolution = adaptive_resolution
+        self.render_scale = 1.0
+        self.width = 100
+        self.height = 100
+        self.frame_index = 0
+        self.pixel_density = pixel_density
+        self.near_clip = near_clip
+        self.far_clip = far_clip
+        self.clear_color = (0, 0, 1, 0)
+        self.target = None
+        self.textureSwapChain = None
+        self.fbo = None
+        self.camera_ubo = None
+        self.layer_manager = None
+        self.mirror_size = mirror_size
+        self.mirror = None
+        self.recorder = None
+        if rift is None:
+            rift = Rift()
+            Rift.initialize()
+            rift.init()
+        self.rift = rift
+        self.pose_service = PoseService(self.rift.session)
+        self.swap_chain_pool = SwapChainPool(self.rift.session)
+
+    def display_gl(self):
+        self.display_rift_gl()
+        self.display_desktop_gl()
+
+    def display_desktop_gl(self):
+        "Mirror the eye buffers, or the mirror texture, to the window, by blitting"
+        if self.mirror is not None:
+            self.mirror.blit(self.width, self.height)
+            if self.recorder is not None:
+                self.recorder.capture()
+            return
+        v = self.layer.Viewport[1]
+        glBindFramebuffer(GL_READ_FRAMEBUFFER, self.fbo)
+        glBindFramebuffer(GL_DRAW_FRAMEBUFFER, 0)
+        glBlitFramebuffer(0, 0, v.Pos.x + v.Size.w, v.Size.h,
+                0, 0, self.width, self.height,
+                GL_COLOR_BUFFER_BIT, GL_LINEAR)
+        glBindFramebuffer(GL_READ_FRAMEBUFFER, 0)
+
+    def display_rift_gl(self):
+        if self.adaptive_resolution is not None:
+            self.set_render_scale(self.adaptive_resolution.update())
+        layer, self.fbo = self._update_gl_poses()
+        glBindFramebuffer(GL_FRAMEBUFFER, self.fbo)
+        glClearColor(*self.clear_color)
+        glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
+        # Both eyes' view matrices, straight into the uniform buffer staging array
+        ovr.math.viewMatrix(layer.RenderPose, out=self._views)
+        self._camera_data[1:, :64] = self._camera_data[0, :64]
+        glBindBuffer(GL_UNIFORM_BUFFER, self.camera_ubo)
+        glBufferSubData(GL_UNIFORM_BUFFER, 0, self._camera_data.nbytes, self._camera_data)
+        if self.single_pass_stereo:
+            # One viewport over both eyes; the shader puts each instance in its own half
+            v = layer.Viewport[0]
+            glViewport(v.Pos.x, v.Pos.y, 2 * v.Size.w, v.Size.h)
+            glBindBufferRange(GL_UNIFORM_BUFFER, CAMERA_BINDING, self.camera_ubo,
+                    _BOTH_EYES * self._camera_stride, _CAMERA_SIZE)
+            glEnable(GL_CLIP_DISTANCE0)
+            for actor in self:
+                actor.display_gl(instance_count=2)
+            glDisable(GL_CLIP_DISTANCE0)
+        else:
+            for eye in range(2):
+                v = layer.Viewport[eye]
+                glViewport(v.Pos.x, v.Pos.y, v.Size.w, v.Size.h)
+                glBindBufferRange(GL_UNIFORM_BUFFER, CAMERA_BINDING, self.camera_ubo,
+                        eye * self._camera_stride, _CAMERA_SIZE)
+                for actor in self:
+                    actor.display_gl()
+        self.submit_frame()
+        glBindFramebuffer(GL_FRAMEBUFFER, 0)
+
+    def dispose_gl(self):
+        self.stop_recording()
+        if self.mirror is not None:
+            self.mirror.destroy()
+            self.mirror = None
+        for actor in self:
+            actor.dispose_gl()
+        if self.camera_ubo is not None:
+            glDeleteBuffers(1, [self.camera_ubo])
+            self.camera_ubo = None
+        if self.layer_manager is not None:
+            self.layer_manager.destroy()
+            self.layer_manager = None
+        self.swap_chain_pool.clear()
+        self.target = None
+        self.textureSwapChain = None
+        self.fbo = None
+
+    def init_gl(self):
+        self._init_rift_render_layer()
+        self._init_camera_buffer()
+        if self.mirror_size is not None:
+            self.mirror = MirrorTexture(self.rift.session, *self.mirror_size)
+        for actor in self:
+            actor.init_gl()
+
+    def resize_gl(self, width, height):
+        self.width = width
+        self.height = height
+
+    def set_pixel_density(self, pixel_density):
+        "Resize the eye buffers; a size used before gets its old swap chain back"
+        if pixel_density == self.pixel_density:
+            return
+        self.pixel_density = pixel_density
+        self.swap_chain_pool.release(self.target)
+        self._acquire_eye_buffers()
+
+    @property
+    def prepared_frame(self):
+        return self.layer_manager.prepared_frame
+
+    def start_recording(self, sink, ring_size=3):
+        "Stream each mirrored frame to sink, as by ovr.mirror.MirrorRecorder; needs mirror_size"
+        if self.mirror is None:
+            raise RuntimeError("Recording needs a mirror texture; pass mirror_size")
+        self.stop_recording()
+        self.recorder = MirrorRecorder(self.mirror, sink, ring_size)
+        return self.recorder
+
+    def stop_recording(self):
+        "Finish writing the recorded frames"
+        if self.recorder is not None:
+            recorder = self.recorder
+            self.recorder = None
+            recorder.close()
+
+    def set_render_scale(self, render_scale):
+        """
+        Render the eyes at render_scale (at most 1) of the eye buffer width and
+        height, by shrinking the layer viewports; nothing is reallocated.
+        """
+        if render_scale == self.render_scale:
+            return
+        self.render_scale = render_scale
+        self._update_viewports()
+
+    def submit_frame(self):
+        self.target.commit()
+        self.layer_manager.submit(self.frame_index)
+        self.frame_index += 1
+
+    def _init_camera_buffer(self):
+        # Three copies of the Camera block: one per eye pass, and one for both
+        # eyes at once. Each starts on a uniform buffer offset boundary.
+        alignment = int(glGetIntegerv(GL_UNIFORM_BUFFER_OFFSET_ALIGNMENT))
+        self._camera_stride = (_CAMERA_SIZE + alignment - 1) // alignment * alignment
+        self._camera_data = numpy.zeros((3, self._camera_stride // 4), dtype=numpy.float32)
+        matrices = self._camera_data[:, :64].reshape(3, 2, 2, 4, 4) # block, projection/view, eye
+        self._views = matrices[0, 1]
+        for eye in range(2):
+            projection = self.rift.get_perspective(self.layer.Fov[eye], self.near_clip, self.far_clip)
+            matrices[:, 0, eye] = ovr.as_numpy(projection)
+        self._camera_data.view(numpy.int32)[:, 64] = (0, 1, -1) # CameraEye
+        self.camera_ubo = glGenBuffers(1)
+        glBindBuffer(GL_UNIFORM_BUFFER, self.camera_ubo)
+        glBufferData(GL_UNIFORM_BUFFER, self._camera_data.nbytes, None, GL_DYNAMIC_DRAW)
+        glBindBuffer(GL_UNIFORM_BUFFER, 0)
+
+    def _init_rift_render_layer(self):
+        """
+        NOTE: Initialize OpenGL first (elsewhere), before getting Rift textures here.
+        """
+        hmdDesc = self.rift.hmdDesc
+        eyeRenderDesc = [self.rift.get_render_desc(eye, hmdDesc.DefaultEyeFov[eye]) for eye in range(2)]
+        hmdToEyeOffset = (ovr.Vector3f * 2)(eyeRenderDesc[0].HmdToEyeOffset, eyeRenderDesc[1].HmdToEyeOffset)
+        self.hmdToEyeOffset = hmdToEyeOffset
+        layer = ovr.LayerEyeFov()
+        layer.Header.Type = ovr.LayerType_EyeFov
+        layer.Header.Flags = ovr.LayerFlag_TextureOriginAtBottomLeft # OpenGL convention
+        for eye in range(2):
+            layer.Fov[eye] = eyeRenderDesc[eye].Fov
+        self.layer = layer
+        self._acquire_eye_buffers()
+        # The scene layer, drawn by display_rift_gl(), comes first
+        self.layer_manager = LayerManager(self.rift.session, self.swap_chain_pool, hmdToEyeOffset)
+        self.layer_manager.add_layer(layer)
+
+    def _acquire_eye_buffers(self):
+        "Swap chain, depth buffer and framebuffer for both eyes side by side, at self.pixel_density"
+        texSize = [self.rift.get_fov_texture_size(eye, self.layer.Fov[eye], self.pixel_density)
+                for eye in range(2)]
+        bufferSize = ovr.Sizei(texSize[0].w + texSize[1].w, max(texSize[0].h, texSize[1].h))
+        self.buffer_size = bufferSize
+        self.target = self.swap_chain_pool.acquire(bufferSize)
+        self.textureSwapChain = self.target.chain
+        self.fbo = self.target.fbos[0]
+        layer = self.layer
+        layer.ColorTexture[0] = self.textureSwapChain # single texture for both eyes
+        layer.ColorTexture[1] = self.textureSwapChain
+        self._update_viewports()
+
+    def _update_viewports(self):
+        # The eyes sit side by side from the left edge, so that a scaled down
+        # pair is still one contiguous region for single pass stereo
+        size = self.buffer_size
+        width = max(1, int(round(size.w // 2 * self.render_scale)))
+        height = max(1, int(round(size.h * self.render_scale)))
+        for eye in range(2):
+            self.layer.Viewport[eye] = ovr.Recti(ovr.Vector2i(eye * width, 0), ovr.Sizei(width, height))
+
+    def _update_gl_poses(self):
+        displayMidpointSeconds = self.rift.get_predicted_display_time(self.frame_index)
+        # The compositor's timewarp measures latency from when the poses were sampled
+        self.layer.SensorSampleTime = ovr.getTimeInSeconds()
+        hmdState = self.pose_service.update(displayMidpointSeconds, True)
+        self.rift.calc_eye_poses(hmdState.HeadPose.ThePose, self.hmdToEyeOffset, self.layer.RenderPose)
+        return self.layer, self.target.current_fbo()
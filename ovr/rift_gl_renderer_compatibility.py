@@ -1,5 +1,6 @@
 #!/bin/env python
 
+from __future__ import absolute_import
 
 import math
 import ctypes
@@ -9,7 +10,9 @@ from OpenGL.GL import *
 
 
 from ovr.rift import Rift
+from ovr.pose_service import PoseService
 import ovr
+import ovr.math
 
 
 class RiftGLRendererCompatibility(list):
@@ -24,6 +27,8 @@ class RiftGLRendererCompatibility(list):
         self.rift = Rift()
         Rift.initialize()
         self.rift.init() # TODO: Yuck initialize() init()
+        # Other threads read poses from here, instead of calling getTrackingState themselves
+        self.pose_service = PoseService(self.rift.session)
         # self.rift.configure_tracking()
 
     def display_gl(self):
@@ -51,6 +56,8 @@ class RiftGLRendererCompatibility(list):
                 0)
         # print format(glCheckFramebufferStatus(GL_FRAMEBUFFER), '#X'), GL_FRAMEBUFFER_COMPLETE
         glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)        
+        # View matrices for both eyes at once
+        views = ovr.math.viewMatrix(layer.RenderPose)
         for eye in range(2):
             # Set up eye viewport
             v = layer.Viewport[eye]
@@ -62,14 +69,7 @@ class RiftGLRendererCompatibility(list):
             glMultTransposeMatrixf(proj.M)
             # Get view matrix for the Rift camera
             glMatrixMode(GL_MODELVIEW)
-            glLoadIdentity()
-            p = layer.RenderPose[eye].Position
-            q = layer.RenderPose[eye].Orientation
-            pitch, yaw, roll = q.getEulerAngles()
-            glRotatef(-roll*180/math.pi, 0, 0, 1)
-            glRotatef(-yaw*180/math.pi, 0, 1, 0)
-            glRotatef(-pitch*180/math.pi, 1, 0, 0)
-            glTranslatef(-p.x, -p.y, -p.z)
+            glLoadTransposeMatrixf(views[eye])
             # Render the scene for this eye.
             for actor in self:
                 actor.display_gl()
@@ -98,13 +98,8 @@ class RiftGLRendererCompatibility(list):
 
     def submit_frame(self):
         # 2c) Call ovr_SubmitFrame, passing swap texture set(s) from the previous step within a ovrLayerEyeFov structure. Although a single layer is required to submit a frame, you can use multiple layers and layer types for advanced rendering. ovr_SubmitFrame passes layer textures to the compositor which handles distortion, timewarp, and GPU synchronization before presenting it to the headset. 
-        layers = [self.layer.Header]
-        viewScale = ovr.ViewScaleDesc()
-        viewScale.HmdSpaceToWorldScaleInMeters = 1.0
-        viewScale.HmdToEyeOffset[0] = self.hmdToEyeOffset[0]
-        viewScale.HmdToEyeOffset[1] = self.hmdToEyeOffset[1]
         self.rift.commit_texture_swap_chain(self.textureSwapChain)
-        result = self.rift.submit_frame(self.frame_index, viewScale, layers, 1)
+        result = self.prepared_frame.submit(self.frame_index)
         self.frame_index += 1
 
     def _init_rift_render_layer(self):
@@ -146,6 +141,8 @@ class RiftGLRendererCompatibility(list):
         layer.Viewport[0]      = ovr.Recti(ovr.Vector2i(0, 0),                ovr.Sizei(int(bufferSize.w / 2), bufferSize.h))
         layer.Viewport[1]      = ovr.Recti(ovr.Vector2i(int(bufferSize.w / 2), 0), ovr.Sizei(int(bufferSize.w / 2), bufferSize.h))
         self.layer = layer
+        # Layer pointers and view scale are built once, not every frame
+        self.prepared_frame = self.rift.prepare_frame([layer], hmdToEyeOffset)
 
     def _set_up_desktop_projection(self):
         # TODO: non-fixed-function pathway
@@ -165,7 +162,9 @@ class RiftGLRendererCompatibility(list):
     def _update_gl_poses(self):
         # 2a) Use ovr_GetTrackingState and ovr_CalcEyePoses to compute eye poses needed for view rendering based on frame timing information
         displayMidpointSeconds = self.rift.get_predicted_display_time(self.frame_index)
-        hmdState = self.rift.get_tracking_state(displayMidpointSeconds, True)
+        # The compositor's timewarp measures latency from when the poses were sampled
+        self.layer.SensorSampleTime = ovr.getTimeInSeconds()
+        hmdState = self.pose_service.update(displayMidpointSeconds, True)
         # print hmdState.HeadPose.ThePose
         self.rift.calc_eye_poses(hmdState.HeadPose.ThePose, 
                 self.hmdToEyeOffset, self.layer.RenderPose)
@@ -0,0 +1,1089 @@
+"""
+Simulated Oculus runtime, so the ovr API can run headless without LibOVRRT or an HMD.
+
+SimulatedRuntime implements the ovr_* entry points that the generated bindings
+call, taking the same arguments. Once installed, ovr.initialize(), ovr.create(),
+ovr.getTrackingState(), ovr.submitFrame() etc. behave like a (very
+cooperative) Rift, with head and hand poses taken from scriptable
+trajectories and frame timing driven by a configurable clock.
+
+    sim = SimulatedRuntime(clock=SimulatedClock())
+    sim.headTrajectory = yawTrajectory(amplitude=0.5, period=4.0)
+    with sim:
+        ovr.initialize(None)
+        session, luid = ovr.create()
+        ...
+
+Setting the environment variable PYOVR_BACKEND=simulated installs a default
+SimulatedRuntime the first time the runtime would otherwise be loaded.
+"""
+
+from __future__ import absolute_import
+
+import collections
+import ctypes
+import itertools
+import math
+import os
+import struct
+import threading
+import time
+
+import ovr
+from . import _library
+
+
+class WallClock(object):
+    """
+    Real time, in seconds since the clock was created, plus start.
+    speed > 1 runs the clock, and sleeps, that many times faster than real time.
+    """
+
+    def __init__(self, start=0.0, speed=1.0):
+        self._timer = getattr(time, "perf_counter", time.time)
+        self._origin = self._timer()
+        self.start = float(start)
+        self.speed = float(speed)
+
+    def now(self):
+        return self.start + (self._timer() - self._origin) * self.speed
+
+    def sleep(self, seconds):
+        if seconds > 0:
+            time.sleep(seconds / self.speed)
+
+
+class SimulatedClock(object):
+    """
+    Manually advanced time, for reproducible runs.
+    Waiting inside the runtime (frame pacing, simulated latency) advances the
+    clock instead of blocking, so simulated sessions run faster than real time.
+    """
+
+    def __init__(self, start=0.0):
+        self._time = float(start)
+        self._lock = threading.Lock()
+
+    def now(self):
+        return self._time
+
+    def sleep(self, seconds):
+        if seconds > 0:
+            self.advance(seconds)
+
+    def advance(self, seconds):
+        with self._lock:
+            self._time += seconds
+        return self._time
+
+
+def staticTrajectory(orientation=(0.0, 0.0, 0.0, 1.0), position=(0.0, 0.0, 0.0)):
+    "A pose that never moves. Trajectories map a time in seconds to (orientation xyzw, position xyz)"
+    orientation = tuple(float(v) for v in orientation)
+    position = tuple(float(v) for v in position)
+    def trajectory(t):
+        return orientation, position
+    return trajectory
+
+
+def yawTrajectory(amplitude=0.5, period=4.0, position=(0.0, 0.0, 0.0)):
+    "Head turning left and right sinusoidally, amplitude in radians"
+    position = tuple(float(v) for v in position)
+    def trajectory(t):
+        yaw = amplitude * math.sin(2.0 * math.pi * t / period)
+        return (0.0, math.sin(yaw / 2.0), 0.0, math.cos(yaw / 2.0)), position
+    return trajectory
+
+
+def _quatMultiply(a, b):
+    ax, ay, az, aw = a
+    bx, by, bz, bw = b
+    return (aw*bx + ax*bw + ay*bz - az*by,
+            aw*by - ax*bz + ay*bw + az*bx,
+            aw*bz + ax*by - ay*bx + az*bw,
+            aw*bw - ax*bx - ay*by - az*bz)
+
+
+def _quatConjugate(q):
+    return (-q[0], -q[1], -q[2], q[3])
+
+
+def _quatRotate(q, v):
+    x, y, z, _ = _quatMultiply(_quatMultiply(q, (v[0], v[1], v[2], 0.0)), _quatConjugate(q))
+    return (x, y, z)
+
+
+def _setPose(pose, orientation, position):
+    o = pose.Orientation
+    o.x, o.y, o.z, o.w = orientation
+    p = pose.Position
+    p.x, p.y, p.z = position
+
+
+def _setVector(vector, values):
+    vector.x, vector.y, vector.z = values
+
+
+def _deref(arg):
+    "The ctypes object behind a byref()/pointer() argument"
+    if arg is None:
+        return None
+    if hasattr(arg, "_obj"): # byref() result
+        return arg._obj
+    if hasattr(arg, "contents"):
+        return arg.contents
+    return arg
+
+
+def _readWav(data, channel):
+    "Sample rate, and channel's samples as floats in [-1, 1], of a PCM or float WAV file"
+    if data[:4] != b"RIFF" or data[8:12] != b"WAVE":
+        raise ValueError("Not a WAV file")
+    position = 12
+    fmt = None
+    while position + 8 <= len(data):
+        chunkId, size = struct.unpack("<4sI", data[position:position + 8])
+        body = data[position + 8:position + 8 + size]
+        if chunkId == b"fmt ":
+            fmt = struct.unpack("<HHIIHH", body[:16])
+        elif chunkId == b"data" and fmt is not None:
+            audioFormat, channels, rate, byteRate, blockAlign, bits = fmt
+            codes = {(1, 8): "B", (1, 16): "h", (1, 32): "i", (3, 32): "f"}
+            code = codes.get((audioFormat, bits))
+            if code is None or channel >= channels:
+                raise ValueError("Unsupported WAV format")
+            frames = len(body) // blockAlign
+            values = struct.unpack("<%d%s" % (frames * channels, code), body[:frames * blockAlign])
+            values = values[channel::channels]
+            if code == "B":
+                values = [(v - 128) / 128.0 for v in values]
+            elif code != "f":
+                scale = float(1 << (bits - 1))
+                values = [v / scale for v in values]
+            return rate, values
+        position += 8 + size + (size & 1)
+    raise ValueError("WAV file without audio data")
+
+
+def _polygonTest(polygon, x, z):
+    """
+    Horizontal distance from (x, z) to the nearest edge of polygon, a list of
+    (x, z) corners, with the closest point on it, that edge's inward unit
+    normal, and whether (x, z) is inside
+    """
+    count = len(polygon)
+    area = sum(polygon[i][0] * polygon[(i + 1) % count][1] - polygon[(i + 1) % count][0] * polygon[i][1]
+            for i in range(count))
+    orientation = 1.0 if area > 0 else -1.0
+    best = None
+    inside = False
+    for i in range(count):
+        ax, az = polygon[i]
+        bx, bz = polygon[(i + 1) % count]
+        dx, dz = bx - ax, bz - az
+        if (az > z) != (bz > z) and x < ax + (z - az) * dx / (bz - az):
+            inside = not inside
+        length2 = dx * dx + dz * dz
+        t = 0.0 if length2 == 0 else max(0.0, min(1.0, ((x - ax) * dx + (z - az) * dz) / length2))
+        cx, cz = ax + t * dx, az + t * dz
+        distance = math.hypot(x - cx, z - cz)
+        if best is None or distance < best[0]:
+            length = math.sqrt(length2) or 1.0
+            best = (distance, (cx, cz), (-dz * orientation / length, dx * orientation / length))
+    return best + (inside,)
+
+
+def _elements(arg, ctype):
+    "Index the C array that arg points to, like the runtime would"
+    return ctypes.cast(ctypes.addressof(_deref(arg)), ctypes.POINTER(ctype))
+
+
+def _copyInto(destination, source):
+    ctypes.memmove(ctypes.addressof(destination), ctypes.addressof(source), ctypes.sizeof(source))
+
+
+def _address(pointer):
+    "Identity of an opaque handle such as a session or swap chain"
+    return ctypes.cast(pointer, ctypes.c_void_p).value if pointer else None
+
+
+_TRUE = b"\x01"
+_FALSE = b"\x00"
+
+
+def _isTrue(value):
+    "ovrBool arguments arrive as c_char objects, bytes or plain python values"
+    value = getattr(value, "value", value)
+    return bool(value) and value != _FALSE
+
+
+class _SwapChain(object):
+
+    def __init__(self, desc, textureIds):
+        self.desc = desc
+        self.textureIds = textureIds
+        self.currentIndex = 0
+        self.committed = False
+        self.handle = ovr.TextureSwapChainData()
+
+
+SubmittedFrame = collections.namedtuple("SubmittedFrame",
+        ["frameIndex", "submitTime", "displayTime", "layerTypes"])
+
+
+class SimulatedRuntime(object):
+    """
+    In-process stand-in for LibOVRRT.
+
+    Scriptable attributes, which may be changed at any time:
+      headTrajectory, handTrajectories[2] -- callables t -> (orientation, position)
+      trackingLatency -- seconds spent inside each getTrackingState call
+      submitLatency -- extra seconds spent inside each submitFrame call
+      paceFrames -- if True, submitFrame blocks to hold the app to the refresh rate
+      gpuTime -- simulated GPU cost of each frame, in seconds
+      compositorLatency, aswActive, adaptiveGpuPerformanceScale -- reported in PerfStats
+      displayLost, shouldRecenter, shouldQuit -- reported in SessionStatus
+      input -- ovr.InputState template returned by getInputState
+      boundary -- dict of Boundary_PlayArea and Boundary_Outer to lists of (x, z) floor
+        corners, clockwise seen from above, relative to the calibrated origin; None if unset
+      inputScript -- optional callable(t, inputState), to animate input
+    """
+
+    SDK_VERSION = "1.16"
+    SWAP_CHAIN_LENGTH = 3
+    HAPTICS_QUEUE_SIZE = 256
+
+    def __init__(self, clock=None, refreshRate=90.0, resolution=(2160, 1200),
+            trackingLatency=0.0, submitLatency=0.0, paceFrames=True, gpuTime=0.005,
+            createTexture=None):
+        if ovr._bindings is None:
+            ovr.selectSdkVersion(self.SDK_VERSION)
+        self.clock = WallClock() if clock is None else clock
+        self.refreshRate = float(refreshRate)
+        self.resolution = resolution
+        self.trackingLatency = trackingLatency
+        self.submitLatency = submitLatency
+        self.paceFrames = paceFrames
+        self.gpuTime = gpuTime
+        self.compositorLatency = 0.002
+        self.aswActive = False
+        self.adaptiveGpuPerformanceScale = None # None computes it from gpuTime
+        self.displayLost = False
+        self.shouldRecenter = False
+        self.shouldQuit = False
+        self.interpupillaryDistance = 0.064
+        self.boundary = {
+                ovr.Boundary_PlayArea: [(-1.0, -0.75), (1.0, -0.75), (1.0, 0.75), (-1.0, 0.75)],
+                ovr.Boundary_Outer: [(-1.5, -1.25), (1.5, -1.25), (1.5, 1.25), (-1.5, 1.25)]}
+        self.headTrajectory = staticTrajectory()
+        self.handTrajectories = [
+                staticTrajectory(position=(-0.2, -0.3, -0.3)),
+                staticTrajectory(position=(0.2, -0.3, -0.3))]
+        self.input = ovr.InputState()
+        self.inputScript = None
+        self.connectedControllers = ovr.ControllerType_Touch | ovr.ControllerType_Remote
+        # GL texture names handed out for swap chains; createTexture(desc) can make real ones
+        self.createTexture = createTexture
+        self._textureIds = itertools.count(1)
+        self.submittedFrames = collections.deque(maxlen=1000)
+        self.hapticsPlayed = collections.defaultdict(bytearray)
+        self.vibration = {}
+        self.callCounts = collections.Counter()
+        self._lock = threading.RLock()
+        self._initialized = False
+        self._sessions = {}
+        self._swapChains = {}
+        self._mirrorTextures = {}
+        self._properties = {b"VsyncToNextVsync": 1.0 / self.refreshRate}
+        self._lastError = (ovr.Success, b"")
+        self._origin = ((0.0, 0.0, 0.0, 1.0), (0.0, 0.0, 0.0))
+        self._trackingOriginType = ovr.TrackingOrigin_EyeLevel
+        self._haptics = {}
+        self.nativeAllocations = {} # address -> buffer, for audio and haptics clips not yet released
+        self._resetFrameTiming()
+
+    def __enter__(self):
+        self.install()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.uninstall()
+
+    def __getattr__(self, name):
+        if name.startswith("ovr"):
+            raise AttributeError("%s is not implemented by the simulated runtime" % name)
+        raise AttributeError(name)
+
+    def install(self):
+        "Route the ovr bindings to this runtime"
+        _library.setBackend(self)
+
+    def uninstall(self):
+        "Route the ovr bindings back to LibOVRRT"
+        if _library._backend is self:
+            _library.setBackend(None)
+
+    @property
+    def framePeriod(self):
+        return 1.0 / self.refreshRate
+
+    # Helpers
+
+    def _count(self, name):
+        self.callCounts[name] += 1
+
+    def _fail(self, result, message):
+        self._lastError = (result, message.encode("utf-8"))
+        return result
+
+    def _checkSession(self, session):
+        address = _address(session)
+        if address not in self._sessions:
+            return self._fail(ovr.Error_InvalidSession, "Invalid ovrSession")
+        return ovr.Success
+
+    def _resetFrameTiming(self):
+        self._startTime = self.clock.now()
+        self._lastFrameIndex = 0
+        self._lastVsync = None
+        self._lastSubmitReturn = None
+        self._latencyMarkerTime = None
+        self._pendingFrameStats = []
+        self._appDroppedFrames = 0
+        self._aswToggles = 0
+        self._aswPresented = 0
+        self._aswWasActive = False
+
+    def _vsyncTime(self, vsync):
+        return self._startTime + vsync * self.framePeriod
+
+    def _poseAt(self, trajectory, t):
+        "Trajectory pose, expressed relative to the current tracking origin"
+        orientation, position = trajectory(t)
+        originOrientation, originPosition = self._origin
+        inverse = _quatConjugate(originOrientation)
+        offset = tuple(p - o for p, o in zip(position, originPosition))
+        return _quatMultiply(inverse, orientation), _quatRotate(inverse, offset)
+
+    def _fillPoseState(self, poseState, trajectory, t):
+        h = 1e-3 # finite difference step, seconds
+        orientation, position = self._poseAt(trajectory, t)
+        q0, p0 = self._poseAt(trajectory, t - h)
+        q1, p1 = self._poseAt(trajectory, t + h)
+        def angularVelocity(qa, qb, q):
+            # keep neighbouring samples in the same hemisphere as q
+            if sum(a*b for a, b in zip(qa, q)) < 0:
+                qa = tuple(-v for v in qa)
+            if sum(a*b for a, b in zip(qb, q)) < 0:
+                qb = tuple(-v for v in qb)
+            dq = tuple((b - a) / (2.0 * h) for a, b in zip(qa, qb))
+            w = _quatMultiply(dq, _quatConjugate(q))
+            return (2.0 * w[0], 2.0 * w[1], 2.0 * w[2])
+        qm, _ = self._poseAt(trajectory, t - 2*h)
+        qp, _ = self._poseAt(trajectory, t + 2*h)
+        w = angularVelocity(q0, q1, orientation)
+        w0 = angularVelocity(qm, orientation, q0)
+        w1 = angularVelocity(orientation, qp, q1)
+        _setPose(poseState.ThePose, orientation, position)
+        _setVector(poseState.AngularVelocity, w)
+        _setVector(poseState.LinearVelocity,
+                [(b - a) / (2.0 * h) for a, b in zip(p0, p1)])
+        _setVector(poseState.AngularAcceleration,
+                [(b - a) / (2.0 * h) for a, b in zip(w0, w1)])
+        _setVector(poseState.LinearAcceleration,
+                [(a - 2.0*c + b) / (h * h) for a, b, c in zip(p0, p1, position)])
+        poseState.TimeInSeconds = t
+
+    def _eyePoses(self, headOrientation, headPosition, hmdToEyeOffset, outEyePoses):
+        for eye in range(2):
+            offset = (hmdToEyeOffset[eye].x, hmdToEyeOffset[eye].y, hmdToEyeOffset[eye].z)
+            rotated = _quatRotate(headOrientation, offset)
+            eyePosition = tuple(p + r for p, r in zip(headPosition, rotated))
+            _setPose(outEyePoses[eye], headOrientation, eyePosition)
+
+    def _updateHaptics(self, controllerType):
+        "Play queued haptics samples up to the current time"
+        state = self._haptics.get(controllerType)
+        now = self.clock.now()
+        if state is None:
+            state = self._haptics[controllerType] = [bytearray(), now]
+            return state
+        queue, lastUpdate = state
+        played = int((now - lastUpdate) * self.hapticsDesc().SampleRateHz)
+        if played > 0:
+            self.hapticsPlayed[controllerType] += queue[:played]
+            del queue[:played]
+            state[1] = lastUpdate + played / float(self.hapticsDesc().SampleRateHz)
+        if not queue:
+            state[1] = now
+        return state
+
+    def hmdDesc(self):
+        desc = ovr.HmdDesc()
+        desc.Type = ovr.Hmd_CV1
+        desc.ProductName = b"Oculus Rift (simulated)"
+        desc.Manufacturer = b"pyovr"
+        desc.AvailableTrackingCaps = (ovr.TrackingCap_Orientation
+                | ovr.TrackingCap_MagYawCorrection | ovr.TrackingCap_Position)
+        desc.DefaultTrackingCaps = desc.AvailableTrackingCaps
+        for eye, (inner, outer) in enumerate([(1.0927, 1.0586), (1.0927, 1.0586)]):
+            left, right = (outer, inner) if eye == ovr.Eye_Left else (inner, outer)
+            desc.DefaultEyeFov[eye] = ovr.FovPort(1.3316, 1.3316, left, right)
+            desc.MaxEyeFov[eye] = ovr.FovPort(1.3316, 1.3316, left * 1.1, right * 1.1)
+        desc.Resolution = ovr.Sizei(*self.resolution)
+        desc.DisplayRefreshRate = self.refreshRate
+        return desc
+
+    def hapticsDesc(self):
+        desc = ovr.TouchHapticsDesc()
+        desc.SampleRateHz = 320
+        desc.SampleSizeInBytes = 1
+        desc.QueueMinSizeToAvoidStarvation = 4
+        desc.SubmitMinSamples = 1
+        desc.SubmitMaxSamples = self.HAPTICS_QUEUE_SIZE
+        desc.SubmitOptimalSamples = 20
+        return desc
+
+    # LibOVRRT entry points
+
+    def ovr_Initialize(self, params):
+        with self._lock:
+            self._count("ovr_Initialize")
+            self._initialized = True
+            return ovr.Success
+
+    def ovr_Shutdown(self):
+        with self._lock:
+            self._count("ovr_Shutdown")
+            self._initialized = False
+
+    def ovr_GetLastErrorInfo(self, errorInfo):
+        errorInfo = _deref(errorInfo)
+        errorInfo.Result, errorInfo.ErrorString = self._lastError
+
+    def ovr_GetVersionString(self):
+        return ("%s.0 (simulated)" % self.SDK_VERSION).encode("utf-8")
+
+    def ovr_TraceMessage(self, level, message):
+        return 0
+
+    def ovr_IdentifyClient(self, identity):
+        return ovr.Success
+
+    def ovr_Detect(self, timeoutMilliseconds):
+        result = ovr.DetectResult()
+        result.IsOculusServiceRunning = _TRUE
+        result.IsOculusHMDConnected = _TRUE
+        return result
+
+    def ovr_Create(self, pSession, pLuid):
+        with self._lock:
+            self._count("ovr_Create")
+            if not self._initialized:
+                return self._fail(ovr.Error_NotInitialized, "ovr_Initialize has not been called")
+            hmd = ovr.HmdStruct()
+            sessionPointer = _deref(pSession)
+            ctypes.pointer(sessionPointer)[0] = ctypes.pointer(hmd)
+            self._sessions[ctypes.addressof(hmd)] = hmd
+            self.displayLost = False
+            self._resetFrameTiming()
+            return ovr.Success
+
+    def ovr_Destroy(self, session):
+        with self._lock:
+            self._count("ovr_Destroy")
+            self._sessions.pop(_address(session), None)
+
+    def ovr_GetHmdDesc(self, session):
+        return self.hmdDesc()
+
+    def ovr_GetSessionStatus(self, session, sessionStatus):
+        with self._lock:
+            result = self._checkSession(session)
+            if ovr.FAILURE(result):
+                return result
+            status = _deref(sessionStatus)
+            status.IsVisible = _TRUE
+            status.HmdPresent = _TRUE
+            status.HmdMounted = _TRUE
+            status.DisplayLost = _TRUE if self.displayLost else _FALSE
+            status.ShouldQuit = _TRUE if self.shouldQuit else _FALSE
+            status.ShouldRecenter = _TRUE if self.shouldRecenter else _FALSE
+            return ovr.Success
+
+    def ovr_GetTrackerCount(self, session):
+        return 0
+
+    def ovr_SetTrackingOriginType(self, session, origin):
+        self._trackingOriginType = origin
+        return ovr.Success
+
+    def ovr_GetTrackingOriginType(self, session):
+        return self._trackingOriginType
+
+    def ovr_RecenterTrackingOrigin(self, session):
+        with self._lock:
+            orientation, position = self.headTrajectory(self.clock.now())
+            # Keep only the yaw of the current head orientation
+            forward = _quatRotate(orientation, (0.0, 0.0, -1.0))
+            yaw = math.atan2(-forward[0], -forward[2])
+            self._origin = ((0.0, math.sin(yaw / 2.0), 0.0, math.cos(yaw / 2.0)), position)
+            self.shouldRecenter = False
+            return ovr.Success
+
+    def ovr_SpecifyTrackingOrigin(self, session, originPose):
+        with self._lock:
+            o, p = originPose.Orientation, originPose.Position
+            self._origin = ((o.x, o.y, o.z, o.w), (p.x, p.y, p.z))
+            self.shouldRecenter = False
+            return ovr.Success
+
+    def ovr_ClearShouldRecenterFlag(self, session):
+        self.shouldRecenter = False
+
+    def _fillTrackingState(self, state, t):
+        "Tracked poses at time t. Subclasses override this to take poses from elsewhere."
+        self._fillPoseState(state.HeadPose, self.headTrajectory, t)
+        tracked = ovr.Status_OrientationTracked | ovr.Status_PositionTracked
+        state.StatusFlags = tracked
+        for hand in range(2):
+            self._fillPoseState(state.HandPoses[hand], self.handTrajectories[hand], t)
+            state.HandStatusFlags[hand] = tracked
+        originOrientation, originPosition = self._origin
+        inverse = _quatConjugate(originOrientation)
+        _setPose(state.CalibratedOrigin, inverse,
+                _quatRotate(inverse, tuple(-v for v in originPosition)))
+
+    def _fillInputState(self, inputState, controllerType, t):
+        "Controller state at time t. Subclasses override this to take input from elsewhere."
+        _copyInto(inputState, self.input)
+        inputState.TimeInSeconds = t
+        inputState.ControllerType = controllerType & self.connectedControllers
+        if self.inputScript is not None:
+            self.inputScript(t, inputState)
+
+    def ovr_GetTrackingState(self, session, absTime, latencyMarker):
+        with self._lock:
+            self._count("ovr_GetTrackingState")
+            self.clock.sleep(self.trackingLatency)
+            now = self.clock.now()
+            if _isTrue(latencyMarker):
+                self._latencyMarkerTime = now
+            state = ovr.TrackingState()
+            self._fillTrackingState(state, absTime if absTime > 0 else now)
+            return state
+
+    def ovr_GetDevicePoses(self, session, deviceTypes, deviceCount, absTime, outDevicePoses):
+        with self._lock:
+            self._count("ovr_GetDevicePoses")
+            result = self._checkSession(session)
+            if ovr.FAILURE(result):
+                return result
+            self.clock.sleep(self.trackingLatency)
+            state = ovr.TrackingState()
+            self._fillTrackingState(state, absTime if absTime > 0 else self.clock.now())
+            types = _elements(deviceTypes, ctypes.c_int)
+            poses = _elements(outDevicePoses, ovr.PoseStatef)
+            for i in range(deviceCount):
+                deviceType = types[i]
+                if deviceType == ovr.TrackedDevice_HMD:
+                    poses[i] = state.HeadPose
+                elif deviceType == ovr.TrackedDevice_LTouch:
+                    poses[i] = state.HandPoses[ovr.Hand_Left]
+                elif deviceType == ovr.TrackedDevice_RTouch:
+                    poses[i] = state.HandPoses[ovr.Hand_Right]
+                else:
+                    poses[i] = ovr.PoseStatef()
+            return ovr.Success
+
+    def _toTracking(self, x, y, z):
+        "A point of the calibrated origin's frame, in tracking space"
+        orientation, position = self._origin
+        return _quatRotate(_quatConjugate(orientation), (x - position[0], y - position[1], z - position[2]))
+
+    def _boundaryPolygon(self, boundaryType):
+        if not self.boundary:
+            return None
+        return self.boundary.get(boundaryType)
+
+    def ovr_GetBoundaryGeometry(self, session, boundaryType, outFloorPoints, outFloorPointsCount):
+        with self._lock:
+            self._count("ovr_GetBoundaryGeometry")
+            polygon = self._boundaryPolygon(boundaryType)
+            count = _deref(outFloorPointsCount)
+            if polygon is None:
+                count.value = 0
+                return ovr.Success_BoundaryInvalid
+            count.value = len(polygon)
+            if outFloorPoints:
+                points = _elements(outFloorPoints, ovr.Vector3f)
+                for i, (x, z) in enumerate(polygon):
+                    _setVector(points[i], self._toTracking(x, 0.0, z))
+            return ovr.Success
+
+    def ovr_GetBoundaryDimensions(self, session, boundaryType, outDimensions):
+        with self._lock:
+            polygon = self._boundaryPolygon(boundaryType)
+            dimensions = _deref(outDimensions)
+            if polygon is None:
+                _setVector(dimensions, (0.0, 0.0, 0.0))
+                return ovr.Success_BoundaryInvalid
+            xs, zs = [x for x, z in polygon], [z for x, z in polygon]
+            _setVector(dimensions, (max(xs) - min(xs), 0.0, max(zs) - min(zs)))
+            return ovr.Success
+
+    def ovr_TestBoundaryPoint(self, session, point, singleBoundaryType, outTestResult):
+        with self._lock:
+            self._count("ovr_TestBoundaryPoint")
+            polygon = self._boundaryPolygon(singleBoundaryType)
+            result = _deref(outTestResult)
+            if polygon is None:
+                return ovr.Success_BoundaryInvalid
+            p = _deref(point)
+            orientation, position = self._origin
+            x, y, z = _quatRotate(orientation, (p.x, p.y, p.z))
+            x, y, z = x + position[0], y + position[1], z + position[2]
+            distance, closest, normal, inside = _polygonTest(polygon, x, z)
+            result.IsTriggering = _FALSE if inside else _TRUE
+            result.ClosestDistance = distance
+            _setVector(result.ClosestPoint, self._toTracking(closest[0], y, closest[1]))
+            _setVector(result.ClosestPointNormal,
+                    _quatRotate(_quatConjugate(orientation), (normal[0], 0.0, normal[1])))
+            return ovr.Success
+
+    def ovr_GetInputState(self, session, controllerType, inputState):
+        with self._lock:
+            self._count("ovr_GetInputState")
+            result = self._checkSession(session)
+            if ovr.FAILURE(result):
+                return result
+            self._fillInputState(_deref(inputState), controllerType, self.clock.now())
+            return ovr.Success
+
+    def ovr_GetConnectedControllerTypes(self, session):
+        return self.connectedControllers
+
+    def ovr_GetTouchHapticsDesc(self, session, controllerType):
+        return self.hapticsDesc()
+
+    def ovr_SetControllerVibration(self, session, controllerType, frequency, amplitude):
+        with self._lock:
+            self.vibration[controllerType] = (frequency, amplitude)
+            return ovr.Success
+
+    def ovr_SubmitControllerVibration(self, session, controllerType, buffer_):
+        with self._lock:
+            self._count("ovr_SubmitControllerVibration")
+            buffer_ = _deref(buffer_)
+            queue = self._updateHaptics(controllerType)[0]
+            count = buffer_.SamplesCount
+            if count > self.HAPTICS_QUEUE_SIZE - len(queue):
+                return self._fail(ovr.Error_InvalidOperation, "Haptics queue is full")
+            if count > 0:
+                queue += ctypes.string_at(buffer_.Samples, count)
+            return ovr.Success
+
+    def ovr_GetControllerVibrationState(self, session, controllerType, outState):
+        with self._lock:
+            queue = self._updateHaptics(controllerType)[0]
+            state = _deref(outState)
+            state.SamplesQueued = len(queue)
+            state.RemainingQueueSpace = self.HAPTICS_QUEUE_SIZE - len(queue)
+            return ovr.Success
+
+    def ovr_GetFovTextureSize(self, session, eye, fov, pixelsPerDisplayPixel):
+        density = self._pixelsPerTanAngle()
+        return ovr.Sizei(
+                int(math.ceil((fov.LeftTan + fov.RightTan) * density[0] * pixelsPerDisplayPixel)),
+                int(math.ceil((fov.UpTan + fov.DownTan) * density[1] * pixelsPerDisplayPixel)))
+
+    def _pixelsPerTanAngle(self):
+        return (self.resolution[0] / 2.0 / 1.728, self.resolution[1] / 1.997)
+
+    def ovr_GetRenderDesc(self, session, eyeType, fov):
+        desc = ovr.EyeRenderDesc()
+        desc.Eye = eyeType
+        desc.Fov = fov
+        halfWidth = int(self.resolution[0] / 2)
+        desc.DistortedViewport = ovr.Recti(ovr.Vector2i(eyeType * halfWidth, 0),
+                ovr.Sizei(halfWidth, self.resolution[1]))
+        desc.PixelsPerTanAngleAtCenter = ovr.Vector2f(*self._pixelsPerTanAngle())
+        sign = -1.0 if eyeType == ovr.Eye_Left else 1.0
+        desc.HmdToEyeOffset = ovr.Vector3f(sign * self.interpupillaryDistance / 2.0, 0.0, 0.0)
+        return desc
+
+    def ovr_GetPredictedDisplayTime(self, session, frameIndex):
+        with self._lock:
+            return self._vsyncTime(self._targetVsync(frameIndex, self.clock.now()))
+
+    def _targetVsync(self, frameIndex, now):
+        "Vsync at which frame frameIndex would be displayed, if it were submitted at time now"
+        if frameIndex <= 0:
+            frameIndex = self._lastFrameIndex + 1
+        ready = now + (self.gpuTime if frameIndex > self._lastFrameIndex else 0.0)
+        vsync = int(math.ceil((ready - self._startTime) / self.framePeriod))
+        if self._lastVsync is not None:
+            vsync = max(vsync, self._lastVsync + frameIndex - self._lastFrameIndex)
+        else:
+            # Frames before this one are still to come, one vsync each
+            vsync += max(0, frameIndex - self._lastFrameIndex - 1)
+        return max(vsync, 1)
+
+    def ovr_GetTimeInSeconds(self):
+        return self.clock.now()
+
+    def ovr_CreateTextureSwapChainGL(self, session, desc, outTextureSwapChain):
+        with self._lock:
+            self._count("ovr_CreateTextureSwapChainGL")
+            result = self._checkSession(session)
+            if ovr.FAILURE(result):
+                return result
+            descCopy = ovr.TextureSwapChainDesc()
+            _copyInto(descCopy, _deref(desc))
+            length = 1 if _isTrue(descCopy.StaticImage) else self.SWAP_CHAIN_LENGTH
+            chain = _SwapChain(descCopy, [self._newTexture(descCopy) for i in range(length)])
+            self._swapChains[ctypes.addressof(chain.handle)] = chain
+            ctypes.pointer(_deref(outTextureSwapChain))[0] = ctypes.pointer(chain.handle)
+            return ovr.Success
+
+    def _newTexture(self, desc):
+        if self.createTexture is not None:
+            return int(self.createTexture(desc))
+        return next(self._textureIds)
+
+    def _chain(self, chain):
+        return self._swapChains.get(_address(chain))
+
+    def ovr_GetTextureSwapChainLength(self, session, chain, outLength):
+        with self._lock:
+            swapChain = self._chain(chain)
+            if swapChain is None:
+                return self._fail(ovr.Error_InvalidParameter, "Unknown ovrTextureSwapChain")
+            _deref(outLength).value = len(swapChain.textureIds)
+            return ovr.Success
+
+    def ovr_GetTextureSwapChainCurrentIndex(self, session, chain, outIndex):
+        with self._lock:
+            swapChain = self._chain(chain)
+            if swapChain is None:
+                return self._fail(ovr.Error_InvalidParameter, "Unknown ovrTextureSwapChain")
+            _deref(outIndex).value = swapChain.currentIndex
+            return ovr.Success
+
+    def ovr_GetTextureSwapChainDesc(self, session, chain, outDesc):
+        with self._lock:
+            swapChain = self._chain(chain)
+            if swapChain is None:
+                return self._fail(ovr.Error_InvalidParameter, "Unknown ovrTextureSwapChain")
+            _copyInto(_deref(outDesc), swapChain.desc)
+            return ovr.Success
+
+    def ovr_GetTextureSwapChainBufferGL(self, session, chain, index, outTexId):
+        with self._lock:
+            self._count("ovr_GetTextureSwapChainBufferGL")
+            swapChain = self._chain(chain)
+            if swapChain is None:
+                return self._fail(ovr.Error_InvalidParameter, "Unknown ovrTextureSwapChain")
+            if index < 0:
+                index = swapChain.currentIndex
+            if index >= len(swapChain.textureIds):
+                return self._fail(ovr.Error_InvalidParameter, "Swap chain index out of range")
+            _deref(outTexId).value = swapChain.textureIds[index]
+            return ovr.Success
+
+    def ovr_CommitTextureSwapChain(self, session, chain):
+        with self._lock:
+            self._count("ovr_CommitTextureSwapChain")
+            if self.displayLost:
+                return self._fail(ovr.Error_DisplayLost, "Display lost")
+            swapChain = self._chain(chain)
+            if swapChain is None:
+                return self._fail(ovr.Error_InvalidParameter, "Unknown ovrTextureSwapChain")
+            swapChain.committed = True
+            swapChain.currentIndex = (swapChain.currentIndex + 1) % len(swapChain.textureIds)
+            return ovr.Success
+
+    def ovr_DestroyTextureSwapChain(self, session, chain):
+        with self._lock:
+            self._swapChains.pop(_address(chain), None)
+
+    def ovr_CreateMirrorTextureGL(self, session, desc, outMirrorTexture):
+        with self._lock:
+            result = self._checkSession(session)
+            if ovr.FAILURE(result):
+                return result
+            handle = ovr.MirrorTextureData()
+            descCopy = ovr.MirrorTextureDesc()
+            _copyInto(descCopy, _deref(desc))
+            self._mirrorTextures[ctypes.addressof(handle)] = (handle, self._newTexture(descCopy))
+            ctypes.pointer(_deref(outMirrorTexture))[0] = ctypes.pointer(handle)
+            return ovr.Success
+
+    def ovr_GetMirrorTextureBufferGL(self, session, mirrorTexture, outTexId):
+        with self._lock:
+            entry = self._mirrorTextures.get(_address(mirrorTexture))
+            if entry is None:
+                return self._fail(ovr.Error_InvalidParameter, "Unknown ovrMirrorTexture")
+            _deref(outTexId).value = entry[1]
+            return ovr.Success
+
+    def ovr_DestroyMirrorTexture(self, session, mirrorTexture):
+        with self._lock:
+            self._mirrorTextures.pop(_address(mirrorTexture), None)
+
+    def ovr_SubmitFrame(self, session, frameIndex, viewScaleDesc, layerPtrList, layerCount):
+        with self._lock:
+            self._count("ovr_SubmitFrame")
+            result = self._checkSession(session)
+            if ovr.FAILURE(result):
+                return result
+            if self.displayLost:
+                return self._fail(ovr.Error_DisplayLost, "Display lost")
+            layers = _elements(layerPtrList, ctypes.POINTER(ovr.LayerHeader))
+            layerTypes = []
+            sensorSampleTime = self._latencyMarkerTime
+            for i in range(layerCount):
+                if not layers[i]:
+                    continue
+                header = layers[i].contents
+                layerTypes.append(header.Type)
+                if header.Type == ovr.LayerType_EyeFov:
+                    layer = ctypes.cast(layers[i], ctypes.POINTER(ovr.LayerEyeFov)).contents
+                    chains = [layer.ColorTexture[0]]
+                    if layer.SensorSampleTime > 0:
+                        sensorSampleTime = layer.SensorSampleTime
+                elif header.Type == ovr.LayerType_EyeMatrix:
+                    layer = ctypes.cast(layers[i], ctypes.POINTER(ovr.LayerEyeMatrix)).contents
+                    chains = [layer.ColorTexture[0]]
+                elif header.Type == ovr.LayerType_Quad:
+                    layer = ctypes.cast(layers[i], ctypes.POINTER(ovr.LayerQuad)).contents
+                    chains = [layer.ColorTexture]
+                else:
+                    chains = []
+                for chain in chains:
+                    swapChain = self._chain(chain)
+                    if swapChain is None or not swapChain.committed:
+                        return self._fail(ovr.Error_TextureSwapChainInvalid,
+                                "Layer %d has no committed texture swap chain" % i)
+            if frameIndex <= 0:
+                frameIndex = self._lastFrameIndex + 1
+            self.clock.sleep(self.submitLatency)
+            submitTime = self.clock.now()
+            vsync = self._targetVsync(frameIndex, submitTime)
+            if self._lastVsync is not None and vsync > self._lastVsync + 1:
+                self._appDroppedFrames += vsync - self._lastVsync - 1
+            displayTime = self._vsyncTime(vsync)
+            self._recordFrameStats(frameIndex, vsync, submitTime, displayTime, sensorSampleTime)
+            self._lastVsync = vsync
+            self._lastFrameIndex = frameIndex
+            self.submittedFrames.append(SubmittedFrame(frameIndex, submitTime, displayTime, layerTypes))
+            if self.paceFrames:
+                # Room in the queue opens up once the previous vsync has passed
+                self.clock.sleep(self._vsyncTime(vsync - 1) - self.clock.now())
+            self._lastSubmitReturn = self.clock.now()
+            return ovr.Success
+
+    def _recordFrameStats(self, frameIndex, vsync, submitTime, displayTime, sensorSampleTime):
+        stats = ovr.PerfStatsPerCompositorFrame()
+        stats.HmdVsyncIndex = vsync
+        stats.AppFrameIndex = frameIndex
+        stats.AppDroppedFrameCount = self._appDroppedFrames
+        if sensorSampleTime is not None:
+            stats.AppMotionToPhotonLatency = displayTime - sensorSampleTime
+        stats.AppQueueAheadTime = max(0.0, displayTime - self.framePeriod - submitTime - self.gpuTime)
+        if self._lastSubmitReturn is not None:
+            stats.AppCpuElapsedTime = submitTime - self._lastSubmitReturn
+        stats.AppGpuElapsedTime = self.gpuTime
+        stats.CompositorFrameIndex = vsync
+        stats.CompositorLatency = self.compositorLatency
+        stats.CompositorCpuElapsedTime = 0.0005
+        stats.CompositorGpuElapsedTime = 0.001
+        stats.CompositorCpuStartToGpuEndElapsedTime = 0.0015
+        stats.CompositorGpuEndToVsyncElapsedTime = max(0.0, self.framePeriod - 0.0015)
+        if self.aswActive and not self._aswWasActive:
+            self._aswToggles += 1
+        self._aswWasActive = self.aswActive
+        if self.aswActive:
+            self._aswPresented += 1
+        stats.AswIsActive = _TRUE if self.aswActive else _FALSE
+        stats.AswActivatedToggleCount = self._aswToggles
+        stats.AswPresentedFrameCount = self._aswPresented
+        self._pendingFrameStats.append(stats)
+
+    def ovr_GetPerfStats(self, session, outStats):
+        with self._lock:
+            self._count("ovr_GetPerfStats")
+            result = self._checkSession(session)
+            if ovr.FAILURE(result):
+                return result
+            out = _deref(outStats)
+            ctypes.memset(ctypes.addressof(out), 0, ctypes.sizeof(out))
+            pending = self._pendingFrameStats
+            recent = pending[-ovr.MaxProvidedFrameStats:]
+            for i, stats in enumerate(reversed(recent)): # most recent first
+                out.FrameStats[i] = stats
+            out.FrameStatsCount = len(recent)
+            out.AnyFrameStatsDropped = _TRUE if len(pending) > len(recent) else _FALSE
+            scale = self.adaptiveGpuPerformanceScale
+            if scale is None:
+                scale = 0.9 * self.framePeriod / max(self.gpuTime, 1e-6)
+            out.AdaptiveGpuPerformanceScale = scale
+            out.AswIsAvailable = _TRUE
+            out.VisibleProcessId = os.getpid()
+            self._pendingFrameStats = []
+            return ovr.Success
+
+    def ovr_ResetPerfStats(self, session):
+        with self._lock:
+            self._pendingFrameStats = []
+            self._appDroppedFrames = 0
+            self._aswToggles = 0
+            self._aswPresented = 0
+            return ovr.Success
+
+    def ovr_GetBool(self, session, propertyName, defaultVal):
+        return self._properties.get(propertyName, defaultVal)
+
+    def ovr_SetBool(self, session, propertyName, value):
+        self._properties[propertyName] = value
+        return _TRUE
+
+    def ovr_GetInt(self, session, propertyName, defaultVal):
+        return int(self._properties.get(propertyName, defaultVal))
+
+    def ovr_SetInt(self, session, propertyName, value):
+        self._properties[propertyName] = int(value)
+        return _TRUE
+
+    def ovr_GetFloat(self, session, propertyName, defaultVal):
+        return float(self._properties.get(propertyName, defaultVal))
+
+    def ovr_SetFloat(self, session, propertyName, value):
+        self._properties[propertyName] = float(value)
+        return _TRUE
+
+    def ovr_GetString(self, session, propertyName, defaultVal):
+        return self._properties.get(propertyName, defaultVal)
+
+    def ovr_SetString(self, session, propertyName, value):
+        self._properties[propertyName] = value
+        return _TRUE
+
+    def ovrMatrix4f_Projection(self, fov, znear, zfar, projectionModFlags):
+        "Same math as the SDK's OVR_CAPI_Util.cpp"
+        leftHanded = bool(projectionModFlags & ovr.Projection_LeftHanded)
+        flipZ = bool(projectionModFlags & ovr.Projection_FarLessThanNear)
+        farAtInfinity = bool(projectionModFlags & ovr.Projection_FarClipAtInfinity) and flipZ
+        isOpenGL = bool(projectionModFlags & ovr.Projection_ClipRangeOpenGL)
+        xScale = 2.0 / (fov.LeftTan + fov.RightTan)
+        xOffset = (fov.LeftTan - fov.RightTan) * xScale * 0.5
+        yScale = 2.0 / (fov.UpTan + fov.DownTan)
+        yOffset = (fov.UpTan - fov.DownTan) * yScale * 0.5
+        handedness = 1.0 if leftHanded else -1.0
+        result = ovr.Matrix4f()
+        m = result.M
+        m[0][0] = xScale
+        m[0][2] = handedness * xOffset
+        m[1][1] = yScale
+        m[1][2] = handedness * -yOffset
+        if farAtInfinity:
+            if isOpenGL:
+                m[2][2] = -handedness
+                m[2][3] = 2.0 * znear
+            else:
+                m[2][2] = 0.0
+                m[2][3] = znear
+        else:
+            far = -zfar if flipZ else zfar
+            if isOpenGL:
+                m[2][2] = -handedness * (-1.0 if flipZ else 1.0) * (znear + zfar) / (znear - zfar)
+                m[2][3] = 2.0 * (far * znear) / (znear - zfar)
+            else:
+                m[2][2] = -handedness * (-znear if flipZ else zfar) / (znear - zfar)
+                m[2][3] = (far * znear) / (znear - zfar)
+        m[3][2] = handedness
+        return result
+
+    def ovrTimewarpProjectionDesc_FromProjection(self, projection, projectionModFlags):
+        desc = ovr.TimewarpProjectionDesc()
+        desc.Projection22 = projection.M[2][2]
+        desc.Projection23 = projection.M[2][3]
+        desc.Projection32 = projection.M[3][2]
+        if projectionModFlags & ovr.Projection_ClipRangeOpenGL:
+            # Convert to D3D style clip range
+            desc.Projection22 = (projection.M[2][2] - 1.0) / 2.0
+            desc.Projection23 = projection.M[2][3] / 2.0
+        return desc
+
+    def ovr_CalcEyePoses(self, headPose, hmdToEyeOffset, outEyePoses):
+        o, p = headPose.Orientation, headPose.Position
+        self._eyePoses((o.x, o.y, o.z, o.w), (p.x, p.y, p.z), hmdToEyeOffset, outEyePoses)
+
+    def ovr_GetEyePoses(self, session, frameIndex, latencyMarker, hmdToEyeOffset, outEyePoses, outSensorSampleTime):
+        with self._lock:
+            self._count("ovr_GetEyePoses")
+            displayTime = self.ovr_GetPredictedDisplayTime(session, frameIndex)
+            state = self.ovr_GetTrackingState(session, displayTime, latencyMarker)
+            o, p = state.HeadPose.ThePose.Orientation, state.HeadPose.ThePose.Position
+            self._eyePoses((o.x, o.y, o.z, o.w), (p.x, p.y, p.z), hmdToEyeOffset, outEyePoses)
+            sampleTime = _deref(outSensorSampleTime)
+            if sampleTime is not None:
+                sampleTime.value = self.clock.now()
+
+    def ovrPosef_FlipHandedness(self, inPose, outPose):
+        source, target = _deref(inPose), _deref(outPose)
+        o, p = source.Orientation, source.Position
+        _setPose(target, (-o.x, o.y, o.z, -o.w), (-p.x, p.y, p.z))
+
+    def _allocate(self, ctype, values):
+        buffer_ = (ctype * len(values))(*values)
+        self.nativeAllocations[ctypes.addressof(buffer_)] = buffer_
+        return buffer_
+
+    def ovr_ReadWavFromBuffer(self, outAudioChannel, inputData, dataSizeInBytes, stereoChannelToUse):
+        with self._lock:
+            self._count("ovr_ReadWavFromBuffer")
+            address = inputData.value if hasattr(inputData, "value") else inputData
+            data = address if isinstance(address, bytes) else ctypes.string_at(address, dataSizeInBytes)
+            try:
+                rate, samples = _readWav(data[:dataSizeInBytes], stereoChannelToUse)
+            except ValueError as e:
+                return self._fail(ovr.Error_InvalidParameter, str(e))
+            out = _deref(outAudioChannel)
+            buffer_ = self._allocate(ctypes.c_float, samples)
+            out.Samples = ctypes.cast(buffer_, ctypes.POINTER(ctypes.c_float))
+            out.SamplesCount = len(samples)
+            out.Frequency = rate
+            return ovr.Success
+
+    def ovr_GenHapticsFromAudioData(self, outHapticsClip, audioChannel, genMode):
+        with self._lock:
+            self._count("ovr_GenHapticsFromAudioData")
+            audio = _deref(audioChannel)
+            if genMode != ovr.HapticsGenMode_PointSample or audio.Frequency <= 0:
+                return self._fail(ovr.Error_InvalidParameter, "Unsupported haptics generation")
+            rate = self.hapticsDesc().SampleRateHz
+            count = int(audio.SamplesCount * rate // audio.Frequency)
+            values = [int(round(min(1.0, abs(audio.Samples[i * audio.Frequency // rate])) * 255))
+                    for i in range(count)]
+            buffer_ = self._allocate(ctypes.c_ubyte, values)
+            out = _deref(outHapticsClip)
+            out.Samples = ctypes.cast(buffer_, ctypes.c_void_p)
+            out.SamplesCount = count
+            return ovr.Success
+
+    def ovr_ReleaseAudioChannelData(self, audioChannel):
+        with self._lock:
+            audio = _deref(audioChannel)
+            if audio.Samples:
+                self.nativeAllocations.pop(ctypes.addressof(audio.Samples.contents), None)
+            audio.Samples = None
+            audio.SamplesCount = 0
+
+    def ovr_ReleaseHapticsClip(self, hapticsClip):
+        with self._lock:
+            clip = _deref(hapticsClip)
+            if clip.Samples:
+                self.nativeAllocations.pop(clip.Samples, None)
+            clip.Samples = None
+            clip.SamplesCount = 0
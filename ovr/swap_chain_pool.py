@@ -0,0 +1,203 @@
+"""
+Reusable texture swap chains, with their depth buffers and framebuffers.
+
+Changing the eye buffer resolution, or recovering from a lost display, used to
+mean destroying every swap chain, depth buffer and framebuffer object and
+creating them again. A SwapChainPool hands out SwapChainTargets keyed by
+(width, height, format, sample count, mip levels); a released target is kept
+and handed out again for the same key, so toggling between a few resolutions
+creates nothing after the first round.
+
+A target also caches the swap chain length and the GL texture name of every
+index, and keeps one framebuffer object per index with that texture already
+attached. Each framebuffer is checked for completeness once, when it is set
+up, so the frame loop only binds the framebuffer of the current index.
+"""
+
+import ctypes
+
+from OpenGL.GL import *
+
+import ovr
+
+
+class SwapChainTarget(object):
+    """
+    A texture swap chain, plus a depth renderbuffer of the same size and one
+    complete framebuffer object per swap chain index.
+    """
+
+    def __init__(self, pool, key):
+        self.pool = pool
+        self.key = key
+        self.width, self.height, self.format, self.sampleCount, self.mipLevels = key
+        self.chain = None
+        self.length = 0
+        self.textureIds = []
+        self.depthBuffer = None
+        self.fbos = []
+        self._index = ctypes.c_int()
+        self._indexRef = ctypes.byref(self._index)
+
+    @property
+    def size(self):
+        return ovr.Sizei(self.width, self.height)
+
+    def current_index(self):
+        "Index of the texture to render into next"
+        getCurrentIndex = ovr.libovr.native("ovr_GetTextureSwapChainCurrentIndex")
+        result = getCurrentIndex(self.pool.session, self.chain, self._indexRef)
+        if result < 0: # OVR_FAILURE
+            ovr.checkResult(result, "getTextureSwapChainCurrentIndex")
+        return self._index.value
+
+    def current_texture_id(self):
+        "GL texture name of the texture to render into next"
+        return self.textureIds[self.current_index()]
+
+    def current_fbo(self):
+        "Framebuffer object rendering into the texture of the current index"
+        return self.fbos[self.current_index()]
+
+    def commit(self):
+        ovr.commitTextureSwapChain(self.pool.session, self.chain)
+
+    def release(self):
+        "Return this target to its pool"
+        self.pool.release(self)
+
+
+class SwapChainPool(object):
+    """
+    Hands out SwapChainTargets, creating swap chains and GL objects only when
+    no released target of the same key is available. Needs a current GL context.
+
+    Swap chains belong to a session. Before destroying the session, call
+    destroy_swap_chains(); after creating a new one, call set_session(). The
+    GL objects survive both; the swap chains are recreated on demand, and the
+    framebuffers re-attached to their new textures.
+    """
+
+    def __init__(self, session, depth=True):
+        self.session = session
+        self.depth = depth
+        self.created = 0 # swap chains created
+        self.reused = 0 # acquisitions served by a released target
+        self._free = {}
+        self._inUse = []
+
+    def acquire(self, size, format_=ovr.OVR_FORMAT_R8G8B8A8_UNORM_SRGB, sampleCount=1, mipLevels=1):
+        "A target of size (a Sizei or (w, h)) and format"
+        width, height = (size.w, size.h) if hasattr(size, "w") else size
+        key = (int(width), int(height), format_, sampleCount, mipLevels)
+        free = self._free.get(key)
+        if free:
+            target = free.pop()
+            self.reused += 1
+        else:
+            target = SwapChainTarget(self, key)
+        if target.chain is None:
+            self._createSwapChain(target)
+        self._inUse.append(target)
+        return target
+
+    def release(self, target):
+        "Keep target for reuse"
+        self._inUse.remove(target)
+        self._free.setdefault(target.key, []).append(target)
+
+    def _targets(self):
+        targets = list(self._inUse)
+        for free in self._free.values():
+            targets.extend(free)
+        return targets
+
+    def _createSwapChain(self, target):
+        desc = ovr.TextureSwapChainDesc()
+        desc.Type = ovr.Texture_2D
+        desc.ArraySize = 1
+        desc.Format = target.format
+        desc.Width = target.width
+        desc.Height = target.height
+        desc.MipLevels = target.mipLevels
+        desc.SampleCount = target.sampleCount
+        desc.StaticImage = ovr.ovrFalse
+        target.chain = ovr.createTextureSwapChainGL(self.session, desc)
+        target.length = ovr.getTextureSwapChainLength(self.session, target.chain).value
+        target.textureIds = [ovr.getTextureSwapChainBufferGL(self.session, target.chain, index).value
+                for index in range(target.length)]
+        self.created += 1
+        self._attachFramebuffers(target)
+
+    def _attachFramebuffers(self, target):
+        "One framebuffer per swap chain texture, validated here and never again"
+        if self.depth and target.depthBuffer is None:
+            target.depthBuffer = glGenRenderbuffers(1)
+            glBindRenderbuffer(GL_RENDERBUFFER, target.depthBuffer)
+            if target.sampleCount > 1:
+                glRenderbufferStorageMultisample(GL_RENDERBUFFER, target.sampleCount, GL_DEPTH_COMPONENT24,
+                        target.width, target.height)
+            else:
+                glRenderbufferStorage(GL_RENDERBUFFER, GL_DEPTH_COMPONENT24, target.width, target.height)
+            glBindRenderbuffer(GL_RENDERBUFFER, 0)
+        while len(target.fbos) < target.length:
+            target.fbos.append(glGenFramebuffers(1))
+        textureTarget = GL_TEXTURE_2D_MULTISAMPLE if target.sampleCount > 1 else GL_TEXTURE_2D
+        for fbo, textureId in zip(target.fbos, target.textureIds):
+            glBindFramebuffer(GL_FRAMEBUFFER, fbo)
+            glFramebufferTexture2D(GL_FRAMEBUFFER, GL_COLOR_ATTACHMENT0, textureTarget, textureId, 0)
+            if target.depthBuffer is not None:
+                glFramebufferRenderbuffer(GL_FRAMEBUFFER, GL_DEPTH_ATTACHMENT, GL_RENDERBUFFER,
+                        target.depthBuffer)
+            status = glCheckFramebufferStatus(GL_FRAMEBUFFER)
+            if status != GL_FRAMEBUFFER_COMPLETE:
+                glBindFramebuffer(GL_FRAMEBUFFER, 0)
+                raise RuntimeError("Incomplete framebuffer for swap chain texture %d: 0x%X" % (textureId, status))
+        glBindFramebuffer(GL_FRAMEBUFFER, 0)
+
+    def destroy_swap_chains(self):
+        "Destroy every swap chain, e.g. before destroying the session; the GL objects are kept"
+        for target in self._targets():
+            if target.chain is not None:
+                ovr.destroyTextureSwapChain(self.session, target.chain)
+                target.chain = None
+                target.textureIds = []
+                target.length = 0
+
+    def set_session(self, session):
+        "Use a new session. Swap chains of the old one are forgotten, and recreated on demand."
+        if session is self.session:
+            return
+        for target in self._targets():
+            target.chain = None
+            target.textureIds = []
+            target.length = 0
+        self.session = session
+        for target in self._inUse:
+            self._createSwapChain(target)
+
+    def trim(self):
+        "Destroy all released targets"
+        free = self._free
+        self._free = {}
+        for targets in free.values():
+            for target in targets:
+                self._destroyTarget(target)
+
+    def clear(self):
+        "Destroy every target, including those in use"
+        self.trim()
+        for target in self._inUse:
+            self._destroyTarget(target)
+        self._inUse = []
+
+    def _destroyTarget(self, target):
+        if target.chain is not None:
+            ovr.destroyTextureSwapChain(self.session, target.chain)
+            target.chain = None
+        if target.fbos:
+            glDeleteFramebuffers(len(target.fbos), target.fbos)
+            target.fbos = []
+        if target.depthBuffer is not None:
+            glDeleteRenderbuffers(1, [target.depthBuffer])
+            target.depthBuffer = None
@@ -127,6 +127,22 @@ push @{$custom_methods{"Matrix4f"}}, (
 END_MATMETH
 );
 
+# NumPy views over the float structures
+my $numpy_methods = <<"END_NUMPY";
+
+    def as_numpy(self):
+        "NumPy view sharing memory with this structure"
+        return as_numpy(self)
+END_NUMPY
+
+foreach my $view_type ("Quatf", "Vector3f", "Matrix4f", "Posef") 
+{
+    # copy, so that types sharing a method list do not get the methods twice
+    my @methods = @{$custom_methods{$view_type} || []};
+    push @methods, $numpy_methods;
+    $custom_methods{$view_type} = \@methods;
+}
+
 translate_header();
 
 
@@ -142,11 +158,16 @@ Python bindings for Oculus Rift SDK version ';
 Works on Windows only at the moment (just like Oculus Rift SDK...)
 """
 
+from __future__ import absolute_import # "import math" must not find ovr.math
+
 import ctypes
 from ctypes import * #@UnusedWildImport
 import math
 import platform
 
+from ._library import LazyLibrary
+from ._numpy_views import as_numpy
+
 
 OVR_PTR_SIZE = sizeof(c_voidp) # distinguish 32 vs 64 bit python
 
@@ -161,14 +182,10 @@ if platform.system().startswith(\"Win\"):
     _libname = \"Lib\"+_libname # i.e. \"LibOVRRT32_$sdk_lib_version\"";
     print $fh <<'END_PREAMBLE';
 
-# Load library
-try:
-    libovr = CDLL(_libname)
-except:
+# Load library lazily, at the first call into the runtime
 END_PREAMBLE
-    print $fh "    print(\"Is Oculus Runtime $sdk_version2 installed on this machine?\")\n";
+    print $fh "libovr = LazyLibrary(_libname, \"Is Oculus Runtime $sdk_version2 installed on this machine?\")\n";
     print $fh <<'END_PREAMBLE';
-    raise
 
 
 ENUM_TYPE = c_int32 # Hopefully a close enough guess...
@@ -250,6 +267,9 @@ def _checkResult(ovrResult, functionName):
         msg += " And, annoyingly, getLastErrorInfo() failed too."
     raise OculusFunctionError(msg)
 
+# Public name, for code that calls libovr.native(...) functions directly
+checkResult = _checkResult
+
 END_PREAMBLE
 
     process_headers($fh);
@@ -496,12 +516,62 @@ sub process_functions {
         }
 
         # Python wrapper for function
-        $trans .= "def $py_fn_name(";
-        $trans .= join ", ", @input_args;
-        $trans .= "):\n";
+        my $signature = join ", ", @input_args;
+        # Special case for getDevicePoses, which returns one pose per requested device
+        if ($py_fn_name eq "getDevicePoses") {
+            $signature = "session, deviceTypes, deviceCount=None, absTime=0.0, outDevicePoses=None";
+        }
+        # Special case for getBoundaryGeometry, which returns every boundary point
+        if ($py_fn_name eq "getBoundaryGeometry") {
+            $signature = "session, boundaryType, outFloorPoints=None";
+        }
+        $trans .= "def $py_fn_name($signature):\n";
         # Docstring
         $trans .= translate_docstring_comment($comment);
 
+        if ($py_fn_name eq "getDevicePoses") {
+            $trans .= <<'END_POSES_HACK';
+    # deviceTypes may be any sequence of TrackedDevice_* values, or a ctypes array of them.
+    # Pass outDevicePoses, a (PoseStatef * N) array, to reuse it instead of allocating one.
+    # ovr.as_numpy(outDevicePoses) views the result as a NumPy structured array.
+    if not isinstance(deviceTypes, ctypes.Array):
+        deviceTypes = (TrackedDeviceType * len(deviceTypes))(*deviceTypes)
+    if deviceCount is None:
+        deviceCount = len(deviceTypes)
+    if deviceCount > len(deviceTypes):
+        raise ValueError("deviceCount %d exceeds the %d deviceTypes given" % (deviceCount, len(deviceTypes)))
+    if outDevicePoses is None:
+        outDevicePoses = (PoseStatef * deviceCount)()
+    elif len(outDevicePoses) < deviceCount:
+        raise ValueError("outDevicePoses holds %d poses, %d are needed" % (len(outDevicePoses), deviceCount))
+    result = libovr.ovr_GetDevicePoses(session, byref(deviceTypes), deviceCount, absTime, byref(outDevicePoses))
+    _checkResult(result, "getDevicePoses")
+    return outDevicePoses
+END_POSES_HACK
+            $by_pos->{$p} = $trans;
+            $count2 += 1;
+            next;
+        }
+
+        if ($py_fn_name eq "getBoundaryGeometry") {
+            $trans .= <<'END_BOUNDARY_HACK';
+    # The runtime is asked for the number of points first, so that outFloorPoints, a
+    # (Vector3f * N) array, can hold them all. Pass an array to reuse it when it is large enough.
+    outFloorPointsCount = c_int()
+    result = libovr.ovr_GetBoundaryGeometry(session, boundaryType, None, byref(outFloorPointsCount))
+    _checkResult(result, "getBoundaryGeometry")
+    if outFloorPoints is None or len(outFloorPoints) < outFloorPointsCount.value:
+        outFloorPoints = (Vector3f * outFloorPointsCount.value)()
+    if outFloorPointsCount.value > 0:
+        result = libovr.ovr_GetBoundaryGeometry(session, boundaryType, byref(outFloorPoints), byref(outFloorPointsCount))
+        _checkResult(result, "getBoundaryGeometry")
+    return outFloorPoints, outFloorPointsCount
+END_BOUNDARY_HACK
+            $by_pos->{$p} = $trans;
+            $count2 += 1;
+            next;
+        }
+
         # Special case for submitFrame method
         foreach my $arg (@arg_names) {
             # Only non-output POINTER(POINTER(...)) arguments.
@@ -513,7 +583,8 @@ sub process_functions {
             # print $arg, "\n";
             my $pointee_type = $1;
             # print $pointee_type, "\n";
-            $trans .= "    $arg = ($pointee_type * len($arg))(*[ctypes.pointer(i) for i in $arg])\n";
+            $trans .= "    if not isinstance($arg, ctypes.Array): # else already an array of layer pointers\n";
+            $trans .= "        $arg = ($pointee_type * len($arg))(*[ctypes.pointer(i) for i in $arg])\n";
         }
         
         # Special case for initialize method
@@ -0,0 +1,74 @@
+#!/bin/env python
+"""
+The TriangleDrawerCompatibility triangle, drawn from a vertex buffer with a
+core profile shader, for use with RiftGLRenderer.
+"""
+
+from __future__ import absolute_import
+
+import numpy
+from OpenGL.GL import *
+
+from ovr.rift_gl_renderer import CAMERA_BLOCK, compile_program
+
+
+class TriangleDrawer(object):
+
+    vertex_shader = "#version 330\n" + CAMERA_BLOCK + """
+layout(location = 0) in vec3 position;
+
+void main() {
+    gl_Position = eyeClipPosition(vec4(position, 1.0));
+}
+"""
+
+    fragment_shader = """#version 330
+uniform vec3 color;
+out vec4 fragColor;
+
+void main() {
+    fragColor = vec4(color, 1.0);
+}
+"""
+
+    def __init__(self, color=(0.3, 0.3, 0.3)):
+        size = 0.15
+        x = 0.10
+        y = 0.00
+        z = -0.5
+        self.vertices = numpy.array([
+                [x, y, z],
+                [x, y+size, z],
+                [x+size, y+size, z]], dtype=numpy.float32)
+        self.color = color
+        self.program = None
+        self.vao = None
+        self.vbo = None
+
+    def init_gl(self):
+        self.program = compile_program(self.vertex_shader, self.fragment_shader)
+        glUseProgram(self.program)
+        glUniform3f(glGetUniformLocation(self.program, "color"), *self.color)
+        glUseProgram(0)
+        self.vao = glGenVertexArrays(1)
+        glBindVertexArray(self.vao)
+        self.vbo = glGenBuffers(1)
+        glBindBuffer(GL_ARRAY_BUFFER, self.vbo)
+        glBufferData(GL_ARRAY_BUFFER, self.vertices.nbytes, self.vertices, GL_STATIC_DRAW)
+        glEnableVertexAttribArray(0)
+        glVertexAttribPointer(0, 3, GL_FLOAT, GL_FALSE, 0, None)
+        glBindVertexArray(0)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+
+    def display_gl(self, instance_count=1):
+        glUseProgram(self.program)
+        glBindVertexArray(self.vao)
+        glDrawArraysInstanced(GL_TRIANGLES, 0, len(self.vertices), instance_count)
+        glBindVertexArray(0)
+
+    def dispose_gl(self):
+        if self.vao is not None:
+            glDeleteVertexArrays(1, [self.vao])
+            glDeleteBuffers(1, [self.vbo])
+            glDeleteProgram(self.program)
+            self.vao = None
@@ -0,0 +1,67 @@
+"""
+Offscreen OpenGL for the renderer tests: a core profile context through EGL,
+without a window system, and real textures for simulated swap chains.
+"""
+
+import ctypes
+import os
+import sys
+
+# Render offscreen, through EGL without a window system, unless a platform was chosen already
+if "OpenGL" not in sys.modules:
+    os.environ.setdefault("PYOPENGL_PLATFORM", "egl")
+    os.environ.setdefault("EGL_PLATFORM", "surfaceless")
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+def createOffscreenContext():
+    "Make an OpenGL 3.3 core profile context current, without a window. Returns None if that is not possible."
+    if numpy is None or os.environ.get("PYOPENGL_PLATFORM") != "egl":
+        return None
+    try:
+        from OpenGL import EGL
+        display = EGL.eglGetDisplay(EGL.EGL_DEFAULT_DISPLAY)
+        major, minor = EGL.EGLint(), EGL.EGLint()
+        if not EGL.eglInitialize(display, ctypes.pointer(major), ctypes.pointer(minor)):
+            return None
+        attributes = (EGL.EGLint * 5)(EGL.EGL_SURFACE_TYPE, EGL.EGL_PBUFFER_BIT,
+                EGL.EGL_RENDERABLE_TYPE, EGL.EGL_OPENGL_BIT, EGL.EGL_NONE)
+        config, count = EGL.EGLConfig(), EGL.EGLint()
+        if not EGL.eglChooseConfig(display, attributes, ctypes.pointer(config), 1, ctypes.pointer(count)) \
+                or count.value == 0:
+            return None
+        EGL.eglBindAPI(EGL.EGL_OPENGL_API)
+        attributes = (EGL.EGLint * 7)(EGL.EGL_CONTEXT_MAJOR_VERSION, 3, EGL.EGL_CONTEXT_MINOR_VERSION, 3,
+                EGL.EGL_CONTEXT_OPENGL_PROFILE_MASK, EGL.EGL_CONTEXT_OPENGL_CORE_PROFILE_BIT, EGL.EGL_NONE)
+        context = EGL.eglCreateContext(display, config, EGL.EGL_NO_CONTEXT, attributes)
+        if not context or not EGL.eglMakeCurrent(display, EGL.EGL_NO_SURFACE, EGL.EGL_NO_SURFACE, context):
+            return None
+        return display, context
+    except Exception:
+        return None
+
+
+def createTexture(desc):
+    "Real GL textures for the simulated swap chains"
+    from OpenGL.GL import glGenTextures, glBindTexture, glTexImage2D, glTexImage2DMultisample, \
+        glTexParameteri, GL_TEXTURE_2D, GL_TEXTURE_2D_MULTISAMPLE, GL_SRGB8_ALPHA8, GL_RGBA, \
+        GL_UNSIGNED_BYTE, GL_TEXTURE_MIN_FILTER, GL_LINEAR, GL_TRUE
+    texture = glGenTextures(1)
+    if getattr(desc, "SampleCount", 1) > 1: # mirror textures have no SampleCount
+        glBindTexture(GL_TEXTURE_2D_MULTISAMPLE, texture)
+        glTexImage2DMultisample(GL_TEXTURE_2D_MULTISAMPLE, desc.SampleCount, GL_SRGB8_ALPHA8,
+                desc.Width, desc.Height, GL_TRUE)
+        glBindTexture(GL_TEXTURE_2D_MULTISAMPLE, 0)
+        return texture
+    glBindTexture(GL_TEXTURE_2D, texture)
+    glTexImage2D(GL_TEXTURE_2D, 0, GL_SRGB8_ALPHA8, desc.Width, desc.Height, 0, GL_RGBA, GL_UNSIGNED_BYTE, None)
+    glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, GL_LINEAR)
+    glBindTexture(GL_TEXTURE_2D, 0)
+    return texture
+
+
+context = createOffscreenContext()
@@ -0,0 +1,46 @@
+"""
+A test case base class that runs against ovr.simulation's SimulatedRuntime.
+"""
+
+import unittest
+
+import ovr
+from ovr.simulation import SimulatedRuntime, SimulatedClock
+
+
+class SimulatedSessionTestCase(unittest.TestCase):
+    """
+    setUp() installs a SimulatedRuntime, self.sim, running on a SimulatedClock,
+    self.clock, and creates a session, self.session; tearDown() destroys the
+    session and uninstalls the runtime. Override simulatedRuntime() to set
+    up the runtime before it is installed. With useRift, the session is that
+    of an initialized ovr.rift.Rift, self.rift.
+    """
+
+    useRift = False
+
+    def simulatedRuntime(self):
+        "The runtime to install"
+        return SimulatedRuntime(clock=self.clock)
+
+    def setUp(self):
+        self.clock = SimulatedClock()
+        self.sim = self.simulatedRuntime()
+        self.sim.install()
+        if self.useRift:
+            from ovr.rift import Rift
+            Rift.initialize()
+            self.rift = Rift()
+            self.rift.init()
+            self.session = self.rift.session
+        else:
+            ovr.initialize(None)
+            self.session, luid = ovr.create()
+
+    def tearDown(self):
+        if self.useRift:
+            self.rift.destroy()
+        else:
+            ovr.destroy(self.session)
+        ovr.shutdown()
+        self.sim.uninstall()
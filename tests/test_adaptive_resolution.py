@@ -0,0 +1,96 @@
+#!/bin/env python
+
+import unittest
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+import ovr
+from simulated_session import SimulatedSessionTestCase
+
+
+@unittest.skipIf(numpy is None, "numpy is not installed")
+class TestAdaptiveResolution(SimulatedSessionTestCase):
+
+    def setUp(self):
+        from ovr.adaptive_resolution import AdaptiveResolution
+        from ovr.perf_stats import PerfStatsCollector
+        SimulatedSessionTestCase.setUp(self)
+        self.frameIndex = 0
+        self.fullScaleGpuTime = 0.014 # more than one 90 Hz frame
+        self.controller = AdaptiveResolution(PerfStatsCollector(self.session), increase_delay=10)
+
+    def runFrames(self, count):
+        "Frames whose GPU time goes with the rendered pixel count; returns the scales used"
+        scales = []
+        for i in range(count):
+            scale = self.controller.update()
+            scales.append(scale)
+            self.sim.gpuTime = self.fullScaleGpuTime * scale ** 2
+            self.frameIndex += 1
+            ovr.submitFrame(self.session, self.frameIndex, None, [], 0)
+        return scales
+
+    def test_degrades_instead_of_dropping(self):
+        self.runFrames(30)
+        scale = self.controller.scale
+        self.assertLess(scale, 0.9)
+        self.assertGreaterEqual(scale, 0.5)
+        # Settled: no more drops, and the scale holds
+        dropped = self.controller.collector.appDroppedFrames
+        scales = self.runFrames(100)
+        self.assertEqual(self.controller.collector.appDroppedFrames, dropped)
+        self.assertEqual(set(scales), set([scale]))
+        self.assertLess(self.sim.gpuTime, 1.0 / 90.0)
+        decisions = list(self.controller.decisions)
+        self.assertTrue(decisions)
+        self.assertTrue(all(d.scale < d.previousScale for d in decisions))
+        self.assertEqual(decisions[-1].scale, scale)
+
+    def test_recovers_slowly(self):
+        self.runFrames(30)
+        low = self.controller.scale
+        self.fullScaleGpuTime = 0.004 # the scene got lighter
+        scales = self.runFrames(10)
+        self.assertEqual(set(scales), set([low])) # hysteresis: not yet
+        self.runFrames(200)
+        self.assertEqual(self.controller.scale, 1.0)
+        raises = [d for d in self.controller.decisions if d.reason == "gpu headroom"]
+        self.assertTrue(raises)
+        for decision in raises:
+            self.assertLessEqual(decision.scale - decision.previousScale, 0.05 + 1e-9)
+
+    def test_collector_reset(self):
+        self.sim.adaptiveGpuPerformanceScale = 1.0 # only the measured GPU time matters
+        self.fullScaleGpuTime = 0.008
+        self.runFrames(30)
+        self.assertEqual(self.controller.scale, 1.0)
+        # The collector starts over, and sees a few heavier frames before the next update
+        self.controller.collector.reset()
+        self.sim.gpuTime = 0.014
+        for i in range(3):
+            self.frameIndex += 1
+            ovr.submitFrame(self.session, self.frameIndex, None, [], 0)
+        self.assertLess(self.controller.update(), 1.0)
+        decision = self.controller.decisions[-1]
+        self.assertEqual(decision.reason, "gpu overload")
+        self.assertAlmostEqual(decision.gpuTime, 0.014, places=6)
+        self.controller.reset()
+        self.assertEqual(self.controller.scale, 1.0)
+        self.fullScaleGpuTime = 0.014
+        self.runFrames(3)
+        self.assertLess(self.controller.scale, 1.0)
+
+    def test_runtime_recommendation(self):
+        self.sim.adaptiveGpuPerformanceScale = 0.5
+        self.runFrames(3)
+        decision = self.controller.decisions[0]
+        self.assertEqual(decision.reason, "gpu overload")
+        self.assertAlmostEqual(decision.scale, 0.5 ** 0.5, places=6)
+        self.assertAlmostEqual(decision.adaptiveGpuPerformanceScale, 0.5, places=6)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,105 @@
+#!/bin/env python
+
+import unittest
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+import ovr
+from ovr.simulation import staticTrajectory
+from simulated_session import SimulatedSessionTestCase
+
+
+# Non-convex, clockwise seen from above
+L_SHAPE = [(-1.0, -1.0), (1.0, -1.0), (1.0, 0.0), (0.0, 0.0), (0.0, 1.0), (-1.0, 1.0)]
+
+
+class LShapeTestCase(SimulatedSessionTestCase):
+    "A session whose play area is L_SHAPE"
+
+    def simulatedRuntime(self):
+        sim = SimulatedSessionTestCase.simulatedRuntime(self)
+        sim.boundary[ovr.Boundary_PlayArea] = L_SHAPE
+        return sim
+
+
+class TestBoundaryGeometryBinding(LShapeTestCase):
+
+    def test_every_point(self):
+        points, count = ovr.getBoundaryGeometry(self.session, ovr.Boundary_PlayArea)
+        self.assertEqual(count.value, len(L_SHAPE))
+        self.assertEqual(len(points), len(L_SHAPE))
+        self.assertEqual([(p.x, p.z) for p in points], L_SHAPE)
+        # A large enough array is reused
+        out = (ovr.Vector3f * 8)()
+        points, count = ovr.getBoundaryGeometry(self.session, ovr.Boundary_Outer, out)
+        self.assertIs(points, out)
+        self.assertEqual(count.value, 4)
+
+    def test_no_boundary(self):
+        self.sim.boundary = None
+        points, count = ovr.getBoundaryGeometry(self.session, ovr.Boundary_PlayArea)
+        self.assertEqual((len(points), count.value), (0, 0))
+
+
+@unittest.skipIf(numpy is None, "numpy is not installed")
+class TestBoundaryQueries(LShapeTestCase):
+
+    def setUp(self):
+        from ovr.boundary import BoundaryGeometry
+        LShapeTestCase.setUp(self)
+        self.boundary = BoundaryGeometry(self.session, chunk_size=100)
+
+    def test_matches_runtime(self):
+        points = numpy.random.RandomState(3).uniform(-1.5, 1.5, (250, 3))
+        results = self.boundary.test(points)
+        self.assertEqual(self.sim.callCounts["ovr_TestBoundaryPoint"], 0)
+        for i, point in enumerate(points):
+            expected = ovr.testBoundaryPoint(self.session, ovr.Vector3f(*point), ovr.Boundary_PlayArea)
+            self.assertEqual(results.inside[i], expected.IsTriggering == ovr.ovrFalse.value)
+            self.assertAlmostEqual(abs(results.distance[i]), expected.ClosestDistance, places=5)
+            c, n = expected.ClosestPoint, expected.ClosestPointNormal
+            self.assertTrue(numpy.allclose(results.closestPoint[i], (c.x, c.y, c.z), atol=1e-5))
+            self.assertTrue(numpy.allclose(results.closestPointNormal[i], (n.x, n.y, n.z), atol=1e-6))
+        self.assertTrue(numpy.array_equal(self.boundary.distance(points), results.distance))
+        self.assertTrue(numpy.array_equal(self.boundary.contains(points), results.inside))
+
+    def test_shapes(self):
+        grid = numpy.zeros((4, 5, 3))
+        grid[..., 0] = numpy.linspace(-0.9, 0.9, 5)
+        grid[..., 2] = numpy.linspace(-0.9, 0.9, 4)[:, None]
+        inside = self.boundary.contains(grid)
+        self.assertEqual(inside.shape, (4, 5))
+        # The quarter with x > 0 and z > 0 is cut out of the L
+        self.assertFalse(inside[3, 4])
+        self.assertTrue(inside[0, 4])
+        self.assertAlmostEqual(self.boundary.distance([0.5, 1.7, -0.5]), 0.5)
+        self.assertAlmostEqual(self.boundary.distance([2.0, 0.0, -0.5]), -1.0)
+
+    def test_cached_until_origin_moves(self):
+        for i in range(10):
+            self.boundary.update(ovr.getTrackingState(self.session, 0, False))
+            self.boundary.distance(numpy.zeros((10, 3)))
+        self.assertEqual(self.boundary.fetches, 1)
+        self.assertEqual(self.sim.callCounts["ovr_GetBoundaryGeometry"], 2) # count, then points
+        # Recentering moves the boundary in tracking space
+        self.sim.headTrajectory = staticTrajectory(position=(0.5, 0.0, 0.0))
+        ovr.recenterTrackingOrigin(self.session)
+        self.assertTrue(self.boundary.update(ovr.getTrackingState(self.session, 0, False)))
+        self.assertEqual(self.boundary.fetches, 2)
+        self.assertAlmostEqual(self.boundary.points[0, 0], -1.5)
+        self.assertAlmostEqual(self.boundary.distance([-0.5, 0.0, -0.5]), 0.5)
+        self.boundary.invalidate()
+        self.assertTrue(self.boundary.update())
+
+    def test_no_boundary(self):
+        self.sim.boundary = None
+        self.assertFalse(self.boundary.valid)
+        with self.assertRaises(ValueError):
+            self.boundary.distance([0.0, 0.0, 0.0])
+
+
+if __name__ == '__main__':
+    unittest.main()
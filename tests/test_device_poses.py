@@ -0,0 +1,57 @@
+#!/bin/env python
+
+import unittest
+
+import ovr
+from ovr.simulation import staticTrajectory
+from simulated_session import SimulatedSessionTestCase
+
+
+DEVICES = (ovr.TrackedDevice_HMD, ovr.TrackedDevice_LTouch, ovr.TrackedDevice_RTouch,
+        ovr.TrackedDevice_Object0, ovr.TrackedDevice_Object1,
+        ovr.TrackedDevice_Object2, ovr.TrackedDevice_Object3)
+
+
+class TestDevicePoses(SimulatedSessionTestCase):
+
+    def simulatedRuntime(self):
+        sim = SimulatedSessionTestCase.simulatedRuntime(self)
+        sim.headTrajectory = staticTrajectory(position=(0, 1.7, 0))
+        sim.handTrajectories[1] = staticTrajectory(position=(0.3, 1.0, -0.4))
+        return sim
+
+    def test_all_devices_in_one_call(self):
+        poses = ovr.getDevicePoses(self.session, DEVICES, absTime=0.5)
+        self.assertEqual(len(poses), len(DEVICES))
+        self.assertAlmostEqual(poses[0].ThePose.Position.y, 1.7, places=6)
+        self.assertAlmostEqual(poses[2].ThePose.Position.x, 0.3, places=6)
+        self.assertEqual(poses[2].TimeInSeconds, 0.5)
+        self.assertEqual(self.sim.callCounts["ovr_GetDevicePoses"], 1)
+
+    def test_reused_buffer(self):
+        out = (ovr.PoseStatef * 3)()
+        result = ovr.getDevicePoses(self.session, DEVICES[:3], 3, 0.0, out)
+        self.assertIs(result, out)
+        self.assertRaises(ValueError, ovr.getDevicePoses, self.session, DEVICES, None, 0.0, out)
+
+    def test_rift_cached_buffers(self):
+        from ovr.rift import Rift
+        rift = Rift()
+        rift.init()
+        try:
+            first = rift.get_device_poses(DEVICES)
+            second = rift.get_device_poses(DEVICES)
+            self.assertIs(first, second)
+            try:
+                import numpy
+            except ImportError:
+                return
+            view = rift.get_device_poses(DEVICES, as_numpy=True)
+            self.assertEqual(view.shape, (len(DEVICES),))
+            numpy.testing.assert_allclose(view["ThePose"]["Position"]["y"][0], 1.7, rtol=1e-6)
+        finally:
+            rift.destroy()
+
+
+if __name__ == '__main__':
+    unittest.main()
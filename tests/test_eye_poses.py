@@ -0,0 +1,51 @@
+#!/bin/env python
+
+import unittest
+
+import ovr
+from ovr.simulation import staticTrajectory
+from simulated_session import SimulatedSessionTestCase
+
+
+class TestRiftEyePoses(SimulatedSessionTestCase):
+
+    useRift = True
+
+    def simulatedRuntime(self):
+        sim = SimulatedSessionTestCase.simulatedRuntime(self)
+        sim.headTrajectory = staticTrajectory(position=(0, 1.7, 0))
+        return sim
+
+    def test_offsets_from_render_desc(self):
+        for eye in range(2):
+            offset = self.rift.get_render_desc(eye, self.rift.hmdDesc.DefaultEyeFov[eye]).HmdToEyeOffset
+            self.assertEqual(self.rift.eye_offsets[eye].x, offset.x)
+        self.assertAlmostEqual(self.rift.eye_offsets[1].x - self.rift.eye_offsets[0].x,
+                self.sim.interpupillaryDistance, places=6)
+
+    def test_into_layer(self):
+        layer = ovr.LayerEyeFov()
+        self.clock.advance(2.5)
+        poses = self.rift.get_eye_poses(1, True, layer=layer)
+        self.assertEqual(layer.SensorSampleTime, 2.5)
+        self.assertEqual(self.rift.sensor_sample_time.value, 2.5)
+        for eye in range(2):
+            self.assertAlmostEqual(layer.RenderPose[eye].Position.y, 1.7, places=6)
+        self.assertAlmostEqual(layer.RenderPose[1].Position.x - layer.RenderPose[0].Position.x,
+                self.sim.interpupillaryDistance, places=6)
+        # The returned array is the layer's own memory, and is reused
+        poses[0].Position.z = 5.0
+        self.assertEqual(layer.RenderPose[0].Position.z, 5.0)
+        self.assertIs(self.rift.get_eye_poses(2, True, layer=layer), poses)
+        self.assertEqual(self.sim.callCounts["ovr_GetEyePoses"], 2)
+
+    def test_explicit_offsets(self):
+        offsets = [ovr.Vector3f(-0.1, 0, 0), ovr.Vector3f(0.1, 0, 0)]
+        poses = self.rift.get_eye_poses(1, ovr.ovrTrue, offsets)
+        self.assertIs(poses, self.rift.eye_poses)
+        self.assertAlmostEqual(poses[1].Position.x - poses[0].Position.x, 0.2, places=6)
+        self.assertIs(self.rift.get_eye_poses(2), poses)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,128 @@
+#!/bin/env python
+
+import time
+import unittest
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+import ovr
+from ovr.simulation import WallClock
+from simulated_session import SimulatedSessionTestCase
+
+RIGHT = ovr.ControllerType_RTouch
+
+
+@unittest.skipIf(numpy is None, "numpy is not installed")
+class TestHapticsEngine(SimulatedSessionTestCase):
+
+    def simulatedRuntime(self):
+        sim = SimulatedSessionTestCase.simulatedRuntime(self)
+        self.submitted = []
+        self.submitError = None
+        submit = sim.ovr_SubmitControllerVibration
+        def recordingSubmit(session, controllerType, buffer_):
+            if self.submitError is not None:
+                return self.submitError
+            buffer_ = buffer_._obj
+            self.submitted.append((buffer_.Samples, buffer_.SamplesCount))
+            return submit(session, controllerType, buffer_)
+        sim.ovr_SubmitControllerVibration = recordingSubmit
+        return sim
+
+    def setUp(self):
+        from ovr.haptics import HapticsEngine
+        SimulatedSessionTestCase.setUp(self)
+        self.engine = HapticsEngine(self.session)
+        self.desc = self.engine.channels[RIGHT].desc
+
+    def tearDown(self):
+        self.engine.stop()
+        SimulatedSessionTestCase.tearDown(self)
+
+    def runFor(self, seconds):
+        period = 1.0 / self.engine.rate
+        for i in range(int(round(seconds / period))):
+            self.engine.tick()
+            self.clock.advance(period)
+        # Let the simulated controller play out what is queued
+        self.clock.advance(1.0)
+        ovr.getControllerVibrationState(self.session, RIGHT, ovr.HapticsPlaybackState())
+
+    def played(self):
+        return numpy.frombuffer(bytes(self.sim.hapticsPlayed[RIGHT]), dtype=numpy.uint8)
+
+    def test_streams_without_copying(self):
+        samples = (numpy.arange(300) % 256).astype(numpy.uint8)
+        effect = self.engine.play(RIGHT, samples)
+        self.runFor(2.0)
+        self.assertFalse(effect.playing)
+        numpy.testing.assert_array_equal(self.played(), samples)
+        self.assertEqual(self.engine.starvations, 0)
+        self.assertEqual(self.engine.copiedSamples, 0)
+        start = samples.ctypes.data
+        for address, count in self.submitted:
+            self.assertTrue(start <= address and address + count <= start + len(samples))
+            self.assertLessEqual(count, self.desc.SubmitOptimalSamples)
+
+    def test_queue_stays_fed(self):
+        levels = []
+        self.engine.play(RIGHT, numpy.full(600, 100, dtype=numpy.uint8))
+        state = ovr.HapticsPlaybackState()
+        period = 1.0 / self.engine.rate
+        for i in range(40):
+            self.engine.tick()
+            self.clock.advance(period)
+            ovr.getControllerVibrationState(self.session, RIGHT, state)
+            levels.append(state.SamplesQueued)
+        self.assertGreaterEqual(min(levels[:20]), self.desc.QueueMinSizeToAvoidStarvation)
+        self.assertLessEqual(max(levels), self.desc.QueueMinSizeToAvoidStarvation + 2 * self.desc.SubmitOptimalSamples)
+
+    def test_mixing(self):
+        self.engine.play(RIGHT, numpy.full(40, 200, dtype=numpy.uint8))
+        self.engine.play(RIGHT, numpy.full(80, 100, dtype=numpy.uint8), gain=0.5)
+        self.runFor(1.0)
+        played = self.played()
+        self.assertEqual(len(played), 80)
+        self.assertTrue(numpy.all(played[:40] == 250))
+        self.assertTrue(numpy.all(played[40:] == 50))
+        self.assertEqual(self.engine.copiedSamples, 80)
+
+    def test_loop_and_cancel(self):
+        effect = self.engine.play(RIGHT, b"\x10\x20\x30", loop=True)
+        self.runFor(0.5)
+        self.assertTrue(effect.playing)
+        self.assertEqual(self.engine.playing(RIGHT), 1)
+        effect.cancel()
+        count = len(self.submitted)
+        self.runFor(0.5)
+        self.assertEqual(len(self.submitted), count)
+        played = self.played()
+        numpy.testing.assert_array_equal(played[:9], [0x10, 0x20, 0x30] * 3)
+
+    def test_background_thread(self):
+        self.sim.clock = WallClock()
+        with self.engine:
+            effect = self.engine.play(RIGHT, numpy.full(32, 7, dtype=numpy.uint8))
+            deadline = time.time() + 2.0
+            while effect.playing and time.time() < deadline:
+                time.sleep(0.01)
+        self.assertFalse(effect.playing)
+        self.assertEqual(self.engine.samplesSubmitted, 32)
+
+    def test_background_error(self):
+        self.sim.clock = WallClock()
+        self.submitError = ovr.Error_ServiceError
+        self.engine.start()
+        deadline = time.time() + 2.0
+        with self.assertRaises(ovr.OculusFunctionError):
+            while time.time() < deadline:
+                self.engine.play(RIGHT, numpy.full(32, 7, dtype=numpy.uint8))
+                time.sleep(0.01)
+        self.assertRaises(ovr.OculusFunctionError, self.engine.stop)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,123 @@
+#!/bin/env python
+
+import os
+import shutil
+import struct
+import tempfile
+import unittest
+import wave
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+import ovr
+from simulated_session import SimulatedSessionTestCase
+
+
+@unittest.skipIf(numpy is None, "numpy is not installed")
+class TestHapticsClipLibrary(SimulatedSessionTestCase):
+
+    def setUp(self):
+        SimulatedSessionTestCase.setUp(self)
+        self.folder = tempfile.mkdtemp()
+        self.cache = os.path.join(self.folder, "cache")
+
+    def tearDown(self):
+        SimulatedSessionTestCase.tearDown(self)
+        shutil.rmtree(self.folder)
+
+    def writeWav(self, name, samples, rate=3200):
+        "A mono 16 bit WAV file of samples in [-1, 1]"
+        path = os.path.join(self.folder, name)
+        out = wave.open(path, "wb")
+        out.setnchannels(1)
+        out.setsampwidth(2)
+        out.setframerate(rate)
+        out.writeframes(struct.pack("<%dh" % len(samples), *[int(s * 32767) for s in samples]))
+        out.close()
+        return path
+
+    def library(self, **kwargs):
+        from ovr.haptics_clips import HapticsClipLibrary
+        kwargs.setdefault("folder", self.cache)
+        return HapticsClipLibrary(**kwargs)
+
+    def decodes(self):
+        return self.sim.callCounts.get("ovr_GenHapticsFromAudioData", 0)
+
+    def test_converted_once(self):
+        ramp = self.writeWav("ramp.wav", [i / 99.0 for i in range(100)])
+        clips = self.library()
+        samples = clips.get(ramp)
+        self.assertEqual(len(samples), 10) # 100 samples at 3200 Hz, played at 320 Hz
+        self.assertEqual(samples[0], 0)
+        self.assertEqual(samples[-1], round(90 / 99.0 * 255))
+        self.assertFalse(samples.flags.writeable)
+        self.assertIs(clips.get(ramp), samples)
+        self.assertEqual((clips.decoded, clips.memoryHits), (1, 1))
+        self.assertEqual(self.sim.nativeAllocations, {})
+        # A new process loads the cached samples without reading the WAV file
+        again = self.library()
+        self.assertIsNotNone(again._knownHash(os.path.abspath(ramp), os.stat(ramp)))
+        self.assertTrue(numpy.array_equal(again.get(ramp), samples))
+        self.assertEqual((again.decoded, again.diskHits), (0, 1))
+        self.assertEqual(self.decodes(), 1)
+
+    def test_keys(self):
+        path = self.writeWav("click.wav", [1.0] * 20)
+        clips = self.library()
+        self.assertEqual(list(clips.get(path)), [255, 255])
+        # Different content under the same name is converted again
+        self.writeWav("click.wav", [0.5] * 40)
+        os.utime(path, (1, 1))
+        clips.clear()
+        self.assertEqual(list(clips.get(path)), [127] * 4)
+        self.assertEqual(clips.decoded, 2)
+        # So is the same content in another generation mode, which the simulator does not support
+        other = self.library(genMode=ovr.HapticsGenMode_PointSample + 1)
+        with self.assertRaises(ovr.OculusFunctionError):
+            other.get(path)
+        self.assertEqual(self.sim.nativeAllocations, {})
+
+    def test_preload(self):
+        paths = [self.writeWav("%d.wav" % i, [i / 4.0] * 20) for i in range(4)]
+        self.library().preload(paths)
+        again = self.library()
+        again.preload(paths)
+        self.assertEqual((again.decoded, again.diskHits), (0, 4))
+        self.assertIn("index.json", os.listdir(self.cache))
+        self.assertFalse([name for name in os.listdir(self.cache) if name.endswith(".tmp")])
+
+    def test_lru_eviction(self):
+        paths = [self.writeWav("%d.wav" % i, [0.5] * 100) for i in range(3)]
+        clips = self.library(max_bytes=20)
+        clips.get(paths[0])
+        clips.get(paths[1])
+        clips.get(paths[0])
+        clips.get(paths[2]) # evicts paths[1], the least recently used
+        self.assertEqual(len(clips), 2)
+        clips.get(paths[0])
+        self.assertEqual(clips.memoryHits, 2)
+        clips.get(paths[1])
+        self.assertEqual(clips.memoryHits, 2)
+        # All three files hold the same sound, so it was only converted once
+        self.assertEqual(self.decodes(), 1)
+
+    def test_plays(self):
+        from ovr.haptics import HapticsEngine
+        path = self.writeWav("buzz.wav", [1.0] * 400)
+        clips = self.library(folder=False)
+        clip = clips.clip(path)
+        self.assertEqual(clip.SamplesCount, 40)
+        engine = HapticsEngine(self.session)
+        effect = engine.play(ovr.ControllerType_RTouch, clips.get(path))
+        engine.tick()
+        self.assertEqual(engine.copiedSamples, 0)
+        self.assertEqual(effect.position, 40)
+        self.assertFalse(os.path.exists(self.cache))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,123 @@
+#!/bin/env python
+
+import time
+import unittest
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+import ovr
+from simulated_session import SimulatedSessionTestCase
+
+
+def script(t, inputState):
+    "A tapped between 10 and 14 ms, X held from 30 ms, right trigger ramping up over 100 ms and back"
+    if 0.010 <= t < 0.014:
+        inputState.Buttons |= ovr.Button_A
+    if t >= 0.030:
+        inputState.Buttons |= ovr.Button_X
+        inputState.Touches |= ovr.Touch_X
+    ramp = min(t, 0.2 - t) / 0.1
+    inputState.IndexTrigger[ovr.Hand_Right] = max(0.0, ramp)
+    inputState.Thumbstick[ovr.Hand_Left].x = t
+
+
+@unittest.skipIf(numpy is None, "numpy is not installed")
+class TestInputStream(SimulatedSessionTestCase):
+
+    def simulatedRuntime(self):
+        sim = SimulatedSessionTestCase.simulatedRuntime(self)
+        sim.inputScript = script
+        return sim
+
+    def setUp(self):
+        from ovr.input_stream import InputStream
+        SimulatedSessionTestCase.setUp(self)
+        self.stream = InputStream(self.session, capacity=64)
+
+    def tearDown(self):
+        self.stream.stop()
+        SimulatedSessionTestCase.tearDown(self)
+
+    def pollFor(self, seconds, step=0.002):
+        for i in range(int(round(seconds / step))):
+            self.stream.poll()
+            self.clock.advance(step)
+
+    def test_edges_between_frames(self):
+        from ovr.input_stream import PRESS, RELEASE, TOUCH
+        self.pollFor(0.05)
+        frame = self.stream.snapshot()
+        # The tap came and went between two frames
+        self.assertEqual(frame.pressed, ovr.Button_A | ovr.Button_X)
+        self.assertEqual(frame.released, ovr.Button_A)
+        self.assertEqual(frame.touched, ovr.Touch_X)
+        self.assertEqual([(e.kind, e.code) for e in frame.events],
+                [(PRESS, ovr.Button_A), (RELEASE, ovr.Button_A), (PRESS, ovr.Button_X), (TOUCH, ovr.Touch_X)])
+        self.assertAlmostEqual(frame.events[0].time, 0.010)
+        self.assertEqual(frame.state.Buttons, ovr.Button_X)
+        # Events are handed out once
+        self.pollFor(0.004)
+        frame = self.stream.snapshot()
+        self.assertEqual((frame.events, frame.pressed), ([], 0))
+
+    def test_trigger_hysteresis(self):
+        from ovr.input_stream import PRESS, RELEASE
+        self.pollFor(0.2)
+        triggers = [(e.kind, e.hand, round(e.time, 3)) for e in self.stream.snapshot().events if e.hand is not None]
+        self.assertEqual(triggers, [(PRESS, ovr.Hand_Right, 0.056), (RELEASE, ovr.Hand_Right, 0.166)])
+
+    def test_history(self):
+        self.stream.poll()
+        self.stream.poll() # same TimeInSeconds, not kept again
+        self.assertEqual((len(self.stream), self.stream.polls), (1, 2))
+        self.clock.advance(0.002)
+        self.pollFor(0.2)
+        self.assertEqual(len(self.stream), 64)
+        times, stick = self.stream.thumbstick_trajectory(ovr.Hand_Left, seconds=0.01)
+        self.assertEqual(stick.shape, (len(times), 2))
+        self.assertEqual(len(times), 6)
+        self.assertTrue(numpy.allclose(stick[:, 0], times))
+        times, trigger = self.stream.trigger_curve(ovr.Hand_Right, window=10)
+        self.assertEqual(len(times), 10)
+        self.assertTrue(numpy.all(numpy.diff(trigger) < 0))
+
+    def test_snapshot_matches_state(self):
+        self.pollFor(0.02)
+        # An event of a state not yet published waits for the next snapshot
+        from ovr.input_stream import InputEvent, PRESS
+        self.stream._events.append(InputEvent(1.0, PRESS, ovr.Button_B, None))
+        frame = self.stream.snapshot()
+        self.assertEqual(frame.pressed, ovr.Button_A)
+        self.assertEqual(len(self.stream._events), 1)
+
+    def test_background_polling(self):
+        self.sim.inputScript = None
+        pressed = 0
+        with self.stream:
+            deadline = time.time() + 5.0
+            while self.stream.polls < 3 and time.time() < deadline:
+                time.sleep(0.001)
+            self.sim.input.Buttons = ovr.Button_B
+            self.clock.advance(0.01)
+            while not pressed and time.time() < deadline:
+                pressed = self.stream.snapshot().pressed
+                time.sleep(0.001)
+        self.assertEqual(pressed, ovr.Button_B)
+
+    def test_background_error(self):
+        self.sim.ovr_GetInputState = lambda session, controllerType, inputState: ovr.Error_ServiceError
+        self.sim.install() # rebinds the native functions
+        self.stream.start()
+        deadline = time.time() + 5.0
+        with self.assertRaises(ovr.OculusFunctionError):
+            while time.time() < deadline:
+                self.stream.snapshot()
+                time.sleep(0.001)
+        self.assertRaises(ovr.OculusFunctionError, self.stream.stop)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,117 @@
+#!/bin/env python
+
+import unittest
+
+from offscreen_gl import context, createTexture
+
+import ovr
+from ovr.simulation import SimulatedRuntime, staticTrajectory
+from simulated_session import SimulatedSessionTestCase
+
+
+@unittest.skipIf(context is None, "no offscreen OpenGL 3.3 core profile context")
+class TestLayerManager(SimulatedSessionTestCase):
+
+    def simulatedRuntime(self):
+        return SimulatedRuntime(clock=self.clock, createTexture=createTexture)
+
+    def setUp(self):
+        from ovr.layers import LayerManager
+        from ovr.swap_chain_pool import SwapChainPool
+        SimulatedSessionTestCase.setUp(self)
+        self.pool = SwapChainPool(self.session)
+        self.layers = LayerManager(self.session, self.pool)
+        self.frameIndex = 0
+        self.pose = ovr.Posef(ovr.Quatf(0, 0, 0, 1), ovr.Vector3f(0, 0, -1))
+
+    def tearDown(self):
+        self.layers.destroy()
+        self.pool.clear()
+        SimulatedSessionTestCase.tearDown(self)
+
+    def submitFrames(self, count):
+        for i in range(count):
+            self.frameIndex += 1
+            self.layers.submit(self.frameIndex)
+
+    def test_static_quad_renders_when_dirty(self):
+        from OpenGL import GL
+        def drawHud(managed):
+            GL.glClearColor(1, 0, 0, 1)
+            GL.glClear(GL.GL_COLOR_BUFFER_BIT)
+        hud = self.layers.add_quad((64, 32), (1.0, 0.5), self.pose, drawHud, head_locked=True)
+        self.assertEqual(hud.layer.Header.Flags & ovr.LayerFlag_HeadLocked, ovr.LayerFlag_HeadLocked)
+        self.submitFrames(10)
+        self.assertEqual(hud.renders, 1)
+        self.assertEqual(len(self.sim.submittedFrames), 10)
+        self.assertEqual(self.sim.submittedFrames[-1].layerTypes, [ovr.LayerType_Quad])
+        hud.mark_dirty()
+        self.submitFrames(5)
+        self.assertEqual(hud.renders, 2)
+        # The texture committed last holds the HUD
+        target = hud.target
+        committed = target.fbos[(target.current_index() - 1) % target.length]
+        GL.glBindFramebuffer(GL.GL_READ_FRAMEBUFFER, committed)
+        pixel = bytearray(GL.glReadPixels(5, 5, 1, 1, GL.GL_RGBA, GL.GL_UNSIGNED_BYTE))
+        GL.glBindFramebuffer(GL.GL_READ_FRAMEBUFFER, 0)
+        self.assertEqual(list(pixel), [255, 0, 0, 255])
+
+    def test_update_rates(self):
+        world = self.layers.add_eye_matrix([ovr.Matrix4f()] * 2, (64, 32), lambda managed: None)
+        clock = self.layers.add_quad((32, 32), (0.2, 0.2), self.pose, lambda managed: None, update_interval=3)
+        static = self.layers.add_quad((32, 32), (0.2, 0.2), self.pose, lambda managed: None)
+        self.submitFrames(10)
+        self.assertEqual((world.renders, clock.renders, static.renders), (10, 4, 1))
+        self.assertEqual(self.sim.submittedFrames[-1].layerTypes,
+                [ovr.LayerType_EyeMatrix, ovr.LayerType_Quad, ovr.LayerType_Quad])
+        self.assertEqual(world.layer.Viewport[1].Pos.x, 32)
+
+    def test_eye_layer_per_eye(self):
+        from OpenGL import GL
+        self.sim.headTrajectory = staticTrajectory(position=(0.0, 1.6, 0.0))
+        calls = []
+        def draw(managed):
+            eye = managed.eye
+            calls.append((eye, tuple(GL.glGetIntegerv(GL.GL_VIEWPORT)), managed.layer.RenderPose[eye].Position.y))
+            GL.glClearColor(eye, 1 - eye, 0, 1)
+            GL.glClear(GL.GL_COLOR_BUFFER_BIT)
+        fov = ovr.getHmdDesc(self.session).DefaultEyeFov
+        world = self.layers.add_eye_fov(fov, (64, 32), draw)
+        self.sim.clock.advance(2.0)
+        self.submitFrames(1)
+        self.assertEqual([(eye, viewport) for eye, viewport, y in calls], [(0, (0, 0, 32, 32)), (1, (32, 0, 32, 32))])
+        for eye, viewport, y in calls:
+            self.assertAlmostEqual(y, 1.6, places=5)
+        self.assertIsNone(world.eye)
+        self.assertGreaterEqual(world.layer.SensorSampleTime, 2.0)
+        self.assertLess(world.layer.RenderPose[0].Position.x, world.layer.RenderPose[1].Position.x)
+        # Each eye's clear stayed in its own half
+        target = world.target
+        committed = target.fbos[(target.current_index() - 1) % target.length]
+        GL.glBindFramebuffer(GL.GL_READ_FRAMEBUFFER, committed)
+        left = bytearray(GL.glReadPixels(5, 5, 1, 1, GL.GL_RGBA, GL.GL_UNSIGNED_BYTE))
+        right = bytearray(GL.glReadPixels(40, 5, 1, 1, GL.GL_RGBA, GL.GL_UNSIGNED_BYTE))
+        GL.glBindFramebuffer(GL.GL_READ_FRAMEBUFFER, 0)
+        self.assertEqual((list(left), list(right)), ([0, 255, 0, 255], [255, 0, 0, 255]))
+
+    def test_hide_and_remove(self):
+        first = self.layers.add_quad((32, 32), (0.2, 0.2), self.pose, lambda managed: None)
+        fov = ovr.getHmdDesc(self.session).DefaultEyeFov
+        second = self.layers.add_eye_fov(fov, (64, 32), lambda managed: None)
+        first.set_visible(False)
+        self.submitFrames(2)
+        self.assertEqual(self.sim.submittedFrames[-1].layerTypes, [ovr.LayerType_EyeFov])
+        self.assertEqual(first.renders, 0)
+        first.set_visible(True)
+        target = second.target
+        second.remove()
+        self.submitFrames(1)
+        self.assertEqual(self.sim.submittedFrames[-1].layerTypes, [ovr.LayerType_Quad])
+        self.assertEqual(first.renders, 1)
+        # The removed layer's swap chain is kept for reuse
+        again = self.layers.add_eye_fov(fov, (64, 32))
+        self.assertIs(again.target, target)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+#!/bin/env python
+
+import ctypes
+import os
+import subprocess
+import sys
+import unittest
+
+import ovr
+from ovr._library import LazyLibrary
+
+
+class TestLazyLoading(unittest.TestCase):
+
+    def test_import_defers_bindings(self):
+        # Use a fresh interpreter, since this one may have loaded everything already
+        script = "\n".join([
+            "import sys",
+            "import ovr",
+            "assert 'ovr._ovr1160' not in sys.modules",
+            "ovr.Posef",
+            "assert 'ovr._ovr1160' in sys.modules",
+            "assert not ovr.libovr.isLoaded()",
+        ])
+        root = os.path.dirname(os.path.dirname(os.path.abspath(ovr.__file__)))
+        subprocess.check_call([sys.executable, "-c", script], cwd=root)
+
+    def test_symbols_are_cached(self):
+        quat = ovr.Quatf
+        self.assertIs(vars(ovr)['Quatf'], quat)
+        self.assertIn('Posef', dir(ovr))
+        self.assertIn('getTrackingState', ovr.__all__)
+        self.assertRaises(AttributeError, getattr, ovr, 'notAnOvrSymbol')
+
+    def test_public_names(self):
+        names = ovr.__all__
+        for internal in ('ctypes', 'platform', 'LazyLibrary', 'absolute_import'):
+            self.assertNotIn(internal, names)
+            self.assertNotIn(internal, dir(ovr))
+        self.assertIn('libovr', names)
+        self.assertIn('c_int', names) # from ctypes import *
+
+    def test_prototypes_recorded(self):
+        function = ovr.libovr.ovr_GetTimeInSeconds
+        if not ovr.libovr.isLoaded():
+            self.assertEqual(function.restype, ctypes.c_double)
+            self.assertEqual(function.argtypes, None)
+
+    def test_load_failure(self):
+        lib = LazyLibrary("NoSuchOculusRuntimeLibrary")
+        lib.ovr_Foo.restype = ctypes.c_int
+        self.assertFalse(lib.isLoaded())
+        self.assertRaises(OSError, lib.ovr_Foo)
+
+    def test_native_follows_backend(self):
+        from ovr.perf_stats import PerfStatsCollector
+        from ovr.simulation import SimulatedRuntime, SimulatedClock
+        first = SimulatedRuntime(clock=SimulatedClock())
+        second = SimulatedRuntime(clock=SimulatedClock())
+        first.install()
+        try:
+            self.assertEqual(ovr.libovr.native("ovr_GetPerfStats"), first.ovr_GetPerfStats)
+            ovr.initialize(None)
+            session, luid = ovr.create()
+            collector = PerfStatsCollector(session)
+            collector.poll()
+            # Objects made before a backend switch call the new backend
+            second.install()
+            second._sessions = first._sessions
+            collector.poll()
+            self.assertEqual((first.callCounts["ovr_GetPerfStats"], second.callCounts["ovr_GetPerfStats"]), (1, 1))
+            self.assertEqual(ovr.libovr.native("ovr_GetPerfStats"), second.ovr_GetPerfStats)
+        finally:
+            second.uninstall()
+            first.uninstall()
+
+
+if __name__ == '__main__':
+    unittest.main()
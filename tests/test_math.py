@@ -0,0 +1,90 @@
+#!/bin/env python
+
+import unittest
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+import ovr
+
+
+def randomPoses(count, seed=1):
+    random = numpy.random.RandomState(seed)
+    quats = random.normal(size=(count, 4))
+    quats /= numpy.linalg.norm(quats, axis=1, keepdims=True)
+    return numpy.concatenate([quats, random.uniform(-2, 2, size=(count, 3))], axis=1)
+
+
+@unittest.skipIf(numpy is None, "numpy is not installed")
+class TestMath(unittest.TestCase):
+
+    def setUp(self):
+        import ovr.math
+        self.m = ovr.math
+
+    def test_euler_matches_quatf(self):
+        poses = randomPoses(50)
+        for axes in [(0, 1, 2), (1, 0, 2), (2, 1, 0)]:
+            euler = self.m.quatToEuler(poses[:, :4], *axes)
+            for q, angles in zip(poses[:, :4], euler):
+                expected = ovr.Quatf(*q).getEulerAngles(*axes)
+                numpy.testing.assert_allclose(angles, expected, atol=1e-5)
+            # and back again
+            quats = self.m.eulerToQuat(euler, *axes)
+            dots = numpy.abs(numpy.sum(quats * poses[:, :4], axis=1))
+            numpy.testing.assert_allclose(dots, 1.0, atol=1e-6)
+
+    def test_multiply_and_inverse(self):
+        poses = randomPoses(1000)
+        q = poses[:, :4]
+        identity = self.m.quatMultiply(q, self.m.quatInverse(q))
+        numpy.testing.assert_allclose(identity, numpy.tile([0, 0, 0, 1], (1000, 1)), atol=1e-12)
+        composed = self.m.poseMultiply(poses, self.m.poseInvert(poses))
+        numpy.testing.assert_allclose(composed[:, 4:], 0, atol=1e-12)
+
+    def test_slerp(self):
+        a = self.m.axisAngleQuat(1, 0.0)
+        b = self.m.axisAngleQuat(1, numpy.pi / 2)
+        middle = self.m.quatSlerp(a, b, [0.0, 0.5, 1.0])
+        numpy.testing.assert_allclose(middle[1], self.m.axisAngleQuat(1, numpy.pi / 4), atol=1e-12)
+        numpy.testing.assert_allclose(middle[2], b, atol=1e-12)
+        # q and -q describe the same rotation
+        numpy.testing.assert_allclose(self.m.quatSlerp(a, -a, 0.5), a, atol=1e-12)
+
+    def test_posef_arrays(self):
+        poses = (ovr.Posef * 4000)()
+        values = randomPoses(4000).astype(numpy.float32)
+        ovr.as_numpy(poses)[:] = values
+        points = numpy.array([[0.0, 0.0, -1.0]])
+        transformed = self.m.transformPoints(poses, points)
+        self.assertEqual(transformed.shape, (4000, 3))
+        matrices = self.m.poseToMatrix(poses)
+        viaMatrix = numpy.einsum('nij,j->ni', matrices[:, :3, :3], points[0]) + matrices[:, :3, 3]
+        numpy.testing.assert_allclose(transformed, viaMatrix, atol=1e-5)
+
+    def test_point_cloud(self):
+        pose = randomPoses(1)[0]
+        cloud = numpy.random.RandomState(2).normal(size=(10000, 3))
+        numpy.testing.assert_allclose(self.m.transformPoints(pose, cloud),
+                self.m.transformPoints(numpy.tile(pose, (10000, 1)), cloud), atol=1e-12)
+
+    def test_matrix_into_matrix4f(self):
+        pose = ovr.Posef()
+        pose.Orientation = ovr.Quatf(*self.m.axisAngleQuat(1, numpy.pi / 2))
+        pose.Position = ovr.Vector3f(1, 2, 3)
+        matrix = ovr.Matrix4f()
+        self.m.poseToMatrix(pose, out=ovr.as_numpy(matrix))
+        self.assertAlmostEqual(matrix.M[0][2], 1.0, places=6)
+        self.assertEqual([matrix.M[i][3] for i in range(4)], [1, 2, 3, 1])
+
+    def test_pose_state_records(self):
+        states = (ovr.PoseStatef * 3)()
+        for state in states:
+            state.ThePose.Orientation.w = 1.0
+        self.assertEqual(self.m.asPoseArray(ovr.as_numpy(states)).shape, (3, 7))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,105 @@
+#!/bin/env python
+
+import io
+import unittest
+
+from offscreen_gl import context, createTexture
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+import ovr
+from ovr.simulation import SimulatedRuntime
+from simulated_session import SimulatedSessionTestCase
+
+
+@unittest.skipIf(context is None, "no offscreen OpenGL 3.3 core profile context")
+class TestMirror(SimulatedSessionTestCase):
+
+    def simulatedRuntime(self):
+        return SimulatedRuntime(clock=self.clock, createTexture=createTexture)
+
+    def setUp(self):
+        from ovr.mirror import MirrorTexture
+        SimulatedSessionTestCase.setUp(self)
+        self.mirror = MirrorTexture(self.session, 16, 8)
+
+    def tearDown(self):
+        self.mirror.destroy()
+        SimulatedSessionTestCase.tearDown(self)
+
+    def composite(self, value):
+        "Stand in for the compositor: fill the mirror texture, top row first"
+        from OpenGL import GL
+        pixels = numpy.zeros((8, 16, 4), dtype=numpy.uint8)
+        pixels[..., 0] = value
+        pixels[:, :, 1] = numpy.arange(8)[:, None] # row number, from the top
+        GL.glBindTexture(GL.GL_TEXTURE_2D, self.mirror.textureId)
+        GL.glTexSubImage2D(GL.GL_TEXTURE_2D, 0, 0, 0, 16, 8, GL.GL_RGBA, GL.GL_UNSIGNED_BYTE, pixels)
+        GL.glBindTexture(GL.GL_TEXTURE_2D, 0)
+        return pixels
+
+    def test_blit_upright(self):
+        from OpenGL import GL
+        self.composite(200)
+        texture = GL.glGenTextures(1)
+        GL.glBindTexture(GL.GL_TEXTURE_2D, texture)
+        GL.glTexImage2D(GL.GL_TEXTURE_2D, 0, GL.GL_RGBA8, 16, 8, 0, GL.GL_RGBA, GL.GL_UNSIGNED_BYTE, None)
+        fbo = GL.glGenFramebuffers(1)
+        GL.glBindFramebuffer(GL.GL_FRAMEBUFFER, fbo)
+        GL.glFramebufferTexture2D(GL.GL_FRAMEBUFFER, GL.GL_COLOR_ATTACHMENT0, GL.GL_TEXTURE_2D, texture, 0)
+        self.mirror.blit(16, 8, draw_fbo=fbo)
+        GL.glBindFramebuffer(GL.GL_READ_FRAMEBUFFER, fbo)
+        window = numpy.frombuffer(GL.glReadPixels(0, 0, 16, 8, GL.GL_RGBA, GL.GL_UNSIGNED_BYTE),
+                dtype=numpy.uint8).reshape(8, 16, 4)
+        GL.glBindFramebuffer(GL.GL_READ_FRAMEBUFFER, 0)
+        GL.glDeleteFramebuffers(1, [fbo])
+        GL.glDeleteTextures([texture])
+        # The window's bottom row (GL row 0) shows the mirror's bottom row
+        self.assertEqual(window[0, 0, 1], 7)
+        self.assertEqual(window[7, 0, 1], 0)
+        self.assertTrue(numpy.all(window[..., 0] == 200))
+
+    def test_record_to_file(self):
+        from ovr.mirror import MirrorRecorder
+        sink = io.BytesIO()
+        expected = []
+        with MirrorRecorder(self.mirror, sink) as recorder:
+            for frame in range(5):
+                expected.append(self.composite(10 * frame))
+                self.assertTrue(recorder.capture())
+        self.assertEqual(recorder.written, 5)
+        self.assertEqual(recorder.dropped, 0)
+        self.assertEqual(sink.getvalue(), b"".join(e.tobytes() for e in expected))
+
+    def test_never_waits_for_gpu(self):
+        import ovr.mirror
+        from ovr.mirror import MirrorRecorder
+        frames = []
+        recorder = MirrorRecorder(self.mirror, lambda number, pixels: frames.append((number, pixels[0, 0, 0])),
+                ring_size=2)
+        clientWaitSync = ovr.mirror.glClientWaitSync
+        waits = []
+        def slowGpu(sync, flags, timeout):
+            waits.append(timeout)
+            if timeout == 0:
+                return ovr.mirror.GL_TIMEOUT_EXPIRED
+            return clientWaitSync(sync, flags, timeout)
+        ovr.mirror.glClientWaitSync = slowGpu
+        try:
+            for frame in range(4):
+                self.composite(frame + 1)
+                recorder.capture()
+            self.assertEqual(recorder.captured, 2)
+            self.assertEqual(recorder.dropped, 2)
+            self.assertEqual(set(waits), set([0]))
+            recorder.close()
+        finally:
+            ovr.mirror.glClientWaitSync = clientWaitSync
+        self.assertEqual(frames, [(1, 1), (2, 2)])
+
+
+if __name__ == '__main__':
+    unittest.main()
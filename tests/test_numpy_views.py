@@ -0,0 +1,68 @@
+#!/bin/env python
+
+import ctypes
+import unittest
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+import ovr
+
+
+@unittest.skipIf(numpy is None, "numpy is not installed")
+class TestNumpyViews(unittest.TestCase):
+
+    def test_vector_view_shares_memory(self):
+        v = ovr.Vector3f(1, 2, 3)
+        a = v.as_numpy()
+        self.assertEqual(a.dtype, numpy.float32)
+        self.assertEqual(a.tolist(), [1, 2, 3])
+        a[1] = 5
+        self.assertEqual(v.y, 5)
+        v.z = 7
+        self.assertEqual(a[2], 7)
+
+    def test_pose(self):
+        pose = ovr.Posef()
+        pose.Orientation.w = 1
+        pose.Position.z = -2
+        a = pose.as_numpy()
+        self.assertEqual(a.shape, (7,))
+        self.assertEqual(a.tolist(), [0, 0, 0, 1, 0, 0, -2])
+        quat = pose.Orientation.as_numpy()
+        quat[0] = 0.5
+        self.assertEqual(a[0], 0.5)
+
+    def test_matrix(self):
+        m = ovr.Matrix4f()
+        m.M[1][3] = 4.0
+        a = m.as_numpy()
+        self.assertEqual(a.shape, (4, 4))
+        self.assertEqual(a.__array_interface__["data"][0], ctypes.addressof(m))
+        self.assertEqual(a[1, 3], 4.0)
+        a[2, 0] = 9.0
+        self.assertEqual(m.M[2][0], 9.0)
+
+    def test_ctypes_arrays(self):
+        poses = (ovr.Posef * 1000)()
+        a = ovr.as_numpy(poses)
+        self.assertEqual(a.shape, (1000, 7))
+        a[:, 3] = 1.0
+        self.assertEqual(poses[999].Orientation.w, 1.0)
+        matrices = ovr.as_numpy((ovr.Matrix4f * 2)())
+        self.assertEqual(matrices.shape, (2, 4, 4))
+
+    def test_structured_array(self):
+        states = (ovr.PoseStatef * 3)()
+        a = ovr.as_numpy(states)
+        self.assertEqual(a.shape, (3,))
+        a["TimeInSeconds"][2] = 1.5
+        a["ThePose"]["Position"]["y"][0] = 0.25
+        self.assertEqual(states[2].TimeInSeconds, 1.5)
+        self.assertEqual(states[0].ThePose.Position.y, 0.25)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,109 @@
+#!/bin/env python
+
+import time
+import unittest
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+import ovr
+from ovr.simulation import SimulatedRuntime, WallClock
+from simulated_session import SimulatedSessionTestCase
+
+
+@unittest.skipIf(numpy is None, "numpy is not installed")
+class TestPerfStatsCollector(SimulatedSessionTestCase):
+
+    def simulatedRuntime(self):
+        return SimulatedRuntime(clock=self.clock, gpuTime=0.004)
+
+    def setUp(self):
+        SimulatedSessionTestCase.setUp(self)
+        self.frameIndex = 0
+
+    def submitFrames(self, count, slowFrame=None):
+        for i in range(count):
+            self.frameIndex += 1
+            if i == slowFrame:
+                self.clock.advance(3.5 / 90.0) # misses two vsyncs
+            ovr.submitFrame(self.session, self.frameIndex, None, [], 0)
+
+    def test_every_frame_once(self):
+        from ovr.perf_stats import PerfStatsCollector
+        collector = PerfStatsCollector(self.session, capacity=16)
+        for i in range(10):
+            self.submitFrames(3)
+            collector.poll()
+            self.assertEqual(collector.poll(), 0)
+        self.assertEqual(collector.frameCount, 30)
+        self.assertEqual(len(collector), 16)
+        frames = collector.recent()
+        self.assertEqual(frames["AppFrameIndex"].tolist(), list(range(15, 31)))
+        self.assertEqual(collector.lostFrameStats, 0)
+        numpy.testing.assert_allclose(collector.percentiles("AppGpuElapsedTime"), 0.004, rtol=1e-6)
+
+    def test_lost_entries(self):
+        from ovr.perf_stats import PerfStatsCollector
+        collector = PerfStatsCollector(self.session)
+        self.submitFrames(1)
+        collector.poll()
+        self.submitFrames(8) # more than MaxProvidedFrameStats between polls
+        self.assertEqual(collector.poll(), 5)
+        self.assertEqual(collector.lostFrameStats, 3)
+
+    def test_exact_dropped_frames(self):
+        from ovr.perf_stats import PerfStatsCollector
+        collector = PerfStatsCollector(self.session)
+        self.submitFrames(2)
+        collector.poll()
+        self.submitFrames(12, slowFrame=2) # the slow frame's entry is not polled in time
+        collector.poll()
+        self.assertEqual(collector.appDroppedFrames, 2)
+        summary = collector.summary(window=5)
+        self.assertEqual(summary["Frames"], 5)
+        self.assertEqual(summary["AppDroppedFrames"], 2)
+        self.assertEqual(sorted(summary["AppGpuElapsedTime"]), [50, 95, 99])
+        self.assertEqual(summary["AswActiveFraction"], 0.0)
+
+    def test_dropped_frames_after_reset(self):
+        from ovr.perf_stats import PerfStatsCollector
+        collector = PerfStatsCollector(self.session)
+        self.submitFrames(8, slowFrame=1)
+        collector.poll()
+        # The slow frame came before the first one polled, so its drops are in the baseline
+        self.submitFrames(3)
+        collector.poll()
+        self.assertEqual(collector.appDroppedFrames, 0)
+        # After a reset the runtime counts from zero, so even the first frame's drops count
+        collector.reset()
+        self.submitFrames(3, slowFrame=0)
+        collector.poll()
+        self.assertEqual(collector.appDroppedFrames, 2)
+
+    def test_background_thread(self):
+        from ovr.perf_stats import PerfStatsCollector
+        self.sim.clock = WallClock()
+        with PerfStatsCollector(self.session, rate=200) as collector:
+            self.submitFrames(9)
+            time.sleep(0.02)
+        self.assertEqual(collector.frameCount, 9)
+        self.assertEqual(collector.lostFrameStats, 0)
+
+    def test_background_error(self):
+        from ovr.perf_stats import PerfStatsCollector
+        self.sim.ovr_GetPerfStats = lambda session, outStats: ovr.Error_ServiceError
+        self.sim.install() # rebinds the native functions
+        collector = PerfStatsCollector(self.session, rate=200)
+        collector.start()
+        deadline = time.time() + 5.0
+        with self.assertRaises(ovr.OculusFunctionError):
+            while time.time() < deadline:
+                collector.summary()
+                time.sleep(0.001)
+        self.assertRaises(ovr.OculusFunctionError, collector.stop)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,100 @@
+#!/bin/env python
+
+import threading
+import unittest
+
+import ovr
+from ovr.pipeline import FramePipeline
+from simulated_session import SimulatedSessionTestCase
+
+
+class TestFramePipeline(SimulatedSessionTestCase):
+
+    def submit(self, frameIndex):
+        ovr.submitFrame(self.session, frameIndex, None, [], 0)
+
+    def test_simulation_runs_one_frame_ahead(self):
+        simulated = []
+        rendered = []
+        renderThread = threading.current_thread()
+        def simulate(frameIndex, displayTime):
+            self.assertIsNot(threading.current_thread(), renderThread)
+            simulated.append(frameIndex)
+            return (frameIndex, displayTime)
+        def render(frameIndex, state):
+            rendered.append((frameIndex, state))
+        with FramePipeline(self.session, simulate, render, self.submit) as pipeline:
+            for i in range(10):
+                pipeline.run_frame()
+        self.assertEqual(simulated, list(range(1, 12)))
+        self.assertEqual([frameIndex for frameIndex, state in rendered], list(range(1, 11)))
+        for frameIndex, state in rendered:
+            self.assertEqual(state[0], frameIndex)
+        # Each frame was displayed at the time it was simulated for
+        self.assertEqual(pipeline.lateFrames, 0)
+        for timing, submitted in zip(pipeline.timings, self.sim.submittedFrames):
+            self.assertEqual(timing.frameIndex, submitted.frameIndex)
+            self.assertAlmostEqual(timing.predictedDisplayTime, submitted.displayTime)
+            self.assertAlmostEqual(timing.displayTime, submitted.displayTime)
+        self.assertEqual(sorted(pipeline.stage_times()),
+                ["frameTime", "renderTime", "simulateTime", "submitTime", "waitTime"])
+
+    def test_late_frame(self):
+        def render(frameIndex, state):
+            if frameIndex == 5:
+                self.sim.clock.advance(2.5 / 90.0)
+        with FramePipeline(self.session, lambda i, t: None, render, self.submit) as pipeline:
+            for i in range(8):
+                pipeline.run_frame()
+        # Frame 6 was already being simulated for the old schedule, so it is late too
+        self.assertEqual(pipeline.lateFrames, 2)
+
+    def test_simulation_error(self):
+        def simulate(frameIndex, displayTime):
+            if frameIndex == 3:
+                raise RuntimeError("boom")
+        with FramePipeline(self.session, simulate, lambda i, s: None, self.submit) as pipeline:
+            pipeline.run_frame()
+            pipeline.run_frame()
+            self.assertRaises(RuntimeError, pipeline.run_frame)
+
+    def test_render_error(self):
+        simulated = []
+        rendered = []
+        failures = [3]
+        def simulate(frameIndex, displayTime):
+            simulated.append(frameIndex)
+            return (frameIndex, displayTime)
+        def render(frameIndex, state):
+            if frameIndex in failures:
+                failures.remove(frameIndex)
+                raise RuntimeError("boom")
+            rendered.append((frameIndex, state))
+        with FramePipeline(self.session, simulate, render, self.submit) as pipeline:
+            pipeline.run_frame()
+            pipeline.run_frame()
+            self.assertRaises(RuntimeError, pipeline.run_frame)
+            pipeline.run_frame()
+        # Frame 4 was simulated ahead of the failed frame 3; frame 3 is simulated again
+        self.assertEqual(simulated, [1, 2, 3, 4, 3, 4])
+        frameIndex, state = rendered[-1]
+        self.assertEqual((frameIndex, state[0]), (3, 3))
+        self.assertAlmostEqual(state[1], ovr.getPredictedDisplayTime(self.session, 3))
+
+    def test_overlap(self):
+        started = dict((i, threading.Event()) for i in range(1, 12))
+        overlapped = []
+        def simulate(frameIndex, displayTime):
+            started[frameIndex].set()
+        def submit(frameIndex):
+            # The simulation of the next frame runs while this frame is submitted
+            overlapped.append(started[frameIndex + 1].wait(5.0))
+            self.submit(frameIndex)
+        with FramePipeline(self.session, simulate, lambda i, s: None, submit) as pipeline:
+            for i in range(10):
+                pipeline.run_frame()
+        self.assertEqual(overlapped, [True] * 10)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,64 @@
+#!/bin/env python
+
+import math
+import threading
+import unittest
+
+import ovr
+from ovr.pose_service import PoseService, extrapolatePoseState
+from ovr.simulation import yawTrajectory
+from simulated_session import SimulatedSessionTestCase
+
+
+class TestPoseService(SimulatedSessionTestCase):
+
+    def simulatedRuntime(self):
+        sim = SimulatedSessionTestCase.simulatedRuntime(self)
+        sim.headTrajectory = yawTrajectory(amplitude=0.5, period=4.0, position=(0, 1.6, 0))
+        return sim
+
+    def yaw(self, poseState):
+        return 2 * math.asin(poseState.ThePose.Orientation.y)
+
+    def test_extrapolate(self):
+        state = ovr.getTrackingState(self.session, 2.0, False)
+        predicted = extrapolatePoseState(ovr.PoseStatef(), state.HeadPose, 0.02)
+        truth = ovr.getTrackingState(self.session, 2.02, False)
+        self.assertAlmostEqual(predicted.TimeInSeconds, 2.02)
+        self.assertAlmostEqual(self.yaw(predicted), self.yaw(truth.HeadPose), places=4)
+
+    def test_one_native_call_per_tick(self):
+        service = PoseService(self.session, tolerance=0.03)
+        service.update(1.5, True)
+        self.assertEqual(self.sim.callCounts["ovr_GetTrackingState"], 1)
+        out = ovr.TrackingState()
+        for dt in (-0.02, 0.0, 0.01, 0.025):
+            state = service.get_tracking_state(1.5 + dt, out)
+            self.assertIs(state, out)
+            truth = self.sim.ovr_GetTrackingState(self.session, 1.5 + dt, ovr.ovrFalse)
+            self.assertAlmostEqual(self.yaw(state.HeadPose), self.yaw(truth.HeadPose), places=4)
+            self.assertAlmostEqual(state.HeadPose.TimeInSeconds, 1.5 + dt)
+        self.assertEqual(self.sim.callCounts["ovr_GetTrackingState"], 5) # 1 + the 4 truth calls
+        self.assertEqual(service.cachedCalls, 4)
+        # Outside the tolerance window, the runtime is asked
+        service.get_tracking_state(1.6)
+        self.assertEqual(service.nativeCalls, 2)
+
+    def test_threads_share_sample(self):
+        service = PoseService(self.session)
+        service.update(1.0)
+        results = []
+        def worker():
+            for i in range(100):
+                results.append(service.get_head_pose(1.0).ThePose.Orientation.y)
+        threads = [threading.Thread(target=worker) for i in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(set(results)), 1)
+        self.assertEqual(service.nativeCalls, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,62 @@
+#!/bin/env python
+
+import unittest
+
+import ovr
+from ovr.prepared_frame import PreparedFrame
+from simulated_session import SimulatedSessionTestCase
+
+
+class TestPreparedFrame(SimulatedSessionTestCase):
+
+    def setUp(self):
+        SimulatedSessionTestCase.setUp(self)
+        desc = ovr.TextureSwapChainDesc()
+        desc.Type = ovr.Texture_2D
+        desc.Format = ovr.OVR_FORMAT_R8G8B8A8_UNORM_SRGB
+        desc.ArraySize = 1
+        desc.Width = 256
+        desc.Height = 256
+        desc.MipLevels = 1
+        desc.SampleCount = 1
+        self.chain = ovr.createTextureSwapChainGL(self.session, desc)
+        ovr.commitTextureSwapChain(self.session, self.chain)
+
+    def test_submit_in_place(self):
+        eyes = ovr.LayerEyeFov()
+        eyes.Header.Type = ovr.LayerType_EyeFov
+        eyes.ColorTexture[0] = self.chain
+        quad = ovr.LayerQuad()
+        quad.Header.Type = ovr.LayerType_Quad
+        quad.ColorTexture = self.chain
+        offsets = (ovr.Vector3f * 2)(ovr.Vector3f(-0.032, 0, 0), ovr.Vector3f(0.032, 0, 0))
+        frame = PreparedFrame(self.session, [eyes, quad.Header], offsets)
+        self.assertAlmostEqual(frame.viewScaleDesc.HmdToEyeOffset[1].x, 0.032, places=6)
+        pointers = frame.layerPtrList
+        for frameIndex in range(1, 4):
+            eyes.SensorSampleTime = self.sim.clock.now()
+            frame.submit(frameIndex)
+        self.assertIs(frame.layerPtrList, pointers)
+        self.assertEqual(self.sim.submittedFrames[-1].layerTypes, [ovr.LayerType_EyeFov, ovr.LayerType_Quad])
+        # Hide the quad without rebuilding anything
+        frame.set_layer(1, None)
+        frame.submit(4)
+        self.assertEqual(self.sim.submittedFrames[-1].layerTypes, [ovr.LayerType_EyeFov])
+        self.assertEqual(self.sim.submittedFrames[-1].frameIndex, 4)
+
+    def test_failure_raises(self):
+        frame = PreparedFrame(self.session, [ovr.LayerEyeFov()])
+        self.sim.displayLost = True
+        self.assertRaises(ovr.OculusFunctionError, frame.submit, 1)
+
+    def test_submit_frame_accepts_pointer_array(self):
+        layer = ovr.LayerEyeFov()
+        layer.Header.Type = ovr.LayerType_EyeFov
+        layer.ColorTexture[0] = self.chain
+        frame = PreparedFrame(self.session, [layer])
+        ovr.submitFrame(self.session, 1, frame.viewScaleDesc, frame.layerPtrList, 1)
+        self.assertEqual(self.sim.submittedFrames[-1].layerTypes, [ovr.LayerType_EyeFov])
+
+
+if __name__ == '__main__':
+    unittest.main()
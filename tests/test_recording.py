@@ -0,0 +1,115 @@
+#!/bin/env python
+
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+import ovr
+from ovr.simulation import yawTrajectory
+from simulated_session import SimulatedSessionTestCase
+
+
+@unittest.skipIf(numpy is None, "numpy is not installed")
+class TestRecording(SimulatedSessionTestCase):
+
+    def simulatedRuntime(self):
+        sim = SimulatedSessionTestCase.simulatedRuntime(self)
+        sim.headTrajectory = yawTrajectory(amplitude=0.5, period=1.0, position=(0, 1.6, 0))
+        return sim
+
+    def setUp(self):
+        self.tmpDir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpDir, "tracking.ovrrec")
+        SimulatedSessionTestCase.setUp(self)
+
+    def tearDown(self):
+        SimulatedSessionTestCase.tearDown(self)
+        shutil.rmtree(self.tmpDir)
+
+    def test_round_trip(self):
+        from ovr.recording import TrackingRecorder, Recording
+        recorder = TrackingRecorder(self.session, self.path, chunkSize=10,
+                controllerType=ovr.ControllerType_Touch)
+        for i in range(25):
+            self.sim.input.Buttons = i
+            recorder.sample()
+            self.clock.advance(0.001)
+        recorder.stop()
+        with Recording(self.path) as recording:
+            self.assertEqual(len(recording), 25)
+            self.assertEqual(len(list(recording.chunks())), 3)
+            self.assertEqual(recording.metadata["sdk"], "1.16")
+            times = recording["SampleTime"]
+            numpy.testing.assert_allclose(times, numpy.arange(25) * 0.001, atol=1e-9)
+            head = recording["HeadPose"]
+            numpy.testing.assert_allclose(head["ThePose"]["Position"]["y"], 1.6, rtol=1e-6)
+            yaw = 2 * numpy.arcsin(head["ThePose"]["Orientation"]["y"])
+            numpy.testing.assert_allclose(yaw, 0.5 * numpy.sin(2 * numpy.pi * times), atol=1e-5)
+            self.assertEqual(recording["HandPoses"].shape, (25, 2))
+            self.assertEqual(recording["InputState"]["Buttons"].tolist(), list(range(25)))
+            self.assertEqual(recording.row(12)["InputState"]["Buttons"], 12)
+
+    def test_truncated_file(self):
+        from ovr.recording import TrackingRecorder, Recording
+        recorder = TrackingRecorder(self.session, self.path, chunkSize=8)
+        for i in range(16):
+            recorder.sample()
+        recorder.stop()
+        with open(self.path, "r+b") as fh:
+            fh.truncate(os.path.getsize(self.path) - 100)
+        with Recording(self.path) as recording:
+            self.assertEqual(len(recording), 8)
+
+    def test_background_thread(self):
+        from ovr.recording import TrackingRecorder, Recording
+        self.sim.clock = clock = ovr.simulation.WallClock()
+        with TrackingRecorder(self.session, self.path, rate=500, chunkSize=16) as recorder:
+            time.sleep(0.1)
+        self.assertGreater(recorder.sampleCount, 10)
+        with Recording(self.path) as recording:
+            self.assertEqual(len(recording), recorder.sampleCount)
+            self.assertTrue(numpy.all(numpy.diff(recording["SampleTime"]) > 0))
+
+    def test_columns(self):
+        from ovr.recording import TrackingRecorder, Recording, POSE_FIELDS, TRACKING_COLUMNS
+        for columns, rowBytes in ((None, 176), (TRACKING_COLUMNS, 312)):
+            kwargs = {} if columns is None else {"columns": columns}
+            recorder = TrackingRecorder(self.session, self.path, chunkSize=4, **kwargs)
+            for i in range(8):
+                recorder.sample()
+                self.clock.advance(0.001)
+            recorder.stop()
+            with Recording(self.path) as recording:
+                self.assertEqual(sum(dtype.itemsize * int(numpy.prod(shape)) for name, dtype, shape in recording.columns),
+                        rowBytes)
+                head = recording["HeadPose"]
+                numpy.testing.assert_allclose(head["ThePose"]["Position"]["y"], 1.6, rtol=1e-6)
+                if columns is None:
+                    self.assertEqual(head.dtype.names, POSE_FIELDS)
+                    self.assertEqual(recording["HandPoses"].shape, (8, 2))
+                else:
+                    self.assertIn("LinearAcceleration", head.dtype.names)
+
+    def test_background_error(self):
+        from ovr.recording import TrackingRecorder, Recording
+        self.sim.clock = ovr.simulation.WallClock()
+        self.sim.ovr_GetInputState = lambda session, controllerType, inputState: ovr.Error_ServiceError
+        self.sim.install() # rebinds the native functions
+        recorder = TrackingRecorder(self.session, self.path, rate=500, controllerType=ovr.ControllerType_Touch)
+        recorder.start()
+        time.sleep(0.02)
+        self.assertRaises(ovr.OculusFunctionError, recorder.stop)
+        # The file was still closed, and is readable
+        with Recording(self.path) as recording:
+            self.assertEqual(len(recording), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
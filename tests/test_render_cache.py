@@ -0,0 +1,96 @@
+#!/bin/env python
+
+import collections
+import ctypes
+import unittest
+
+import ovr
+from ovr import render_cache
+from simulated_session import SimulatedSessionTestCase
+
+
+class TestRenderCache(SimulatedSessionTestCase):
+
+    useRift = True
+
+    def simulatedRuntime(self):
+        sim = SimulatedSessionTestCase.simulatedRuntime(self)
+        self.calls = collections.Counter()
+        for name in ("ovrMatrix4f_Projection", "ovrTimewarpProjectionDesc_FromProjection",
+                "ovr_GetRenderDesc", "ovr_GetFovTextureSize"):
+            setattr(sim, name, self.counting(name, getattr(sim, name)))
+        return sim
+
+    def setUp(self):
+        render_cache._projections.clear()
+        render_cache._timewarpProjections.clear()
+        SimulatedSessionTestCase.setUp(self)
+        self.fov = self.rift.hmdDesc.DefaultEyeFov[0]
+
+    def counting(self, name, function):
+        def wrapper(*args):
+            self.calls[name] += 1
+            return function(*args)
+        return wrapper
+
+    def test_projection(self):
+        for frame in range(10):
+            for eye in range(2):
+                self.rift.get_perspective(self.rift.hmdDesc.DefaultEyeFov[eye], 0.2, 100.0)
+        self.assertEqual(self.calls["ovrMatrix4f_Projection"], 2)
+        # Each caller gets its own copy of the cached matrix
+        mine = self.rift.get_perspective(self.fov, 0.2, 100.0)
+        self.assertIsNot(mine, self.rift.get_perspective(self.fov, 0.2, 100.0))
+        mine.M[0][0] = 42.0
+        self.assertNotEqual(self.rift.get_perspective(self.fov, 0.2, 100.0).M[0][0], 42.0)
+        self.assertEqual(self.calls["ovrMatrix4f_Projection"], 2)
+        # Another clip range or flag is another matrix
+        other = self.rift.get_perspective(self.fov, 0.1, 100.0, ovr.Projection_ClipRangeOpenGL)
+        self.assertEqual(self.calls["ovrMatrix4f_Projection"], 3)
+        self.assertNotEqual(other.M[2][2], self.rift.get_perspective(self.fov, 0.2, 100.0).M[2][2])
+        expected = ovr.matrix4f_Projection(self.fov, 0.2, 100.0, ovr.Projection_None)
+        cached = self.rift.get_perspective(self.fov, 0.2, 100.0)
+        self.assertEqual([list(row) for row in cached.M], [list(row) for row in expected.M])
+        timewarp = render_cache.timewarp_projection(self.fov, 0.2, 100.0)
+        self.assertIs(render_cache.timewarp_projection(self.fov, 0.2, 100.0), timewarp)
+        self.assertEqual(self.calls["ovrTimewarpProjectionDesc_FromProjection"], 1)
+
+    def test_projections_bounded(self):
+        for i in range(3 * render_cache.MAX_PROJECTIONS):
+            render_cache.projection(self.fov, 0.2, 100.0)
+            render_cache.projection(self.fov, 0.01 + 0.0001 * i, 100.0) # e.g. a dynamic near plane
+        self.assertEqual(len(render_cache._projections), render_cache.MAX_PROJECTIONS)
+        # The matrix in use every frame stays cached
+        self.assertEqual(self.calls["ovrMatrix4f_Projection"], 1 + 3 * render_cache.MAX_PROJECTIONS)
+
+    def test_session_values(self):
+        for i in range(5):
+            desc = self.rift.get_render_desc(ovr.Eye_Left, self.fov)
+            size = self.rift.get_fov_texture_size(ovr.Eye_Left, self.fov)
+        self.assertEqual(self.calls["ovr_GetRenderDesc"], 1)
+        self.assertEqual(self.calls["ovr_GetFovTextureSize"], 1)
+        self.rift.get_fov_texture_size(ovr.Eye_Left, self.fov, 0.5)
+        self.assertEqual(self.calls["ovr_GetFovTextureSize"], 2)
+        # Display lost
+        self.sim.displayLost = True
+        self.rift.get_session_status()
+        self.rift.get_render_desc(ovr.Eye_Left, self.fov)
+        self.assertEqual(self.calls["ovr_GetRenderDesc"], 2)
+        # New session
+        self.sim.displayLost = False
+        self.rift.destroy()
+        self.rift.init()
+        self.rift.get_render_desc(ovr.Eye_Left, self.fov)
+        self.assertEqual(self.calls["ovr_GetRenderDesc"], 3)
+        # Another session object at the same address is still another session
+        self.rift.render_cache.set_session(ctypes.cast(self.rift.session, type(self.rift.session)))
+        self.rift.get_render_desc(ovr.Eye_Left, self.fov)
+        self.assertEqual(self.calls["ovr_GetRenderDesc"], 4)
+        # Projections do not depend on the session
+        self.rift.get_perspective(self.fov, 0.2, 100.0)
+        self.rift.get_perspective(self.fov, 0.2, 100.0)
+        self.assertEqual(self.calls["ovrMatrix4f_Projection"], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,112 @@
+#!/bin/env python
+
+import math
+import os
+import shutil
+import tempfile
+import unittest
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+import ovr
+from ovr.simulation import SimulatedRuntime, SimulatedClock, yawTrajectory
+
+
+@unittest.skipIf(numpy is None, "numpy is not installed")
+class TestReplay(unittest.TestCase):
+
+    def setUp(self):
+        # Record 100 ms of a moving head at 1 kHz, with button presses
+        from ovr.recording import TrackingRecorder
+        self.tmpDir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpDir, "tracking.ovrrec")
+        clock = SimulatedClock()
+        sim = SimulatedRuntime(clock=clock)
+        sim.headTrajectory = yawTrajectory(amplitude=0.5, period=1.0, position=(0, 1.6, 0))
+        sim.install()
+        try:
+            ovr.initialize(None)
+            session, luid = ovr.create()
+            recorder = TrackingRecorder(session, self.path, chunkSize=32,
+                    controllerType=ovr.ControllerType_Touch)
+            for i in range(101):
+                sim.input.Buttons = ovr.Button_A if i >= 50 else 0
+                recorder.sample()
+                clock.advance(0.001)
+            recorder.stop()
+            ovr.destroy(session)
+            ovr.shutdown()
+        finally:
+            sim.uninstall()
+        self.replay = None
+
+    def tearDown(self):
+        if self.replay is not None:
+            ovr.destroy(self.session)
+            ovr.shutdown()
+            self.replay.uninstall()
+            self.replay.recording.close()
+        shutil.rmtree(self.tmpDir)
+
+    def start(self, **kwargs):
+        from ovr.replay import ReplayRuntime
+        self.replay = ReplayRuntime(self.path, **kwargs)
+        self.replay.install()
+        ovr.initialize(None)
+        self.session, luid = ovr.create()
+
+    def yaw(self, pose):
+        return 2 * math.asin(pose.ThePose.Orientation.y)
+
+    def test_interpolated_poses(self):
+        self.start()
+        self.assertEqual(self.replay.startTime, 0.0)
+        self.assertAlmostEqual(self.replay.endTime, 0.1)
+        for t in (0.0105, 0.0317, 0.0635, 0.0999):
+            state = ovr.getTrackingState(self.session, t, False)
+            self.assertAlmostEqual(self.yaw(state.HeadPose), 0.5 * math.sin(2 * math.pi * t), places=5)
+            self.assertAlmostEqual(state.HeadPose.ThePose.Position.y, 1.6, places=6)
+            self.assertEqual(state.HeadPose.TimeInSeconds, t)
+        # Past the end, poses are predicted from the last velocities
+        t = 0.11
+        state = ovr.getTrackingState(self.session, t, False)
+        self.assertAlmostEqual(self.yaw(state.HeadPose), 0.5 * math.sin(2 * math.pi * t), places=2)
+
+    def test_device_and_eye_poses(self):
+        self.start()
+        poses = ovr.getDevicePoses(self.session, [ovr.TrackedDevice_HMD], absTime=0.05)
+        self.assertAlmostEqual(self.yaw(poses[0]), 0.5 * math.sin(2 * math.pi * 0.05), places=5)
+        eyeRenderDesc = [ovr.getRenderDesc(self.session, eye, ovr.getHmdDesc(self.session).DefaultEyeFov[eye])
+                for eye in range(2)]
+        offsets = (ovr.Vector3f * 2)(*[desc.HmdToEyeOffset for desc in eyeRenderDesc])
+        eyePoses = (ovr.Posef * 2)()
+        ovr.getEyePoses(self.session, 0, True, offsets, eyePoses)
+        self.assertAlmostEqual(eyePoses[0].Position.y, 1.6, places=5)
+
+    def test_recorded_input(self):
+        self.start()
+        self.assertEqual(ovr.getInputState(self.session, ovr.ControllerType_Touch).Buttons, 0)
+        self.replay.clock.advance(0.06)
+        inputState = ovr.getInputState(self.session, ovr.ControllerType_Touch)
+        self.assertEqual(inputState.Buttons, ovr.Button_A)
+
+    def test_faster_than_real_time(self):
+        self.start()
+        offsets = (ovr.Vector3f * 2)()
+        eyePoses = (ovr.Posef * 2)()
+        frameIndex = 0
+        while ovr.toOvrBool(ovr.getSessionStatus(self.session).ShouldQuit) != ovr.ovrTrue:
+            frameIndex += 1
+            ovr.getEyePoses(self.session, frameIndex, False, offsets, eyePoses)
+            ovr.submitFrame(self.session, frameIndex, None, [], 0)
+        self.assertTrue(self.replay.finished)
+        # 100 ms at 90 Hz
+        self.assertGreaterEqual(frameIndex, 9)
+        self.assertLessEqual(frameIndex, 11)
+
+
+if __name__ == '__main__':
+    unittest.main()
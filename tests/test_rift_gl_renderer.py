@@ -0,0 +1,148 @@
+#!/bin/env python
+
+import unittest
+
+from offscreen_gl import context, createTexture
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+import ovr
+from ovr.simulation import SimulatedRuntime
+from simulated_session import SimulatedSessionTestCase
+
+
+@unittest.skipIf(context is None, "no offscreen OpenGL 3.3 core profile context")
+class TestRiftGLRenderer(SimulatedSessionTestCase):
+
+    useRift = True
+
+    def simulatedRuntime(self):
+        return SimulatedRuntime(clock=self.clock, createTexture=createTexture)
+
+    def setUp(self):
+        from ovr.rift_gl_renderer import RiftGLRenderer
+        from ovr.triangle_drawer import TriangleDrawer
+        SimulatedSessionTestCase.setUp(self)
+        self.renderer = RiftGLRenderer(self.rift, pixel_density=0.1)
+        self.renderer.append(TriangleDrawer())
+        self.renderer.init_gl()
+
+    def tearDown(self):
+        self.renderer.dispose_gl()
+        SimulatedSessionTestCase.tearDown(self)
+
+    def readEyeBuffer(self):
+        from OpenGL import GL
+        size = self.renderer.buffer_size
+        GL.glBindFramebuffer(GL.GL_READ_FRAMEBUFFER, self.renderer.fbo)
+        pixels = GL.glReadPixels(0, 0, size.w, size.h, GL.GL_RGBA, GL.GL_UNSIGNED_BYTE)
+        GL.glBindFramebuffer(GL.GL_READ_FRAMEBUFFER, 0)
+        return numpy.frombuffer(pixels, dtype=numpy.uint8).reshape(size.h, size.w, 4)
+
+    def test_renders_both_eyes(self):
+        self.renderer.display_rift_gl()
+        frame = self.sim.submittedFrames[-1]
+        self.assertEqual(frame.layerTypes, [ovr.LayerType_EyeFov])
+        pixels = self.readEyeBuffer()
+        grey = numpy.all(abs(pixels[..., :3] - 76.5) < 1, axis=-1) # 0.3 * 255
+        blue = (pixels[..., 2] == 255) & (pixels[..., 0] == 0)
+        half = self.renderer.buffer_size.w // 2
+        for eye in range(2):
+            self.assertGreater(grey[:, eye * half:(eye + 1) * half].sum(), 10)
+        self.assertGreater(blue.sum(), grey.sum())
+        # The eyes see the triangle from different places
+        left = numpy.nonzero(grey[:, :half].any(axis=0))[0].mean()
+        right = numpy.nonzero(grey[:, half:].any(axis=0))[0].mean()
+        self.assertGreater(left, right)
+
+    def test_single_pass_stereo(self):
+        from ovr.triangle_drawer import TriangleDrawer
+        calls = []
+        class CountingDrawer(TriangleDrawer):
+            def display_gl(self, instance_count=1):
+                calls.append(instance_count)
+                TriangleDrawer.display_gl(self, instance_count)
+        self.renderer[0].dispose_gl()
+        self.renderer[0] = CountingDrawer()
+        self.renderer[0].init_gl()
+        self.renderer.display_rift_gl()
+        multiPass = self.readEyeBuffer().copy()
+        self.assertEqual(calls, [1, 1])
+        del calls[:]
+        self.renderer.single_pass_stereo = True
+        self.renderer.display_rift_gl()
+        self.assertEqual(calls, [2])
+        singlePass = self.readEyeBuffer()
+        # Same picture, give or take rasterization at the triangle edges
+        differs = numpy.any(singlePass != multiPass, axis=-1)
+        self.assertLess(differs.sum(), 0.1 * numpy.all(abs(multiPass[..., :3] - 76.5) < 1, axis=-1).sum())
+
+    def test_pixel_density(self):
+        first = self.renderer.target
+        self.renderer.set_pixel_density(0.05)
+        self.assertLess(self.renderer.buffer_size.w, first.width)
+        self.assertEqual(self.renderer.layer.Viewport[1].Pos.x, self.renderer.buffer_size.w // 2)
+        self.renderer.display_rift_gl()
+        self.renderer.set_pixel_density(0.1)
+        self.assertIs(self.renderer.target, first)
+        self.renderer.display_rift_gl()
+        self.assertEqual(self.renderer.swap_chain_pool.created, 2)
+
+    def test_render_scale(self):
+        target = self.renderer.target
+        self.renderer.set_render_scale(0.5)
+        viewports = self.renderer.layer.Viewport
+        width, height = viewports[0].Size.w, viewports[0].Size.h
+        self.assertEqual(width, int(round(self.renderer.buffer_size.w // 2 * 0.5)))
+        self.assertEqual(viewports[1].Pos.x, width)
+        self.renderer.display_rift_gl()
+        self.assertIs(self.renderer.target, target)
+        grey = numpy.all(abs(self.readEyeBuffer()[..., :3] - 76.5) < 1, axis=-1)
+        for eye in range(2):
+            self.assertGreater(grey[:height, eye * width:(eye + 1) * width].sum(), 0)
+        self.assertEqual(grey[:, 2 * width:].sum() + grey[height:, :].sum(), 0)
+
+    def test_mirror_recording(self):
+        import io
+        from ovr.rift_gl_renderer import RiftGLRenderer
+        self.renderer.dispose_gl()
+        self.renderer = RiftGLRenderer(self.rift, pixel_density=0.1, mirror_size=(32, 16))
+        self.renderer.init_gl()
+        blits = []
+        self.renderer.mirror.blit = lambda width, height: blits.append((width, height)) # no window here
+        sink = io.BytesIO()
+        recorder = self.renderer.start_recording(sink)
+        for i in range(3):
+            self.renderer.display_gl()
+        self.renderer.stop_recording()
+        self.assertEqual(len(blits), 3)
+        self.assertEqual(recorder.written, 3)
+        self.assertEqual(len(sink.getvalue()), 3 * 32 * 16 * 4)
+
+    def test_hud_layer(self):
+        draws = []
+        pose = ovr.Posef(ovr.Quatf(0, 0, 0, 1), ovr.Vector3f(0, 0, -1))
+        hud = self.renderer.layer_manager.add_quad((32, 16), (0.4, 0.2), pose, draws.append)
+        for i in range(3):
+            self.renderer.display_rift_gl()
+        self.assertEqual(draws, [hud])
+        self.assertEqual(self.sim.submittedFrames[-1].layerTypes, [ovr.LayerType_EyeFov, ovr.LayerType_Quad])
+
+    def test_frames_advance(self):
+        for i in range(3):
+            self.renderer.display_rift_gl()
+        self.assertEqual(len(self.sim.submittedFrames), 3)
+        self.assertEqual(self.renderer.frame_index, 3)
+        self.assertEqual(self.sim.callCounts["ovr_GetTrackingState"], 3)
+
+    def test_sensor_sample_time(self):
+        self.sim.clock.advance(1.5)
+        self.renderer.display_rift_gl()
+        self.assertEqual(self.renderer.layer.SensorSampleTime, self.sim.clock.now())
+
+
+if __name__ == '__main__':
+    unittest.main()
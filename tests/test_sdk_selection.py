@@ -0,0 +1,81 @@
+#!/bin/env python
+
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+
+import ovr
+from ovr import _loader
+
+
+class TestSdkSelection(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpDir = tempfile.mkdtemp()
+        self.savedEnv = dict(os.environ)
+        os.environ[_loader.CACHE_DIR_ENV] = os.path.join(self.tmpDir, "cache")
+
+    def tearDown(self):
+        os.environ.clear()
+        os.environ.update(self.savedEnv)
+        shutil.rmtree(self.tmpDir)
+
+    def test_parse_version(self):
+        self.assertEqual(_loader.parseSdkVersion("1.16"), (1, 16, 0))
+        self.assertEqual(_loader.parseSdkVersion("1.10.1.0-foo"), (1, 10, 1))
+        self.assertEqual(_loader.parseSdkVersion((0, 8)), (0, 8, 0))
+        self.assertRaises(ValueError, _loader.parseSdkVersion, "latest")
+
+    def test_module_for_version(self):
+        self.assertEqual(_loader.moduleForVersion("1.16"), "_ovr1160")
+        self.assertEqual(_loader.moduleForVersion("1.12"), "_ovr1110")
+        self.assertEqual(_loader.moduleForVersion("1.10.1"), "_ovr1101")
+        self.assertEqual(_loader.moduleForVersion("2.0"), _loader.DEFAULT_MODULE)
+        self.assertRaises(ValueError, _loader.moduleForVersion, "0.6")
+
+    def test_environment_variable(self):
+        os.environ[_loader.SDK_VERSION_ENV] = "1.13"
+        self.assertEqual(_loader.selectBindingModule(), "_ovr1130")
+        root = os.path.dirname(os.path.dirname(os.path.abspath(ovr.__file__)))
+        script = "import ovr; ovr.Posef; assert ovr.MINOR_VERSION == 13, ovr.MINOR_VERSION"
+        subprocess.check_call([sys.executable, "-c", script], cwd=root)
+
+    def test_cached_selection(self):
+        # Fake runtime library file, so the cache has something to be keyed on
+        libraryName = _loader.runtimeLibraryName("1")
+        for fileName in (libraryName + ".dll", "lib%s.so" % libraryName):
+            open(os.path.join(self.tmpDir, fileName), "w").close()
+        os.environ["PATH"] = self.tmpDir
+        os.environ["LD_LIBRARY_PATH"] = self.tmpDir
+        path = _loader.findRuntimeLibrary(libraryName)
+        self.assertIsNotNone(path)
+        self.assertIsNone(_loader.readCachedSelection())
+        _loader.writeCachedSelection(path, "_ovr1110")
+        self.assertEqual(_loader.readCachedSelection(), "_ovr1110")
+        self.assertEqual(_loader.selectBindingModule(), "_ovr1110")
+        # A replaced runtime library invalidates the cached entry
+        with open(path, "w") as fh:
+            fh.write("upgraded")
+        self.assertIsNone(_loader.readCachedSelection())
+
+    def test_cache_without_os_replace(self):
+        # Python 2 has no os.replace
+        libraryPath = os.path.join(self.tmpDir, "runtime")
+        open(libraryPath, "w").close()
+        replace = os.replace
+        del os.replace
+        try:
+            _loader.writeCachedSelection(libraryPath, "_ovr1110")
+            _loader.writeCachedSelection(libraryPath, "_ovr1130")
+        finally:
+            os.replace = replace
+        cache = _loader._readCache()
+        self.assertEqual(list(cache.values()), ["_ovr1130"])
+        self.assertEqual(os.listdir(_loader.cacheDirectory()), [_loader._CACHE_FILE_NAME])
+
+
+if __name__ == '__main__':
+    unittest.main()
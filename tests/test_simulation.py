@@ -0,0 +1,144 @@
+#!/bin/env python
+
+import ctypes
+import math
+import unittest
+
+import ovr
+from ovr.simulation import SimulatedRuntime, yawTrajectory
+from simulated_session import SimulatedSessionTestCase
+
+
+class TestSimulatedRuntime(SimulatedSessionTestCase):
+
+    def simulatedRuntime(self):
+        return SimulatedRuntime(clock=self.clock, gpuTime=0.004)
+
+    def createSwapChain(self, width=1024, height=512):
+        desc = ovr.TextureSwapChainDesc()
+        desc.Type = ovr.Texture_2D
+        desc.Format = ovr.OVR_FORMAT_R8G8B8A8_UNORM_SRGB
+        desc.ArraySize = 1
+        desc.Width = width
+        desc.Height = height
+        desc.MipLevels = 1
+        desc.SampleCount = 1
+        desc.StaticImage = ovr.ovrFalse
+        return ovr.createTextureSwapChainGL(self.session, desc)
+
+    def eyeFovLayer(self, chain):
+        layer = ovr.LayerEyeFov()
+        layer.Header.Type = ovr.LayerType_EyeFov
+        hmdDesc = ovr.getHmdDesc(self.session)
+        for eye in range(2):
+            layer.ColorTexture[eye] = chain
+            layer.Viewport[eye] = ovr.Recti(ovr.Vector2i(512 * eye, 0), ovr.Sizei(512, 512))
+            layer.Fov[eye] = hmdDesc.DefaultEyeFov[eye]
+        return layer
+
+    def test_hmd_desc(self):
+        hmdDesc = ovr.getHmdDesc(self.session)
+        self.assertEqual(hmdDesc.Resolution.w, 2160)
+        self.assertAlmostEqual(hmdDesc.DisplayRefreshRate, 90.0, places=4)
+        fov = hmdDesc.DefaultEyeFov
+        self.assertAlmostEqual(fov[0].LeftTan, fov[1].RightTan, places=5)
+        renderDesc = ovr.getRenderDesc(self.session, ovr.Eye_Left, fov[0])
+        self.assertAlmostEqual(renderDesc.HmdToEyeOffset.x, -0.032, places=5)
+
+    def test_scripted_head_pose(self):
+        self.sim.headTrajectory = yawTrajectory(amplitude=0.5, period=4.0)
+        state = ovr.getTrackingState(self.session, 1.0, True)
+        orientation = state.HeadPose.ThePose.Orientation
+        self.assertAlmostEqual(2.0 * math.asin(orientation.y), 0.5, places=4)
+        self.assertAlmostEqual(state.HeadPose.TimeInSeconds, 1.0)
+        # Turning velocity is zero at the extreme of the swing, and largest at the middle
+        self.assertAlmostEqual(state.HeadPose.AngularVelocity.y, 0.0, places=3)
+        state = ovr.getTrackingState(self.session, 2.0, False)
+        self.assertAlmostEqual(state.HeadPose.AngularVelocity.y, -0.5 * 2 * math.pi / 4.0, places=3)
+
+    def test_tracking_latency(self):
+        self.sim.trackingLatency = 0.002
+        ovr.getTrackingState(self.session, 0, False)
+        self.assertAlmostEqual(ovr.getTimeInSeconds(), 0.002)
+
+    def test_frame_loop(self):
+        chain = self.createSwapChain()
+        self.assertEqual(ovr.getTextureSwapChainLength(self.session, chain).value, 3)
+        layer = self.eyeFovLayer(chain)
+        textureIds = set()
+        for frameIndex in range(1, 11):
+            textureIds.add(ovr.getTextureSwapChainBufferGL(self.session, chain, -1).value)
+            ovr.commitTextureSwapChain(self.session, chain)
+            ovr.submitFrame(self.session, frameIndex, None, [layer.Header], 1)
+        self.assertEqual(len(textureIds), 3)
+        # Frame pacing holds the app to the refresh rate, without sleeping for real
+        self.assertAlmostEqual(self.clock.now(), 9 / 90.0, places=6)
+        perfStats = ovr.getPerfStats(self.session)
+        self.assertEqual(perfStats.FrameStatsCount, 5)
+        self.assertTrue(ovr.toOvrBool(perfStats.AnyFrameStatsDropped) == ovr.ovrTrue)
+        self.assertEqual(perfStats.FrameStats[0].AppFrameIndex, 10)
+        self.assertEqual(perfStats.FrameStats[0].AppDroppedFrameCount, 0)
+
+    def test_dropped_frames(self):
+        chain = self.createSwapChain()
+        layer = self.eyeFovLayer(chain)
+        for frameIndex in range(1, 4):
+            if frameIndex == 3:
+                self.clock.advance(3.5 / 90.0) # a slow frame misses two vsyncs
+            ovr.commitTextureSwapChain(self.session, chain)
+            ovr.submitFrame(self.session, frameIndex, None, [layer.Header], 1)
+        perfStats = ovr.getPerfStats(self.session)
+        self.assertEqual(perfStats.FrameStatsCount, 3)
+        self.assertEqual(perfStats.FrameStats[0].AppDroppedFrameCount, 2)
+        self.assertEqual(perfStats.FrameStats[0].HmdVsyncIndex - perfStats.FrameStats[1].HmdVsyncIndex, 3)
+
+    def test_uncommitted_swap_chain(self):
+        layer = self.eyeFovLayer(self.createSwapChain())
+        self.assertRaises(ovr.OculusFunctionError, ovr.submitFrame, self.session, 1, None, [layer.Header], 1)
+
+    def test_display_lost(self):
+        self.sim.displayLost = True
+        self.assertTrue(ovr.getSessionStatus(self.session).DisplayLost)
+        layer = ovr.LayerEyeFov()
+        self.assertRaises(ovr.OculusFunctionError, ovr.submitFrame, self.session, 1, None, [layer.Header], 0)
+
+    def test_eye_poses(self):
+        hmdToEyeOffset = (ovr.Vector3f * 2)(ovr.Vector3f(-0.032, 0, 0), ovr.Vector3f(0.032, 0, 0))
+        eyePoses = (ovr.Posef * 2)()
+        ovr.getEyePoses(self.session, 0, True, hmdToEyeOffset, eyePoses)
+        self.assertAlmostEqual(eyePoses[1].Position.x - eyePoses[0].Position.x, 0.064, places=6)
+
+    def test_input(self):
+        self.sim.input.Buttons = ovr.Button_A
+        self.sim.input.IndexTrigger[ovr.Hand_Right] = 0.75
+        inputState = ovr.getInputState(self.session, ovr.ControllerType_Touch)
+        self.assertEqual(inputState.Buttons, ovr.Button_A)
+        self.assertAlmostEqual(inputState.IndexTrigger[ovr.Hand_Right], 0.75)
+        self.assertEqual(inputState.ControllerType, ovr.ControllerType_Touch)
+
+    def test_haptics(self):
+        desc = ovr.getTouchHapticsDesc(self.session, ovr.ControllerType_RTouch)
+        samples = (ctypes.c_ubyte * 40)(*range(40))
+        buffer_ = ovr.HapticsBuffer()
+        buffer_.Samples = ctypes.cast(samples, ctypes.c_void_p)
+        buffer_.SamplesCount = len(samples)
+        buffer_.SubmitMode = ovr.HapticsBufferSubmit_Enqueue
+        ovr.submitControllerVibration(self.session, ovr.ControllerType_RTouch, buffer_)
+        self.clock.advance(10.0 / desc.SampleRateHz)
+        state = ovr.HapticsPlaybackState()
+        ovr.getControllerVibrationState(self.session, ovr.ControllerType_RTouch, state)
+        self.assertEqual(state.SamplesQueued, 30)
+        self.assertEqual(bytes(self.sim.hapticsPlayed[ovr.ControllerType_RTouch]), bytes(bytearray(range(10))))
+
+    def test_projection(self):
+        fov = ovr.getHmdDesc(self.session).DefaultEyeFov[0]
+        proj = ovr.matrix4f_Projection(fov, 0.2, 100.0, ovr.Projection_ClipRangeOpenGL)
+        self.assertAlmostEqual(proj.M[3][2], -1.0)
+        self.assertAlmostEqual(proj.M[0][0], 2.0 / (fov.LeftTan + fov.RightTan), places=5)
+        # near plane maps to -1 in OpenGL clip space
+        z, w = proj.M[2][2] * -0.2 + proj.M[2][3], proj.M[3][2] * -0.2
+        self.assertAlmostEqual(z / w, -1.0, places=5)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,105 @@
+#!/bin/env python
+
+import unittest
+
+from offscreen_gl import context, createTexture
+
+import ovr
+from ovr.simulation import SimulatedRuntime
+from simulated_session import SimulatedSessionTestCase
+
+
+@unittest.skipIf(context is None, "no offscreen OpenGL 3.3 core profile context")
+class TestSwapChainPool(SimulatedSessionTestCase):
+
+    def simulatedRuntime(self):
+        return SimulatedRuntime(clock=self.clock, createTexture=createTexture)
+
+    def setUp(self):
+        from ovr.swap_chain_pool import SwapChainPool
+        SimulatedSessionTestCase.setUp(self)
+        self.pool = SwapChainPool(self.session)
+
+    def tearDown(self):
+        self.pool.clear()
+        SimulatedSessionTestCase.tearDown(self)
+
+    def test_reuse_across_resizes(self):
+        small = self.pool.acquire((200, 100))
+        self.assertEqual(small.length, 3)
+        self.assertEqual(len(set(small.textureIds)), 3)
+        fbos = list(small.fbos)
+        small.release()
+        large = self.pool.acquire(ovr.Sizei(400, 200))
+        large.release()
+        again = self.pool.acquire((200, 100))
+        self.assertIs(again, small)
+        self.assertEqual(again.fbos, fbos)
+        self.assertEqual(self.pool.created, 2)
+        self.assertEqual(self.pool.reused, 1)
+        # Different format or sample count is a different target
+        other = self.pool.acquire((200, 100), sampleCount=4)
+        self.assertIsNot(other, small)
+
+    def test_current_texture_without_buffer_queries(self):
+        target = self.pool.acquire((64, 64))
+        before = self.sim.callCounts["ovr_GetTextureSwapChainBufferGL"]
+        seen = []
+        for frame in range(6):
+            seen.append(target.current_texture_id())
+            target.commit()
+        self.assertEqual(seen, target.textureIds * 2)
+        self.assertEqual(self.sim.callCounts["ovr_GetTextureSwapChainBufferGL"], before)
+
+    def _colorAttachment(self, fbo):
+        from OpenGL.GL import glBindFramebuffer, glGetFramebufferAttachmentParameteriv, GL_FRAMEBUFFER, \
+            GL_COLOR_ATTACHMENT0, GL_FRAMEBUFFER_ATTACHMENT_OBJECT_NAME
+        glBindFramebuffer(GL_FRAMEBUFFER, fbo)
+        name = glGetFramebufferAttachmentParameteriv(GL_FRAMEBUFFER, GL_COLOR_ATTACHMENT0,
+                GL_FRAMEBUFFER_ATTACHMENT_OBJECT_NAME)
+        glBindFramebuffer(GL_FRAMEBUFFER, 0)
+        return int(name)
+
+    def test_framebuffer_per_index_validated_once(self):
+        import ovr.swap_chain_pool as swap_chain_pool
+        checks = []
+        checkStatus = swap_chain_pool.glCheckFramebufferStatus
+        def countingCheck(target):
+            checks.append(target)
+            return checkStatus(target)
+        swap_chain_pool.glCheckFramebufferStatus = countingCheck
+        try:
+            target = self.pool.acquire((64, 64))
+            self.assertEqual(len(checks), target.length)
+            self.assertEqual(len(set(target.fbos)), target.length)
+            for fbo, textureId in zip(target.fbos, target.textureIds):
+                self.assertEqual(self._colorAttachment(fbo), textureId)
+            seen = []
+            for frame in range(6):
+                seen.append(target.current_fbo())
+                target.commit()
+            self.assertEqual(seen, target.fbos * 2)
+            target.release()
+            self.pool.acquire((64, 64))
+            self.assertEqual(len(checks), target.length)
+        finally:
+            swap_chain_pool.glCheckFramebufferStatus = checkStatus
+
+    def test_session_restart(self):
+        target = self.pool.acquire((64, 64))
+        fbos = list(target.fbos)
+        self.pool.destroy_swap_chains()
+        ovr.destroy(self.session)
+        self.session, luid = ovr.create()
+        self.pool.set_session(self.session)
+        self.assertIsNotNone(target.chain)
+        self.assertEqual(target.fbos, fbos)
+        # The framebuffers now render into the new session's textures
+        for fbo, textureId in zip(target.fbos, target.textureIds):
+            self.assertEqual(self._colorAttachment(fbo), textureId)
+        target.commit()
+        self.assertEqual(self.pool.created, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()